@@ -8,11 +8,20 @@ import os  # <-- IMPORTANTE para manipular caminhos
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Perfil de execução: "desenvolvimento" (padrão) ou "producao".
+# Em produção: DEBUG desligado, conexões persistentes, SQLite em WAL,
+# templates compilados em cache e sessões lidas do cache.
+PERFIL = os.environ.get('DJANGO_PERFIL', 'desenvolvimento')
+PRODUCAO = PERFIL == 'producao'
+
 
 # Segurança
-SECRET_KEY = 'django-insecure-_kbzn*1xrh$merov!7f0m9gi5(cti_oe@t$2n(ek-i(p!w%fn^'
-DEBUG = True
-ALLOWED_HOSTS = ['confeitaria-fucq.onrender.com']
+SECRET_KEY = os.environ.get(
+    'DJANGO_SECRET_KEY',
+    'django-insecure-_kbzn*1xrh$merov!7f0m9gi5(cti_oe@t$2n(ek-i(p!w%fn^')
+DEBUG = os.environ.get('DJANGO_DEBUG', '0' if PRODUCAO else '1') == '1'
+ALLOWED_HOSTS = os.environ.get(
+    'DJANGO_ALLOWED_HOSTS', 'confeitaria-fucq.onrender.com').split(',')
 
 
 # Application definition
@@ -27,6 +36,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.InstrumentacaoSQLMiddleware',  # primeiro: mede a requisição inteira
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,6 +66,17 @@ TEMPLATES = [
 ]
 
 
+if PRODUCAO:
+    # Loader em cache explícito: cada template é lido e compilado uma vez por processo
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
+
 WSGI_APPLICATION = 'confeitaria.wsgi.application'
 
 
@@ -67,6 +88,31 @@ DATABASES = {
     }
 }
 
+if os.environ.get('DATABASE_URL') or PRODUCAO:
+    import dj_database_url
+
+    DATABASES['default'] = dj_database_url.config(
+        default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}",
+        # Reaproveita a conexão entre requisições (em vez de abrir uma por requisição)
+        conn_max_age=600 if PRODUCAO else 0,
+        conn_health_checks=PRODUCAO,
+    )
+
+# PRAGMAs aplicados a cada nova conexão SQLite (ver core/signals.py).
+# WAL deixa leituras e a escrita acontecerem ao mesmo tempo entre os
+# workers; synchronous=NORMAL é seguro em WAL e evita um fsync por commit.
+SQLITE_PRAGMAS = {}
+if PRODUCAO and DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,         # ms esperando o lock de escrita
+        'mmap_size': 128 * 1024 * 1024,
+    }
+    # BEGIN IMMEDIATE: a transação pega o lock de escrita no início, em vez
+    # de falhar com "database is locked" ao tentar promover uma leitura
+    DATABASES['default'].setdefault('OPTIONS', {})['transaction_mode'] = 'IMMEDIATE'
+
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -97,3 +143,47 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Para onde redireciona se não estiver logado
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/'               # Para onde vai depois de logar
+
+# Tempo (segundos) que os grupos de cada usuário ficam em cache; 0 desativa
+GRUPOS_CACHE_TIMEOUT = 300
+
+# Cache compartilhado entre os processos do servidor (arquivos em disco):
+# grupos dos usuários, versões por modelo e listas/fragmentos em cache
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('DJANGO_CACHE_DIR', os.path.join(BASE_DIR, 'cache')),
+        'TIMEOUT': 600,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+}
+
+# Tempo (segundos) das listas e fragmentos em cache; as entradas também
+# deixam de valer assim que um modelo do qual dependem é alterado
+CACHE_LISTAS_TIMEOUT = 600
+
+if PRODUCAO:
+    # Sessões lidas do cache (gravadas também no banco, para não se perderem
+    # quando o cache descartar entradas)
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Instrumentação SQL por requisição (core/middleware.py): contagem de
+# consultas e log das requisições acima dos limites abaixo, ligada também
+# em produção. O cabeçalho Server-Timing expõe os tempos ao cliente: por
+# padrão só com DEBUG
+INSTRUMENTACAO_SQL = os.environ.get('DJANGO_INSTRUMENTACAO_SQL', '1') == '1'
+INSTRUMENTACAO_SERVER_TIMING = os.environ.get(
+    'DJANGO_SERVER_TIMING', '1' if DEBUG else '0') == '1'
+INSTRUMENTACAO_LIMITE_CONSULTAS = int(os.environ.get('DJANGO_LIMITE_CONSULTAS', 50))
+INSTRUMENTACAO_LIMITE_MS = int(os.environ.get('DJANGO_LIMITE_MS', 500))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
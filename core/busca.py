@@ -0,0 +1,344 @@
+# core/busca.py
+import re
+import unicodedata
+
+from django.apps import apps as django_apps
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db.models import Case, IntegerField, Value, When
+from django.db.models.expressions import RawSQL
+from django.urls import reverse
+
+from .papeis import pertence
+
+TAMANHO_LOTE = 2000
+LIMITE_PADRAO = 20
+
+TABELA_FTS = "core_busca_fts"
+
+# Tabela FTS5 de conteúdo externo: o texto fica em core_indicebusca e os
+# gatilhos mantêm o índice invertido em dia a cada insert/update/delete.
+# remove_diacritics 2 faz "joao" casar com "João".
+SQL_CRIAR_FTS = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_FTS} USING fts5(
+        titulo, texto,
+        content='core_indicebusca', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS core_busca_ai AFTER INSERT ON core_indicebusca BEGIN
+        INSERT INTO {TABELA_FTS}(rowid, titulo, texto) VALUES (new.id, new.titulo, new.texto);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS core_busca_ad AFTER DELETE ON core_indicebusca BEGIN
+        INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, titulo, texto)
+        VALUES ('delete', old.id, old.titulo, old.texto);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS core_busca_au AFTER UPDATE ON core_indicebusca BEGIN
+        INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, titulo, texto)
+        VALUES ('delete', old.id, old.titulo, old.texto);
+        INSERT INTO {TABELA_FTS}(rowid, titulo, texto) VALUES (new.id, new.titulo, new.texto);
+    END""",
+]
+
+SQL_REMOVER_FTS = [
+    "DROP TRIGGER IF EXISTS core_busca_ai",
+    "DROP TRIGGER IF EXISTS core_busca_ad",
+    "DROP TRIGGER IF EXISTS core_busca_au",
+    f"DROP TABLE IF EXISTS {TABELA_FTS}",
+]
+
+
+def normalizar(texto):
+    """Minúsculas e sem acentos: 'João' -> 'joao'."""
+    decomposto = unicodedata.normalize("NFKD", str(texto or ""))
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).lower()
+
+
+def termos(consulta):
+    return re.findall(r"\w+", normalizar(consulta))
+
+
+def _juntar(*partes):
+    return " ".join(str(p) for p in partes if p)
+
+
+# ------------------ DOCUMENTOS INDEXADOS ------------------
+# Cada fonte sabe montar (titulo, subtitulo, texto) de uma instância usando
+# apenas atributos de campo, para funcionar também com os modelos
+# históricos dentro das migrações.
+
+def _doc_colaborador(c):
+    return (
+        c.nome,
+        _juntar(f"RC {c.rc}", c.funcao),
+        _juntar(c.nome, c.rc, c.funcao, c.CPF_RG, c.email, c.cidade),
+    )
+
+
+def _doc_insumo(i):
+    return (i.nome, i.unidade_base, i.nome)
+
+
+def _doc_catalogo(p):
+    return (p.nome, (p.descricao or "")[:120], _juntar(p.nome, p.descricao))
+
+
+def _doc_ficha(f):
+    catalogo = f.produto.catalogo if f.produto_id else None
+    produto = catalogo.nome if catalogo else ""
+    return (
+        _juntar(f"Ficha #{f.id}", produto),
+        f.categoria or "",
+        _juntar(produto, f.categoria, f.observacoes),
+    )
+
+
+FONTES = {
+    "colaborador": {
+        "modelo": "core.Colaborador",
+        "documento": _doc_colaborador,
+        "url": "colaboradores_detail",
+        "rotulo": "Colaborador",
+        "grupo": "RH",
+    },
+    "insumo": {
+        "modelo": "core.Insumo",
+        "documento": _doc_insumo,
+        "url": "insumos_edit",
+        "rotulo": "Insumo",
+        "grupo": "Insumos",
+    },
+    "catalogo": {
+        "modelo": "core.CatalogoProduto",
+        "documento": _doc_catalogo,
+        "url": "catalogo_edit",
+        "rotulo": "Catálogo",
+        "grupo": "Administrador",
+    },
+    "ficha": {
+        "modelo": "core.FichaProducao",
+        "documento": _doc_ficha,
+        "url": "visualizar_ficha",
+        "rotulo": "Ficha de produção",
+        "grupo": None,
+        "relacionados": ["produto__catalogo"],
+    },
+}
+
+
+def tipos_permitidos(user):
+    """Tipos que o usuário pode ver (mesmos grupos das telas de destino)."""
+    return [
+        tipo for tipo, fonte in FONTES.items()
+        if fonte["grupo"] is None or pertence(user, fonte["grupo"])
+    ]
+
+
+def tipo_de(instancia):
+    label = instancia._meta.label
+    return next((tipo for tipo, f in FONTES.items() if f["modelo"] == label), None)
+
+
+def _entrada(IndiceBusca, tipo, instancia):
+    titulo, subtitulo, texto = FONTES[tipo]["documento"](instancia)
+    return IndiceBusca(
+        tipo=tipo,
+        objeto_id=instancia.pk,
+        titulo=titulo[:255],
+        subtitulo=subtitulo[:255],
+        texto=normalizar(_juntar(titulo, texto)),
+    )
+
+
+def _gravar(IndiceBusca, entradas):
+    # Upsert: um único INSERT ... ON CONFLICT DO UPDATE por lote
+    IndiceBusca.objects.bulk_create(
+        entradas,
+        update_conflicts=True,
+        unique_fields=["tipo", "objeto_id"],
+        update_fields=["titulo", "subtitulo", "texto"],
+    )
+
+
+# ------------------ MANUTENÇÃO DO ÍNDICE ------------------
+
+def indexar(instancia):
+    """(Re)indexa uma instância de um dos modelos pesquisáveis."""
+    indexar_varios([instancia])
+
+
+def indexar_varios(instancias):
+    from .models import IndiceBusca
+
+    entradas = [
+        _entrada(IndiceBusca, tipo, obj)
+        for obj in instancias
+        if (tipo := tipo_de(obj))
+    ]
+    if entradas:
+        _gravar(IndiceBusca, entradas)
+
+
+def remover(instancia):
+    from .models import IndiceBusca
+
+    tipo = tipo_de(instancia)
+    if tipo:
+        IndiceBusca.objects.filter(tipo=tipo, objeto_id=instancia.pk).delete()
+
+
+def criar_fts(connection):
+    """Cria a tabela FTS5 e os gatilhos. Retorna False se o banco não tiver FTS5."""
+    if connection.vendor != "sqlite":
+        return False
+    try:
+        with connection.cursor() as cursor:
+            for sql in SQL_CRIAR_FTS:
+                cursor.execute(sql)
+    except OperationalError:
+        return False  # SQLite compilado sem FTS5: fica só a busca simples
+    connection.core_busca_fts = True
+    return True
+
+
+def remover_fts(connection):
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            for sql in SQL_REMOVER_FTS:
+                cursor.execute(sql)
+    connection.core_busca_fts = False
+
+
+def reconstruir(apps=django_apps, using=DEFAULT_DB_ALIAS):
+    """
+    Apaga e regrava o índice inteiro a partir dos cadastros. Aceita o
+    registro de modelos históricos para poder ser chamada em migrações.
+    Retorna {tipo: quantidade indexada}.
+    """
+    IndiceBusca = apps.get_model("core", "IndiceBusca")
+    connection = connections[using]
+    # Sem os gatilhos a carga é direta; o FTS é recriado de uma vez no final
+    remover_fts(connection)
+    IndiceBusca.objects.using(using).all().delete()
+
+    totais = {}
+    for tipo, fonte in FONTES.items():
+        Modelo = apps.get_model(fonte["modelo"])
+        consulta = Modelo.objects.using(using).select_related(*fonte.get("relacionados", []))
+        lote, total = [], 0
+        for obj in consulta.iterator(chunk_size=TAMANHO_LOTE):
+            lote.append(_entrada(IndiceBusca, tipo, obj))
+            if len(lote) >= TAMANHO_LOTE:
+                IndiceBusca.objects.using(using).bulk_create(lote)
+                total += len(lote)
+                lote = []
+        IndiceBusca.objects.using(using).bulk_create(lote)
+        totais[tipo] = total + len(lote)
+
+    if criar_fts(connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {TABELA_FTS}({TABELA_FTS}) VALUES ('rebuild')")
+    return totais
+
+
+# ------------------ CONSULTA ------------------
+
+def fts_disponivel(connection):
+    # Verificado uma vez por conexão
+    if not hasattr(connection, "core_busca_fts"):
+        disponivel = False
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                    [TABELA_FTS])
+                disponivel = cursor.fetchone() is not None
+        connection.core_busca_fts = disponivel
+    return connection.core_busca_fts
+
+
+def _sql_fts(colunas, palavras, tipos):
+    # Cada termo vira um prefixo ("joa"*) para funcionar durante a digitação
+    expressao = " ".join(f'"{p}"*' for p in palavras)
+    sql = (
+        f"SELECT {colunas} "
+        f"FROM {TABELA_FTS} f JOIN core_indicebusca i ON i.id = f.rowid "
+        f"WHERE {TABELA_FTS} MATCH %s"
+    )
+    params = [expressao]
+    if tipos:
+        sql += f" AND i.tipo IN ({', '.join(['%s'] * len(tipos))})"
+        params += list(tipos)
+    return sql, params
+
+
+def _buscar_fts(IndiceBusca, palavras, tipos, limite):
+    # O título pesa mais que o restante do texto no bm25
+    sql, params = _sql_fts("i.id, i.tipo, i.objeto_id, i.titulo, i.subtitulo", palavras, tipos)
+    sql += f" ORDER BY bm25({TABELA_FTS}, 10.0, 1.0)"
+    if limite:
+        sql += " LIMIT %s"
+        params.append(limite)
+    return list(IndiceBusca.objects.raw(sql, params))
+
+
+def _filtrar_simples(IndiceBusca, palavras, tipos):
+    # Sem FTS5: LIKE sobre o texto já normalizado (sem acentos), ainda
+    # restrito a uma única tabela estreita.
+    consulta = IndiceBusca.objects.all()
+    for p in palavras:
+        consulta = consulta.filter(texto__contains=p)
+    if tipos:
+        consulta = consulta.filter(tipo__in=tipos)
+    return consulta
+
+
+def _buscar_simples(IndiceBusca, palavras, tipos, limite):
+    consulta = _filtrar_simples(IndiceBusca, palavras, tipos).annotate(
+        relevancia=Case(
+            When(texto__startswith=palavras[0], then=Value(0)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    ).order_by("relevancia", "titulo")
+    return list(consulta[:limite] if limite else consulta)
+
+
+def consultar(consulta, tipos=None, limite=LIMITE_PADRAO):
+    """Entradas do índice que casam com a consulta, por relevância (sem url/rotulo)."""
+    from .models import IndiceBusca
+
+    palavras = termos(consulta)
+    if not palavras:
+        return []
+    if fts_disponivel(connections[IndiceBusca.objects.db]):
+        return _buscar_fts(IndiceBusca, palavras, tipos, limite)
+    return _buscar_simples(IndiceBusca, palavras, tipos, limite)
+
+
+def buscar(consulta, tipos=None, limite=LIMITE_PADRAO):
+    """
+    Busca sem acentos e por prefixo nos cadastros indexados. Retorna
+    entradas de IndiceBusca ordenadas por relevância, cada uma com
+    `rotulo` e `url` preenchidos.
+    """
+    resultados = consultar(consulta, tipos, limite)
+    for r in resultados:
+        fonte = FONTES[r.tipo]
+        r.rotulo = fonte["rotulo"]
+        r.url = reverse(fonte["url"], args=[r.objeto_id])
+    return resultados
+
+
+def ids(consulta, tipo):
+    """
+    Subconsulta com os IDs dos objetos de um tipo que casam com a consulta,
+    para filtros como pk__in=busca.ids(...): o banco cruza com o índice,
+    sem trazer a lista de IDs para o Python.
+    """
+    from .models import IndiceBusca
+
+    palavras = termos(consulta)
+    if not palavras:
+        return IndiceBusca.objects.none().values("objeto_id")
+    if fts_disponivel(connections[IndiceBusca.objects.db]):
+        return RawSQL(*_sql_fts("i.objeto_id", palavras, [tipo]))
+    return _filtrar_simples(IndiceBusca, palavras, [tipo]).values("objeto_id")
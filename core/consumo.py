@@ -0,0 +1,204 @@
+# core/consumo.py
+# Consumo diário por insumo (ConsumoDiario): retirado nas saídas, usado
+# nas fichas e desperdício das vistorias, somados por dia. Cada
+# movimentação soma seus deltas aqui na mesma transação; tendências e
+# gráficos leem só esta tabela, nunca as linhas brutas.
+from collections import defaultdict
+from datetime import date, datetime, time
+
+from django.apps import apps as django_apps
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import versoes
+from .models import ConsumoDiario, FichaInsumo
+
+MESES_TENDENCIA = 12
+TAMANHO_LOTE = 1000
+CAMPOS = ("retirado", "usado", "desperdicio", "movimentacoes")
+
+
+def dia(data_hora):
+    """Dia (no fuso local) em que cai uma data/hora de movimentação."""
+    return timezone.localdate(data_hora)
+
+
+def inicio_do_dia(data):
+    """
+    Meia-noite (no fuso local) de uma data, como instante com fuso. Os
+    filtros de período das saídas usam [inicio_do_dia(d1), inicio_do_dia(d2 + 1)),
+    os mesmos dias de dia(), em vez de data__date (que trunca cada linha).
+    """
+    return timezone.make_aware(datetime.combine(data, time.min))
+
+
+def inicio_do_mes(data):
+    """Primeiro dia do mês de uma data (coluna ConsumoDiario.mes)."""
+    return data.replace(day=1)
+
+
+def registrar_movimento(insumo_id, data, retirado=0, usado=0, desperdicio=0, movimentacoes=1):
+    """
+    Soma os deltas ao consumo do insumo no dia com um UPDATE via F().
+    Exclusões passam deltas negativos (e movimentacoes=-1). Chamar dentro
+    da transação que grava a movimentação.
+    """
+    atualizados = ConsumoDiario.objects.filter(insumo_id=insumo_id, data=data).update(
+        retirado=F("retirado") + retirado,
+        usado=F("usado") + usado,
+        desperdicio=F("desperdicio") + desperdicio,
+        movimentacoes=F("movimentacoes") + movimentacoes,
+    )
+    if not atualizados:
+        ConsumoDiario.objects.create(
+            insumo_id=insumo_id, data=data, mes=inicio_do_mes(data), retirado=retirado, usado=usado,
+            desperdicio=desperdicio, movimentacoes=movimentacoes,
+        )
+    versoes.invalidar("consumodiario")
+
+
+def registrar_movimentos(movimentos):
+    """
+    Versão em lote de registrar_movimento. `movimentos` é
+    {(insumo_id, data): (retirado, usado, desperdicio, movimentacoes)}.
+    Usa uma leitura com bloqueio, um bulk_update e um bulk_create.
+    """
+    if not movimentos:
+        return
+    insumos = {insumo_id for insumo_id, _ in movimentos}
+    datas = {data for _, data in movimentos}
+    existentes = {
+        (c.insumo_id, c.data): c
+        for c in ConsumoDiario.objects.select_for_update().filter(
+            insumo_id__in=insumos, data__in=datas)
+    }
+    alterados, novos = [], []
+    for chave, deltas in movimentos.items():
+        registro = existentes.get(chave)
+        if registro is None:
+            novos.append(ConsumoDiario(
+                insumo_id=chave[0], data=chave[1], mes=inicio_do_mes(chave[1]),
+                **dict(zip(CAMPOS, deltas))))
+            continue
+        for campo, delta in zip(CAMPOS, deltas):
+            setattr(registro, campo, getattr(registro, campo) + delta)
+        alterados.append(registro)
+    ConsumoDiario.objects.bulk_update(alterados, CAMPOS)
+    ConsumoDiario.objects.bulk_create(novos)
+    versoes.invalidar("consumodiario")
+
+
+def mover_ficha(ficha_id, de, para=None):
+    """
+    Move o uso de uma ficha do dia `de` para `para` (data de fabricação
+    alterada) ou, sem `para`, retira-o (ficha excluída).
+    """
+    diario = defaultdict(lambda: [0, 0, 0, 0])
+    for insumo_id, usado in FichaInsumo.objects.filter(ficha_id=ficha_id).values_list(
+            "insumo_id", "quantidade_usada"):
+        for data, sinal in ((de, -1), (para, 1)):
+            if data:
+                diario[(insumo_id, data)][1] += sinal * usado
+                diario[(insumo_id, data)][3] += sinal
+    registrar_movimentos(diario)
+
+
+def calcular(apps=django_apps, using=DEFAULT_DB_ALIAS, desde=None):
+    """
+    Agrupa as movimentações brutas por insumo e dia (uma consulta por
+    tabela). Aceita o registro de modelos históricos, para migrações.
+    Retorna {(insumo_id, data): [retirado, usado, desperdicio, movimentacoes]}.
+    """
+    SaidaInsumo = apps.get_model("core", "SaidaInsumo")
+    FichaInsumo = apps.get_model("core", "FichaInsumo")
+    VistoriaInsumo = apps.get_model("core", "VistoriaInsumo")
+
+    saidas = SaidaInsumo.objects.using(using).annotate(dia=TruncDate("data"))
+    fichas = FichaInsumo.objects.using(using).annotate(dia=F("ficha__data_fabricacao"))
+    vistorias = VistoriaInsumo.objects.using(using).annotate(dia=F("data_vistoria"))
+    if desde:
+        saidas = saidas.filter(dia__gte=desde)
+        fichas = fichas.filter(dia__gte=desde)
+        vistorias = vistorias.filter(dia__gte=desde)
+
+    totais = defaultdict(lambda: [0, 0, 0, 0])
+    for row in saidas.values("insumo", "dia").annotate(
+            principal=Sum("quantidade_principal"),
+            complementar=Sum("quantidade_complementar"),
+            total=Count("id")).order_by():
+        linha = totais[(row["insumo"], row["dia"])]
+        linha[0] += (row["principal"] or 0) + (row["complementar"] or 0)
+        linha[3] += row["total"]
+    for row in fichas.values("insumo", "dia").annotate(
+            usado=Sum("quantidade_usada"), total=Count("id")).order_by():
+        linha = totais[(row["insumo"], row["dia"])]
+        linha[1] += row["usado"] or 0
+        linha[3] += row["total"]
+    for row in vistorias.values("insumo", "dia").annotate(
+            desperdicio=Sum("desperdicio"), total=Count("id")).order_by():
+        linha = totais[(row["insumo"], row["dia"])]
+        linha[2] += row["desperdicio"] or 0
+        linha[3] += row["total"]
+    return totais
+
+
+def reconstruir(apps=django_apps, using=DEFAULT_DB_ALIAS, desde=None):
+    """
+    Apaga e regrava o consumo diário (a partir de `desde`, se informado)
+    com os totais de calcular(). Chamar dentro de transaction.atomic().
+    Retorna o número de linhas gravadas.
+    """
+    Consumo = apps.get_model("core", "ConsumoDiario")
+    totais = calcular(apps, using, desde)
+    antigos = Consumo.objects.using(using).all()
+    if desde:
+        antigos = antigos.filter(data__gte=desde)
+    antigos.delete()
+    Consumo.objects.using(using).bulk_create(
+        (Consumo(insumo_id=insumo_id, data=data, mes=inicio_do_mes(data),
+                 **dict(zip(CAMPOS, valores)))
+         for (insumo_id, data), valores in totais.items()),
+        batch_size=TAMANHO_LOTE,
+    )
+    versoes.invalidar("consumodiario")
+    return len(totais)
+
+
+# ------------------ LEITURA ------------------
+
+def meses(quantidade=MESES_TENDENCIA, hoje=None):
+    """Primeiro dia de cada um dos últimos `quantidade` meses, do mais antigo ao atual."""
+    hoje = hoje or timezone.localdate()
+    ano, mes = hoje.year, hoje.month
+    inicio = []
+    for _ in range(quantidade):
+        inicio.append(date(ano, mes, 1))
+        ano, mes = (ano, mes - 1) if mes > 1 else (ano - 1, 12)
+    return inicio[::-1]
+
+
+def mensal(insumos=None, quantidade=MESES_TENDENCIA, hoje=None):
+    """
+    Totais mensais dos últimos meses por insumo, com uma consulta sobre
+    ConsumoDiario: faixa e agrupamento pela coluna `mes` gravada, na ordem
+    do índice consumo_mes_idx (sem truncar a data linha a linha). Meses
+    sem movimento entram zerados. Retorna (meses, {insumo_id: {campo: [valor por mês]}}).
+    """
+    lista = meses(quantidade, hoje)
+    posicao = {mes: i for i, mes in enumerate(lista)}
+    consulta = ConsumoDiario.objects.filter(mes__gte=lista[0])
+    if insumos is not None:
+        consulta = consulta.filter(insumo__in=insumos)
+
+    series = defaultdict(lambda: {campo: [0] * len(lista) for campo in CAMPOS})
+    for row in consulta.values("mes", "insumo").annotate(
+            **{campo: Sum(campo) for campo in CAMPOS}).order_by():
+        i = posicao.get(row["mes"])
+        if i is None:
+            continue  # dias futuros
+        serie = series[row["insumo"]]
+        for campo in CAMPOS:
+            serie[campo][i] = row[campo] or 0
+    return lista, dict(series)
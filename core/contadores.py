@@ -0,0 +1,103 @@
+# core/contadores.py
+from django.db.models import F, Max, Sum
+from django.utils import timezone
+
+from .models import ContadorInsumo, FichaInsumo, Insumo, SaidaInsumo
+
+
+def registrar_movimento(insumo_id, retirado=0, usado=0):
+    """
+    Soma os deltas informados ao contador do insumo com uma única
+    atualização via F(). Deve ser chamada dentro da mesma transação
+    que grava a movimentação.
+    """
+    agora = timezone.now()
+    atualizados = ContadorInsumo.objects.filter(insumo_id=insumo_id).update(
+        total_retirado=F('total_retirado') + retirado,
+        total_usado=F('total_usado') + usado,
+        ultima_movimentacao=agora,
+    )
+    if not atualizados:
+        ContadorInsumo.objects.create(
+            insumo_id=insumo_id,
+            total_retirado=retirado,
+            total_usado=usado,
+            ultima_movimentacao=agora,
+        )
+
+
+def descontar_movimento(insumo_id, retirado=0, usado=0):
+    """
+    Desconta de um contador existente uma movimentação excluída (ou o
+    valor antigo de uma alterada), sem criar contador novo.
+    """
+    ContadorInsumo.objects.filter(insumo_id=insumo_id).update(
+        total_retirado=F('total_retirado') - retirado,
+        total_usado=F('total_usado') - usado,
+        ultima_movimentacao=timezone.now(),
+    )
+
+
+def registrar_movimentos(movimentos):
+    """
+    Versão em lote de registrar_movimento para vários insumos de uma vez.
+    `movimentos` é {insumo_id: (retirado, usado)}. Usa uma leitura com
+    bloqueio, um bulk_update e um bulk_create para os contadores novos.
+    """
+    agora = timezone.now()
+    contadores = {
+        c.insumo_id: c
+        for c in ContadorInsumo.objects.select_for_update().filter(
+            insumo_id__in=movimentos)
+    }
+    novos = []
+    for insumo_id, (retirado, usado) in movimentos.items():
+        contador = contadores.get(insumo_id)
+        if contador is None:
+            novos.append(ContadorInsumo(
+                insumo_id=insumo_id,
+                total_retirado=retirado,
+                total_usado=usado,
+                ultima_movimentacao=agora,
+            ))
+            continue
+        contador.total_retirado += retirado
+        contador.total_usado += usado
+        contador.ultima_movimentacao = agora
+
+    ContadorInsumo.objects.bulk_update(
+        contadores.values(),
+        ['total_retirado', 'total_usado', 'ultima_movimentacao'])
+    ContadorInsumo.objects.bulk_create(novos)
+
+
+def calcular_contadores():
+    """
+    Recalcula os totais a partir das linhas brutas de SaidaInsumo e
+    FichaInsumo. Retorna {insumo_id: (total_retirado, total_usado, ultima)}.
+    """
+    saidas = {
+        row['insumo']: row
+        for row in SaidaInsumo.objects.values('insumo').annotate(
+            principal=Sum('quantidade_principal'),
+            complementar=Sum('quantidade_complementar'),
+            ultima=Max('data'),
+        ).order_by()
+    }
+    fichas = {
+        row['insumo']: row
+        for row in FichaInsumo.objects.values('insumo').annotate(
+            total=Sum('quantidade_usada'),
+            ultima=Max('ficha__data_criacao'),
+        ).order_by()
+    }
+
+    resultado = {}
+    for insumo_id in Insumo.objects.values_list('id', flat=True):
+        saida = saidas.get(insumo_id, {})
+        ficha = fichas.get(insumo_id, {})
+        retirado = (saida.get('principal') or 0) + (saida.get('complementar') or 0)
+        usado = ficha.get('total') or 0
+        datas = [d for d in (saida.get('ultima'), ficha.get('ultima')) if d]
+        resultado[insumo_id] = (retirado, usado, max(datas) if datas else None)
+    return resultado
@@ -1,5 +1,7 @@
 from django.contrib.auth.decorators import user_passes_test
 
+from .papeis import pertence
+
 
 def check_group(groups):
     """
@@ -8,16 +10,6 @@ def check_group(groups):
     Superusuários têm acesso automático.
     """
     def in_group(user):
-        if not user.is_authenticated:
-            return False
-
-        # Se for string, transforma em lista
-        if isinstance(groups, str):
-            groups_list = [groups]
-        else:
-            groups_list = groups
-
-        # Verifica se o usuário pertence a algum dos grupos
-        return user.is_superuser or user.groups.filter(name__in=groups_list).exists()
+        return pertence(user, groups)
 
     return user_passes_test(in_group)
@@ -0,0 +1,172 @@
+# core/estoque.py
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from . import consumo, movimentos, unidades, versoes
+from .contadores import registrar_movimentos
+from .models import Colaborador, Insumo, MovimentoEstoque, SaidaInsumo
+
+
+class EstoqueInsuficiente(Exception):
+    """Levantada quando o insumo não tem estoque suficiente para a retirada."""
+
+    def __init__(self, insumo_id, quantidade):
+        self.insumo_id = insumo_id
+        self.quantidade = quantidade
+        super().__init__(
+            f"Estoque insuficiente do insumo {insumo_id} para retirar {quantidade}.")
+
+
+def unidade_incompativel(insumo):
+    """Mensagem para saída em unidade diferente da unidade base do insumo."""
+    return (f"A unidade da saída deve ser a do insumo {insumo.nome} "
+            f"({insumo.get_unidade_base_display().lower()}).")
+
+
+def retirar(insumo_id, quantidade):
+    """
+    Baixa `quantidade` do estoque com um único UPDATE condicional
+    (só decrementa se houver saldo), sem ler o insumo antes.
+    Deve ser chamada dentro de transaction.atomic() junto com a gravação
+    da saída. Levanta EstoqueInsuficiente se o saldo não for suficiente.
+    """
+    atualizados = Insumo.objects.filter(
+        pk=insumo_id, quantidade_total__gte=quantidade
+    ).update(quantidade_total=F("quantidade_total") - quantidade)
+    if not atualizados:
+        raise EstoqueInsuficiente(insumo_id, quantidade)
+    versoes.invalidar("insumo")  # update() não dispara post_save
+
+
+def devolver(insumo_id, quantidade):
+    """Devolve `quantidade` ao estoque com um UPDATE atômico via F()."""
+    Insumo.objects.filter(pk=insumo_id).update(
+        quantidade_total=F("quantidade_total") + quantidade)
+    versoes.invalidar("insumo")
+
+
+def registrar_saidas_em_lote(linhas):
+    """
+    Registra várias saídas de uma vez.
+
+    `linhas` é uma lista de dicionários com insumo, colaborador_entregando,
+    colaborador_retira, quantidade (em unidade base, como digitada) e
+    (opcional) unidade, que deve ser a unidade base do insumo. Todas as
+    linhas são validadas contra o estoque atual com uma única consulta; as
+    válidas são gravadas com bulk_create e as baixas aplicadas em uma só
+    transação.
+
+    Retorna uma lista, na mesma ordem, de {"linha", "ok", "erro", "saida_id"}.
+    """
+    resultados = [
+        {"linha": i, "ok": False, "erro": None, "saida_id": None}
+        for i in range(len(linhas))
+    ]
+
+    def _id(valor):
+        try:
+            return int(valor)
+        except (TypeError, ValueError):
+            return None
+
+    normalizadas = []
+    for i, linha in enumerate(linhas):
+        try:
+            quantidade = unidades.para_inteiro(linha.get("quantidade"))
+        except (TypeError, ValueError):
+            quantidade = 0
+        normalizadas.append({
+            "insumo": _id(linha.get("insumo")),
+            "colaborador_entregando": _id(linha.get("colaborador_entregando")),
+            "colaborador_retira": _id(linha.get("colaborador_retira")),
+            "unidade": linha.get("unidade") or None,
+            "quantidade": quantidade,
+        })
+
+    # Uma consulta para o estoque e outra para os colaboradores de todas as linhas
+    insumos = Insumo.objects.only("id", "nome", "quantidade_total", "unidade_base").in_bulk(
+        {n["insumo"] for n in normalizadas if n["insumo"]})
+    colaboradores = set(Colaborador.objects.filter(pk__in={
+        pk for n in normalizadas
+        for pk in (n["colaborador_entregando"], n["colaborador_retira"]) if pk
+    }).values_list("pk", flat=True))
+    unidades_validas = {u for u, _ in SaidaInsumo.UNIDADES}
+
+    saldo = {pk: insumo.quantidade_total for pk, insumo in insumos.items()}
+    validas = []
+    for i, n in enumerate(normalizadas):
+        insumo = insumos.get(n["insumo"])
+        if insumo is None:
+            erro = "Insumo inválido."
+        elif n["colaborador_entregando"] not in colaboradores or \
+                n["colaborador_retira"] not in colaboradores:
+            erro = "Colaborador inválido."
+        elif n["quantidade"] <= 0:
+            erro = "Você precisa informar a quantidade."
+        elif n["unidade"] and n["unidade"] not in unidades_validas:
+            erro = "Unidade inválida."
+        elif n["unidade"] and n["unidade"] != insumo.unidade_base:
+            erro = unidade_incompativel(insumo)
+        elif n["quantidade"] > saldo[insumo.pk]:
+            erro = (f"A quantidade solicitada ({unidades.formatar(n['quantidade'], insumo.unidade_base)}) "
+                    f"excede o estoque disponível ({unidades.formatar(saldo[insumo.pk], insumo.unidade_base)}).")
+        else:
+            erro = None
+            saldo[insumo.pk] -= n["quantidade"]
+            validas.append(i)
+        resultados[i]["erro"] = erro
+
+    if not validas:
+        return resultados
+
+    totais = defaultdict(int)
+    for i in validas:
+        totais[normalizadas[i]["insumo"]] += normalizadas[i]["quantidade"]
+
+    with transaction.atomic():
+        # Outra requisição pode ter retirado estoque depois da leitura acima
+        for insumo_id, total in list(totais.items()):
+            try:
+                retirar(insumo_id, total)
+            except EstoqueInsuficiente:
+                del totais[insumo_id]
+                for i in validas:
+                    if normalizadas[i]["insumo"] == insumo_id:
+                        resultados[i]["erro"] = "Estoque alterado por outra operação; tente novamente."
+        validas = [i for i in validas if normalizadas[i]["insumo"] in totais]
+
+        saidas = SaidaInsumo.objects.bulk_create([
+            SaidaInsumo(
+                insumo_id=normalizadas[i]["insumo"],
+                colaborador_entregando_id=normalizadas[i]["colaborador_entregando"],
+                colaborador_retira_id=normalizadas[i]["colaborador_retira"],
+                unidade=normalizadas[i]["unidade"] or insumos[normalizadas[i]["insumo"]].unidade_base,
+                quantidade_principal=normalizadas[i]["quantidade"],
+                quantidade_complementar=0,
+                restante=normalizadas[i]["quantidade"],
+            )
+            for i in validas
+        ])
+        registrar_movimentos(
+            {insumo_id: (total, 0) for insumo_id, total in totais.items()})
+        diario = defaultdict(lambda: [0, 0, 0, 0])
+        for saida in saidas:
+            linha = diario[(saida.insumo_id, consumo.dia(saida.data))]
+            linha[0] += saida.quantidade_principal
+            linha[3] += 1
+        consumo.registrar_movimentos(diario)
+        movimentos.registrar_varios([
+            MovimentoEstoque(
+                insumo_id=saida.insumo_id, tipo="saida",
+                delta_estoque=-saida.quantidade_principal,
+                delta_em_uso=saida.quantidade_principal,
+                referencia=f"saida:{saida.pk}")
+            for saida in saidas
+        ])
+
+    for i, saida in zip(validas, saidas):
+        resultados[i]["ok"] = True
+        resultados[i]["saida_id"] = saida.pk
+    return resultados
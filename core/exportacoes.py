@@ -0,0 +1,109 @@
+# core/exportacoes.py
+import csv
+from datetime import timedelta
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .consumo import inicio_do_dia
+from .models import FichaProducao, SaidaInsumo, VistoriaInsumo
+from .unidades import para_base
+
+TAMANHO_LOTE = 2000
+
+
+class _Eco:
+    """Pseudo-arquivo: o csv.writer escreve e a linha volta como string."""
+
+    def write(self, valor):
+        return valor
+
+
+def resposta_csv(nome_arquivo, cabecalho, linhas):
+    """
+    StreamingHttpResponse que gera o CSV linha a linha, sem montar o
+    arquivo em memória. `linhas` deve ser um iterável preguiçoso.
+    """
+    writer = csv.writer(_Eco(), delimiter=";")
+
+    def gerar():
+        yield "\ufeff"  # BOM para o Excel reconhecer UTF-8
+        yield writer.writerow(cabecalho)
+        for linha in linhas:
+            yield writer.writerow(linha)
+
+    response = StreamingHttpResponse(gerar(), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{nome_arquivo}"'
+    return response
+
+
+def _local(data_hora):
+    return timezone.localtime(data_hora).strftime("%d/%m/%Y %H:%M") if data_hora else ""
+
+
+def linhas_saidas(data_inicio=None, data_fim=None):
+    saidas = SaidaInsumo.objects.select_related(
+        "insumo", "colaborador_entregando", "colaborador_retira"
+    ).order_by("data", "id")
+    if data_inicio:
+        saidas = saidas.filter(data__gte=inicio_do_dia(data_inicio))
+    if data_fim:
+        saidas = saidas.filter(data__lt=inicio_do_dia(data_fim + timedelta(days=1)))
+    for s in saidas.iterator(chunk_size=TAMANHO_LOTE):
+        yield [
+            s.id,
+            _local(s.data),
+            s.insumo.nome,
+            para_base(s.quantidade_principal),
+            para_base(s.quantidade_complementar),
+            s.unidade,
+            s.colaborador_entregando.nome,
+            s.colaborador_retira.nome,
+        ]
+
+
+def linhas_vistorias(data_inicio=None, data_fim=None):
+    vistorias = VistoriaInsumo.objects.select_related(
+        "insumo").order_by("data_vistoria", "id")
+    if data_inicio:
+        vistorias = vistorias.filter(data_vistoria__gte=data_inicio)
+    if data_fim:
+        vistorias = vistorias.filter(data_vistoria__lte=data_fim)
+    for v in vistorias.iterator(chunk_size=TAMANHO_LOTE):
+        yield [
+            v.vistoria_id,
+            v.data_vistoria.strftime("%d/%m/%Y"),
+            v.insumo.nome,
+            para_base(v.quantidade_retirada),
+            para_base(v.quantidade_usada),
+            para_base(v.quantidade_teorica),
+            para_base(v.quantidade_real),
+            para_base(v.desperdicio),
+        ]
+
+
+def linhas_fichas(data_inicio=None, data_fim=None):
+    """Uma linha por insumo usado em cada ficha (fichas sem insumo geram uma linha)."""
+    fichas = FichaProducao.objects.select_related(
+        "produto__catalogo", "colaborador"
+    ).prefetch_related("ficha_insumos__insumo").order_by("data_fabricacao", "id")
+    if data_inicio:
+        fichas = fichas.filter(data_fabricacao__gte=data_inicio)
+    if data_fim:
+        fichas = fichas.filter(data_fabricacao__lte=data_fim)
+    for f in fichas.iterator(chunk_size=TAMANHO_LOTE):
+        produto = f.produto.catalogo.nome if f.produto.catalogo else ""
+        base = [
+            f.id,
+            f.data_fabricacao.strftime("%d/%m/%Y"),
+            produto,
+            f.categoria,
+            f.colaborador.nome if f.colaborador else "",
+            f.assinado_por or "",
+            _local(f.data_assinatura),
+        ]
+        insumos = list(f.ficha_insumos.all())
+        if not insumos:
+            yield base + ["", "", ""]
+        for fi in insumos:
+            yield base + [fi.insumo.nome, para_base(fi.quantidade_usada), fi.unidade]
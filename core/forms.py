@@ -8,6 +8,30 @@ from .models import (
     SaidaInsumo,
     CatalogoProduto
 )
+from . import estoque, fotos, unidades
+from .widgets import AutocompleteSelect
+
+
+class QuantidadeField(forms.DecimalField):
+    """
+    Quantidade digitada em unidade base (ou no múltiplo, ex. kg) e limpa
+    para o inteiro em milésimos gravado nos modelos (core/unidades.py).
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("min_value", 0)
+        kwargs.setdefault("decimal_places", 3)
+        super().__init__(**kwargs)
+
+    def prepare_value(self, value):
+        # Valores iniciais chegam em milésimos; os digitados, como texto
+        if isinstance(value, int):
+            return unidades.para_base(value)
+        return super().prepare_value(value)
+
+    def clean(self, value):
+        valor = super().clean(value)
+        return None if valor is None else unidades.para_inteiro(valor)
 
 
 # ------------------ CRIAR USUÁRIO ------------------
@@ -74,12 +98,12 @@ class FichaProducaoForm(forms.ModelForm):
 # ------------------ INSUMO ------------------
 
 class InsumoForm(forms.ModelForm):
-    quantidade_principal = forms.FloatField(
+    quantidade_principal = QuantidadeField(
         label="Quantidade Principal",
         required=True,
         widget=forms.NumberInput(attrs={'class': 'form-control'})
     )
-    quantidade_complementar = forms.FloatField(
+    quantidade_complementar = QuantidadeField(
         label="Complementar",
         required=False,
         initial=0,
@@ -97,25 +121,21 @@ class InsumoForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         if self.instance and self.instance.pk:
-            if self.instance.unidade_base in ['g', 'ml']:
-                self.fields['quantidade_principal'].initial = int(
-                    self.instance.quantidade_total // 1000)
-                self.fields['quantidade_complementar'].initial = self.instance.quantidade_total % 1000
-            else:
-                self.fields['quantidade_principal'].initial = self.instance.quantidade_total
-                self.fields['quantidade_complementar'].initial = 0
+            principal, complementar = unidades.decompor(
+                self.instance.quantidade_total, self.instance.unidade_base)
+            self.fields['quantidade_principal'].initial = principal
+            self.fields['quantidade_complementar'].initial = complementar
 
     def clean(self):
         cleaned_data = super().clean()
-        principal = cleaned_data.get('quantidade_principal') or 0
-        complementar = cleaned_data.get('quantidade_complementar') or 0
         unidade = cleaned_data.get('unidade_base')
-
-        if unidade in ['g', 'ml']:
-            cleaned_data['quantidade_total'] = principal * 1000 + complementar
-        else:
-            cleaned_data['quantidade_total'] = principal + complementar
-
+        if unidade:
+            # Principal no múltiplo (kg/L) e complementar na base (g/ml)
+            cleaned_data['quantidade_total'] = unidades.compor(
+                cleaned_data.get('quantidade_principal'),
+                cleaned_data.get('quantidade_complementar'),
+                unidade,
+            )
         return cleaned_data
 
     def save(self, commit=True):
@@ -131,7 +151,7 @@ class ProdutoProntoForm(forms.ModelForm):
         fields = ['catalogo', 'quantidade', 'data_fabricacao',
                   'data_validade', 'peso_produto']
         widgets = {
-            'catalogo': forms.Select(attrs={'class': 'form-select'}),
+            'catalogo': AutocompleteSelect('catalogo', attrs={'class': 'form-select'}),
             'quantidade': forms.NumberInput(attrs={'class': 'form-control'}),
             'data_fabricacao': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'data_validade': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
@@ -143,9 +163,21 @@ class ProdutoProntoForm(forms.ModelForm):
         }
 
 
+# ------------------ CATÁLOGO ------------------
+
+class CatalogoProdutoForm(forms.ModelForm):
+    class Meta:
+        model = CatalogoProduto
+        fields = ['nome', 'descricao']
+        widgets = {
+            'nome': forms.TextInput(attrs={'class': 'form-control'}),
+            'descricao': forms.Textarea(attrs={'rows': 3, 'class': 'form-control'}),
+        }
+
+
 # ------------------ SAÍDA DE INSUMO ------------------
 class SaidaInsumoForm(forms.ModelForm):
-    quantidade = forms.FloatField(
+    quantidade = QuantidadeField(
         label="Quantidade",
         required=True,
         widget=forms.NumberInput(attrs={'class': 'form-control'})
@@ -156,12 +188,21 @@ class SaidaInsumoForm(forms.ModelForm):
         fields = ['insumo', 'colaborador_entregando',
                   'colaborador_retira', 'unidade', 'quantidade']
         widgets = {
-            'insumo': forms.Select(attrs={'class': 'form-select'}),
-            'colaborador_entregando': forms.Select(attrs={'class': 'form-select'}),
-            'colaborador_retira': forms.Select(attrs={'class': 'form-select'}),
+            'insumo': AutocompleteSelect('insumos', attrs={'class': 'form-select'}),
+            'colaborador_entregando': AutocompleteSelect('colaboradores', attrs={'class': 'form-select'}),
+            'colaborador_retira': AutocompleteSelect('colaboradores', attrs={'class': 'form-select'}),
             'unidade': forms.Select(attrs={'class': 'form-select'}),
         }
 
+    def clean(self):
+        cleaned_data = super().clean()
+        insumo = cleaned_data.get('insumo')
+        unidade = cleaned_data.get('unidade')
+        # A quantidade é gravada na unidade base do insumo
+        if insumo and unidade and unidade != insumo.unidade_base:
+            self.add_error('unidade', estoque.unidade_incompativel(insumo))
+        return cleaned_data
+
     def save(self, commit=True):
         # Salva diretamente em quantidade_principal e zera complementar
         self.instance.quantidade_principal = self.cleaned_data['quantidade']
@@ -207,5 +248,32 @@ class ColaboradorForm(forms.ModelForm):
             'cidade': forms.TextInput(attrs={'class': 'form-control'}),
             'estado': forms.TextInput(attrs={'class': 'form-control'}),
             'complemento': forms.TextInput(attrs={'class': 'form-control'}),
-            'usuario': forms.Select(attrs={'class': 'form-select'}),
+            'usuario': AutocompleteSelect('usuarios', attrs={'class': 'form-select'}, campo='username'),
         }
+
+    def save(self, commit=True):
+        # Foto nova: grava pelo hash do conteúdo e gera as variantes reduzidas
+        if 'foto' in self.changed_data:
+            if self.instance.foto:
+                fotos.processar_colaborador(self.instance)
+            else:
+                self.instance.foto_hash = ""
+        return super().save(commit=commit)
+
+
+class FiltroInsumoForm(forms.Form):
+    """
+    Filtro por insumo das listas e relatórios (GET). O select vem só com a
+    opção escolhida; as demais são buscadas no autocomplete.
+    """
+    insumo = forms.ModelChoiceField(
+        queryset=Insumo.objects.all(), required=False, empty_label="Todos os insumos",
+        widget=AutocompleteSelect('insumos', attrs={'class': 'form-select'}))
+
+
+class FiltroSaidasForm(FiltroInsumoForm):
+    """Filtros de insumo e colaborador da lista de saídas."""
+    colaborador = forms.ModelChoiceField(
+        queryset=Colaborador.objects.all(), required=False,
+        empty_label="Todos os colaboradores",
+        widget=AutocompleteSelect('colaboradores', attrs={'class': 'form-select'}))
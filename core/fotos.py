@@ -0,0 +1,80 @@
+# core/fotos.py
+import hashlib
+import io
+import os
+import re
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+PASTA = "colaboradores"
+
+# Variantes geradas uma única vez por foto (o dobro do tamanho exibido,
+# para telas de alta densidade). Nome -> (largura, altura).
+VARIANTES = {
+    "miniatura": (90, 90),     # lista de colaboradores (45px)
+    "detalhe": (300, 300),     # página do colaborador (150px)
+}
+QUALIDADE_JPEG = 85
+
+# Nomes servidos pela view foto_colaborador: só arquivos com hash
+NOME_VALIDO = re.compile(r"^[0-9a-f]{32}(_(%s)\.jpg|\.\w{2,5})$" % "|".join(VARIANTES))
+
+
+def caminho(hash_foto, variante=None, extensao=".jpg"):
+    if variante:
+        return f"{PASTA}/{hash_foto}_{variante}.jpg"
+    return f"{PASTA}/{hash_foto}{extensao}"
+
+
+def _rgb(imagem):
+    imagem = ImageOps.exif_transpose(imagem)
+    if imagem.mode in ("RGBA", "LA") or (imagem.mode == "P" and "transparency" in imagem.info):
+        fundo = Image.new("RGB", imagem.size, (255, 255, 255))
+        fundo.paste(imagem.convert("RGBA"), mask=imagem.convert("RGBA").getchannel("A"))
+        return fundo
+    return imagem.convert("RGB")
+
+
+def _gerar_variante(imagem, tamanho):
+    recorte = ImageOps.fit(imagem, tamanho, Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    recorte.save(buffer, "JPEG", quality=QUALIDADE_JPEG, optimize=True, progressive=True)
+    return ContentFile(buffer.getvalue())
+
+
+def processar(arquivo, nome_original=""):
+    """
+    Grava a foto com nome pelo hash do conteúdo e gera as variantes que
+    ainda não existirem. Reenvios da mesma imagem reaproveitam os arquivos.
+    Retorna (nome do original no storage, hash).
+    """
+    if hasattr(arquivo, "seek"):
+        arquivo.seek(0)
+    conteudo = arquivo.read()
+    hash_foto = hashlib.sha256(conteudo).hexdigest()[:32]
+    extensao = os.path.splitext(nome_original or getattr(arquivo, "name", ""))[1].lower() or ".jpg"
+
+    original = caminho(hash_foto, extensao=extensao)
+    if not default_storage.exists(original):
+        default_storage.save(original, ContentFile(conteudo))
+
+    pendentes = {
+        variante: tamanho for variante, tamanho in VARIANTES.items()
+        if not default_storage.exists(caminho(hash_foto, variante))
+    }
+    if pendentes:
+        imagem = _rgb(Image.open(io.BytesIO(conteudo)))
+        for variante, tamanho in pendentes.items():
+            default_storage.save(caminho(hash_foto, variante), _gerar_variante(imagem, tamanho))
+    return original, hash_foto
+
+
+def processar_colaborador(colaborador):
+    """Processa a foto (nova ou já gravada) e atualiza os campos do colaborador."""
+    foto = colaborador.foto
+    with foto.open("rb") as arquivo:
+        nome, hash_foto = processar(arquivo, foto.name)
+    colaborador.foto = nome
+    colaborador.foto_hash = hash_foto
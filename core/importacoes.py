@@ -0,0 +1,210 @@
+# core/importacoes.py
+import csv
+from itertools import chain, islice
+
+from django.db import transaction
+from django.forms import modelform_factory
+
+from . import busca, movimentos, versoes
+from .forms import CatalogoProdutoForm, ColaboradorForm, InsumoForm
+from .models import MovimentoEstoque
+
+TAMANHO_LOTE = 1000
+
+# Cada tipo importável: formulário usado na validação, colunas aceitas,
+# campo usado para casar com registros existentes (upsert), demais
+# campos únicos conferidos em lote e se o estoque vai para o livro.
+TIPOS = {
+    "insumos": {
+        "form": InsumoForm,
+        "campos": ["nome", "unidade_base"],
+        "atualizar": ["nome", "unidade_base", "quantidade_total"],
+        "chave": "nome",
+        "unicos": [],
+        "livro": True,
+    },
+    "catalogo": {
+        "form": CatalogoProdutoForm,
+        "campos": ["nome", "descricao"],
+        "atualizar": ["nome", "descricao"],
+        "chave": "nome",
+        "unicos": [],
+    },
+    "colaboradores": {
+        "form": ColaboradorForm,
+        "campos": [
+            "rc", "nome", "data_nascimento", "sexo", "funcao", "CPF_RG",
+            "email", "celular", "cep", "logradouro", "numero", "bairro",
+            "cidade", "estado", "complemento",
+        ],
+        "atualizar": [
+            "nome", "data_nascimento", "sexo", "funcao", "CPF_RG",
+            "email", "celular", "cep", "logradouro", "numero", "bairro",
+            "cidade", "estado", "complemento",
+        ],
+        "chave": "rc",
+        "unicos": ["CPF_RG"],
+    },
+}
+
+
+class ArquivoInvalido(Exception):
+    """Levantada quando o CSV não pode ser lido (codificação ou formato)."""
+
+    def __init__(self, linha, motivo):
+        self.linha = linha
+        self.motivo = motivo
+        super().__init__(f"Arquivo inválido: {motivo}")
+
+
+def _form_csv(config):
+    """
+    Formulário do cadastro restrito às colunas do CSV. A validação de
+    unicidade por linha (uma consulta cada) é desligada; ela é feita em
+    lote em _processar_lote.
+    """
+    class FormCSV(config["form"]):
+        def validate_unique(self):
+            pass
+
+    return modelform_factory(config["form"]._meta.model, form=FormCSV, fields=config["campos"])
+
+
+def _erros_form(form):
+    return "; ".join(
+        f"{campo}: {' '.join(erros)}" for campo, erros in form.errors.items()
+    )
+
+
+def importar_csv(tipo, arquivo, tamanho_lote=TAMANHO_LOTE):
+    """
+    Importa um CSV (arquivo texto já aberto) lendo-o em streaming.
+
+    As linhas são validadas com as regras do formulário do cadastro e
+    gravadas em lotes com bulk_create/bulk_update, todos em uma única
+    transação. O delimitador (',' ou ';') é detectado pelo cabeçalho.
+    Retorna {"criados", "atualizados", "erros": [(linha, mensagem), ...]}.
+    Se o arquivo não puder ser lido até o fim (codificação ou CSV
+    malformado), levanta ArquivoInvalido e nada é gravado.
+    """
+    config = TIPOS[tipo]
+    resultado = {"criados": 0, "atualizados": 0, "erros": []}
+    Form = _form_csv(config)
+    vistos = {campo: set() for campo in [config["chave"], *config["unicos"]]}
+    leitor = None
+    try:
+        with transaction.atomic():
+            cabecalho = arquivo.readline()
+            try:
+                dialeto = csv.Sniffer().sniff(cabecalho, delimiters=",;")
+            except csv.Error:
+                dialeto = csv.excel
+            leitor = csv.DictReader(chain([cabecalho], arquivo), dialect=dialeto)
+            linhas = enumerate(leitor, start=2)
+            while True:
+                lote = list(islice(linhas, tamanho_lote))
+                if not lote:
+                    break
+                _processar_lote(config, Form, lote, vistos, resultado)
+    except UnicodeDecodeError:
+        # A decodificação é feita em blocos: o erro está na linha seguinte
+        # à última lida ou mais adiante
+        linha = leitor.line_num + 1 if leitor else 1
+        raise ArquivoInvalido(
+            linha, f"o arquivo precisa estar em UTF-8 (erro a partir da linha {linha}).")
+    except csv.Error as e:
+        raise ArquivoInvalido(leitor.line_num, f"{e} (linha {leitor.line_num}).")
+    return resultado
+
+
+def _processar_lote(config, Form, lote, vistos, resultado):
+    Model = config["form"]._meta.model
+    chave = config["chave"]
+
+    validos = []
+    for numero, linha in lote:
+        form = Form(data={k.strip(): (v or "").strip() for k, v in linha.items() if k})
+        if not form.is_valid():
+            resultado["erros"].append((numero, _erros_form(form)))
+            continue
+        obj = form.save(commit=False)
+        repetido = next(
+            (campo for campo in vistos if getattr(obj, campo) in vistos[campo]), None)
+        if repetido:
+            resultado["erros"].append(
+                (numero, f"{repetido}: valor repetido no arquivo ({getattr(obj, repetido)})."))
+            continue
+        for campo in vistos:
+            vistos[campo].add(getattr(obj, campo))
+        validos.append((numero, obj))
+
+    # Registros existentes e conflitos de unicidade: uma consulta por campo.
+    # Com chave não única (nome do insumo), valores que casam com mais de
+    # um registro são recusados em vez de atualizar um deles ao acaso.
+    existentes, ambiguos = {}, set()
+    for atual in Model.objects.filter(**{f"{chave}__in": [getattr(o, chave) for _, o in validos]}):
+        if getattr(atual, chave) in existentes:
+            ambiguos.add(getattr(atual, chave))
+        existentes.setdefault(getattr(atual, chave), atual)
+    conflitos = {
+        campo: dict(Model.objects.filter(
+            **{f"{campo}__in": [getattr(o, campo) for _, o in validos]}
+        ).values_list(campo, chave))
+        for campo in config["unicos"]
+    }
+
+    novos, alterados = [], []
+    for numero, obj in validos:
+        dono = next(
+            (campo for campo, valores in conflitos.items()
+             if valores.get(getattr(obj, campo), getattr(obj, chave)) != getattr(obj, chave)),
+            None)
+        if dono:
+            resultado["erros"].append(
+                (numero, f"{dono}: já cadastrado para outro registro ({getattr(obj, dono)})."))
+            continue
+        if getattr(obj, chave) in ambiguos:
+            resultado["erros"].append(
+                (numero, f"{chave}: há mais de um registro com este valor "
+                         f"({getattr(obj, chave)}); ajuste pelo cadastro."))
+            continue
+        atual = existentes.get(getattr(obj, chave))
+        if atual is None:
+            novos.append(obj)
+        else:
+            alterados.append((atual, obj))
+
+    if Model._meta.get_field(chave).unique:
+        # Upsert nativo (INSERT ... ON CONFLICT DO UPDATE) pela chave única
+        Model.objects.bulk_create(
+            novos + [obj for _, obj in alterados],
+            update_conflicts=True,
+            unique_fields=[chave],
+            update_fields=config["atualizar"],
+        )
+    else:
+        for atual, obj in alterados:
+            obj.pk = atual.pk
+        Model.objects.bulk_create(novos)
+        Model.objects.bulk_update([obj for _, obj in alterados], config["atualizar"])
+    if config.get("livro"):
+        # Mantém o livro de movimentações em dia com o estoque importado
+        movimentos.registrar_varios(
+            [MovimentoEstoque(insumo_id=obj.pk, tipo="entrada",
+                              delta_estoque=obj.quantidade_total,
+                              referencia="importacao")
+             for obj in novos] +
+            [MovimentoEstoque(insumo_id=atual.pk, tipo="ajuste",
+                              delta_estoque=obj.quantidade_total - atual.quantidade_total,
+                              referencia="importacao")
+             for atual, obj in alterados
+             if obj.quantidade_total != atual.quantidade_total]
+        )
+    # bulk_create/bulk_update não disparam os sinais (busca global e cache)
+    busca.indexar_varios(Model.objects.filter(
+        **{f"{chave}__in": [getattr(o, chave) for o in novos] +
+           [getattr(o, chave) for _, o in alterados]}))
+    versoes.invalidar(Model._meta.model_name)
+
+    resultado["criados"] += len(novos)
+    resultado["atualizados"] += len(alterados)
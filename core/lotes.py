@@ -0,0 +1,80 @@
+# core/lotes.py
+# Cada SaidaInsumo é um lote do insumo em uso na produção; `restante` é o
+# que ainda não foi consumido em fichas. O consumo é informado por insumo
+# e distribuído entre os lotes abertos, dos mais antigos para os mais
+# novos (FIFO).
+from collections import defaultdict
+
+from django.db.models import Count, Sum
+
+from .models import SaidaInsumo
+
+
+class LotesInsuficientes(Exception):
+    """Levantada quando o consumo pedido passa do saldo dos lotes abertos."""
+
+    def __init__(self, faltas):
+        # {insumo_id: (pedido, disponível)}
+        self.faltas = faltas
+        super().__init__(
+            "Saldo insuficiente nos lotes dos insumos "
+            + ", ".join(str(i) for i in faltas) + ".")
+
+
+def abertos():
+    """Lotes com saldo (filtro do índice parcial saida_aberta_idx)."""
+    return SaidaInsumo.objects.filter(restante__gt=0)
+
+
+def disponiveis():
+    """
+    Uma linha por insumo com saldo: {insumo, insumo__nome,
+    insumo__unidade_base, disponivel, lotes}, em ordem de nome.
+    """
+    return (
+        abertos()
+        .values("insumo", "insumo__nome", "insumo__unidade_base")
+        .annotate(disponivel=Sum("restante"), lotes=Count("id"))
+        .order_by("insumo__nome")
+    )
+
+
+def alocar(consumos):
+    """
+    Baixa `consumos` ({insumo_id: quantidade em milésimos}) dos lotes abertos, do mais
+    antigo para o mais novo: uma leitura de todos os lotes envolvidos e um
+    bulk_update. Chamar dentro de transaction.atomic().
+
+    Levanta LotesInsuficientes (sem gravar nada) se algum insumo não tiver
+    saldo. Retorna {insumo_id: [(saida_id, quantidade), ...]}.
+    """
+    pedidos = {insumo_id: q for insumo_id, q in consumos.items() if q > 0}
+    lotes = defaultdict(list)
+    for saida in (abertos().select_for_update()
+                  .filter(insumo_id__in=pedidos)
+                  .only("id", "insumo_id", "restante")
+                  .order_by("insumo_id", "data", "id")):
+        lotes[saida.insumo_id].append(saida)
+
+    faltas = {}
+    for insumo_id, quantidade in pedidos.items():
+        disponivel = sum(s.restante for s in lotes[insumo_id])
+        if quantidade > disponivel:
+            faltas[insumo_id] = (quantidade, disponivel)
+    if faltas:
+        raise LotesInsuficientes(faltas)
+
+    alocacoes = defaultdict(list)
+    alterados = []
+    for insumo_id, quantidade in pedidos.items():
+        falta = quantidade
+        for saida in lotes[insumo_id]:
+            if not falta:
+                break
+            parte = min(saida.restante, falta)
+            saida.restante -= parte
+            falta -= parte
+            alocacoes[insumo_id].append((saida.id, parte))
+            alterados.append(saida)
+    SaidaInsumo.objects.bulk_update(alterados, ["restante"])
+    return dict(alocacoes)
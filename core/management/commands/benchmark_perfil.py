@@ -0,0 +1,240 @@
+import importlib.util
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import HTTPRedirectHandler, Request, build_opener
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils.crypto import get_random_string
+
+# Requisições do trabalhador: a cada ESCRITA_A_CADA, uma saída de insumo
+# (escrita); as demais são leituras de páginas que consultam o banco.
+LEITURAS = ["/saidas/", "/relatorio-insumos/", "/insumos/estoque-na-data/"]
+ESCRITA_A_CADA = 5
+ESPERA_SERVIDOR = 30  # segundos para o servidor começar a responder
+
+
+class _SemRedirecionar(HTTPRedirectHandler):
+    # Conta só a requisição feita (o redirect após o POST não é seguido)
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a vazão (requisições/s) dos perfis de settings contra um "
+        "servidor de verdade (gunicorn, como em produção, ou runserver), com "
+        "vários processos clientes concorrentes fazendo requisições HTTP. "
+        "Assim o ciclo de conexões por requisição (CONN_MAX_AGE), o "
+        "middleware e a serialização das escritas no SQLite entram na "
+        "medição. Cada perfil roda sobre uma cópia do banco; o banco "
+        "original não é alterado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--perfis", nargs="+", default=["desenvolvimento", "producao"])
+        parser.add_argument("--trabalhadores", type=int, default=4,
+                            help="Workers do gunicorn e processos clientes.")
+        parser.add_argument("--duracao", type=float, default=10, help="Segundos por perfil.")
+        parser.add_argument("--servidor", choices=["gunicorn", "runserver"], default="gunicorn",
+                            help="runserver (um processo, com threads) se o gunicorn "
+                                 "não estiver instalado.")
+        parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+        # Uso interno: processo trabalhador disparado pelo próprio comando
+        parser.add_argument("--trabalhador", type=int, help="(interno)")
+        parser.add_argument("--inicio", type=float, help="(interno)")
+        parser.add_argument("--url", help="(interno)")
+
+    def handle(self, *args, **options):
+        if options["trabalhador"] is not None:
+            return self._trabalhar(options["trabalhador"], options["inicio"],
+                                   options["duracao"], options["url"])
+
+        origem = settings.DATABASES["default"]
+        if origem["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("O benchmark compara perfis sobre uma cópia do banco SQLite.")
+        if options["servidor"] == "gunicorn" and importlib.util.find_spec("gunicorn") is None:
+            raise CommandError("gunicorn não está instalado; use --servidor runserver.")
+
+        resultados = {}
+        for perfil in options["perfis"]:
+            resultados[perfil] = self._rodar_perfil(
+                perfil, str(origem["NAME"]), options["servidor"],
+                options["trabalhadores"], options["duracao"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(resultados, indent=2))
+            return
+        processos = (f"{options['trabalhadores']} workers" if options["servidor"] == "gunicorn"
+                     else "1 processo com threads")
+        self.stdout.write(
+            f"Servidor: {options['servidor']} ({processos}), "
+            f"{options['trabalhadores']} clientes HTTP em 127.0.0.1")
+        for perfil, r in resultados.items():
+            self.stdout.write(
+                f"{perfil:>16}: {r['requisicoes_por_segundo']:8.1f} req/s "
+                f"({r['requisicoes']} requisições, {r['escritas']} escritas, "
+                f"{r['erros']} erro(s))")
+        if len(resultados) == 2:
+            base, novo = resultados.values()
+            if base["requisicoes_por_segundo"]:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Ganho: {novo['requisicoes_por_segundo'] / base['requisicoes_por_segundo']:.2f}x"))
+
+    # ------------------ ORQUESTRAÇÃO ------------------
+
+    def _rodar_perfil(self, perfil, banco, servidor, trabalhadores, duracao):
+        with tempfile.TemporaryDirectory() as pasta:
+            copia = os.path.join(pasta, "benchmark.sqlite3")
+            shutil.copy(banco, copia)
+            env = {
+                **os.environ,
+                "DJANGO_PERFIL": perfil,
+                "DATABASE_URL": f"sqlite:///{copia}",
+                "DJANGO_CACHE_DIR": os.path.join(pasta, "cache"),
+                "DJANGO_ALLOWED_HOSTS": "127.0.0.1",
+            }
+            manage = [sys.executable, str(settings.BASE_DIR / "manage.py")]
+            subprocess.run(manage + ["migrate", "-v0"], env=env, check=True)
+
+            url = f"http://127.0.0.1:{self._porta_livre()}"
+            processo_servidor = self._iniciar_servidor(servidor, url, trabalhadores, env)
+            try:
+                inicio = time.time() + 3  # tempo para todos os processos subirem
+                processos = [
+                    subprocess.Popen(
+                        manage + ["benchmark_perfil", "--trabalhador", str(i),
+                                  "--inicio", str(inicio), "--duracao", str(duracao),
+                                  "--url", url],
+                        env=env, stdout=subprocess.PIPE, text=True)
+                    for i in range(trabalhadores)
+                ]
+                parciais = []
+                for processo in processos:
+                    saida, _ = processo.communicate()
+                    if processo.returncode:
+                        raise CommandError(f"Trabalhador do perfil {perfil} falhou.")
+                    parciais.append(json.loads(saida.strip().splitlines()[-1]))
+            finally:
+                processo_servidor.terminate()
+                processo_servidor.wait(timeout=10)
+
+        total = {
+            chave: sum(p[chave] for p in parciais)
+            for chave in ("requisicoes", "escritas", "erros")
+        }
+        total["servidor"] = servidor
+        total["trabalhadores"] = trabalhadores
+        total["duracao"] = duracao
+        total["requisicoes_por_segundo"] = round(total["requisicoes"] / duracao, 1)
+        return total
+
+    @staticmethod
+    def _porta_livre():
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            return sock.getsockname()[1]
+
+    def _iniciar_servidor(self, servidor, url, trabalhadores, env):
+        endereco = url.removeprefix("http://")
+        if servidor == "gunicorn":
+            modulo = settings.WSGI_APPLICATION.rsplit(".", 1)[0]
+            comando = [sys.executable, "-m", "gunicorn", f"{modulo}:application",
+                       "--workers", str(trabalhadores), "--bind", endereco,
+                       "--log-level", "warning"]
+        else:
+            comando = [sys.executable, str(settings.BASE_DIR / "manage.py"),
+                       "runserver", "--noreload", endereco]
+        processo = subprocess.Popen(
+            comando, env=env, cwd=settings.BASE_DIR,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        limite = time.time() + ESPERA_SERVIDOR
+        while True:
+            try:
+                build_opener(_SemRedirecionar).open(f"{url}/accounts/login/", timeout=1).read()
+                return processo
+            except HTTPError:
+                return processo  # respondeu (ex.: redirect)
+            except OSError:
+                if processo.poll() is not None or time.time() > limite:
+                    processo.kill()
+                    raise CommandError(f"O servidor ({servidor}) não respondeu em {url}.")
+                time.sleep(0.2)
+
+    # ------------------ TRABALHADOR ------------------
+
+    def _preparar(self, indice):
+        from django.contrib.auth.models import User
+        from core.models import Colaborador, Insumo
+
+        usuario, criado = User.objects.get_or_create(
+            username=f"benchmark{indice}", defaults={"is_superuser": True, "is_staff": True})
+        colaborador, _ = Colaborador.objects.get_or_create(
+            rc=f"BENCH{indice}",
+            defaults={"nome": f"Benchmark {indice}", "data_nascimento": "2000-01-01",
+                      "sexo": "M", "funcao": "Teste", "CPF_RG": f"BENCH{indice}"})
+        insumo, _ = Insumo.objects.get_or_create(
+            nome=f"Insumo benchmark {indice}",
+            defaults={"quantidade_total": 10 ** 9, "unidade_base": "un"})
+        return usuario, colaborador, insumo
+
+    def _cookies(self, usuario):
+        """Cabeçalho Cookie com uma sessão autenticada e um token CSRF."""
+        from django.test import Client
+
+        # A sessão é gravada no banco/cache do perfil, que o servidor lê
+        cliente = Client()
+        cliente.force_login(usuario)
+        sessao = cliente.cookies[settings.SESSION_COOKIE_NAME].value
+        csrf = get_random_string(32)
+        return f"{settings.SESSION_COOKIE_NAME}={sessao}; {settings.CSRF_COOKIE_NAME}={csrf}", csrf
+
+    def _trabalhar(self, indice, inicio, duracao, url):
+        usuario, colaborador, insumo = self._preparar(indice)
+        cookies, csrf = self._cookies(usuario)
+        connections.close_all()  # daqui em diante só o servidor usa o banco
+
+        saida = urlencode({
+            "insumo": insumo.id,
+            "colaborador_entregando": colaborador.id,
+            "colaborador_retira": colaborador.id,
+            "unidade": "un",
+            "quantidade": 1,
+            "csrfmiddlewaretoken": csrf,
+        }).encode()
+        cabecalhos = {"Cookie": cookies}
+        navegador = build_opener(_SemRedirecionar)
+        aleatorio = random.Random(indice)
+
+        time.sleep(max(0, inicio - time.time()))
+        fim = inicio + duracao
+        requisicoes = escritas = erros = 0
+        while time.time() < fim:
+            if requisicoes % ESCRITA_A_CADA == ESCRITA_A_CADA - 1:
+                requisicao = Request(f"{url}/saidas/novo/", data=saida, headers=cabecalhos)
+                escritas += 1
+            else:
+                requisicao = Request(url + aleatorio.choice(LEITURAS), headers=cabecalhos)
+            try:
+                with navegador.open(requisicao, timeout=60) as resposta:
+                    resposta.read()
+            except HTTPError as erro:
+                if erro.code >= 400:
+                    erros += 1  # ex.: 500 por "database is locked"
+            except OSError:
+                erros += 1
+            requisicoes += 1
+
+        self.stdout.write(json.dumps(
+            {"requisicoes": requisicoes, "escritas": escritas, "erros": erros}))
@@ -0,0 +1,220 @@
+import json
+import math
+import subprocess
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core import urls, views
+from core.models import (
+    CatalogoProduto,
+    Colaborador,
+    FichaInsumo,
+    FichaProducao,
+    Insumo,
+    ProdutoPronto,
+    SaidaInsumo,
+    Vistoria,
+    VistoriaInsumo,
+)
+
+# Rota -> modelo cujo id preenche o parâmetro inteiro (usa o registro mais recente)
+ALVOS = {
+    "colaboradores_detail": Colaborador,
+    "colaboradores_edit": Colaborador,
+    "colaboradores_delete": Colaborador,
+    "usuario_edit": Colaborador,
+    "usuario_delete": User,
+    "insumos_edit": Insumo,
+    "insumos_delete": Insumo,
+    "produtos_edit": ProdutoPronto,
+    "produtos_delete": ProdutoPronto,
+    "catalogo_edit": CatalogoProduto,
+    "catalogo_delete": CatalogoProduto,
+    "visualizar_ficha": FichaProducao,
+    "saida_insumo_delete": SaidaInsumo,
+    "visualizar_checklist": Vistoria,
+    "excluir_checklist": Vistoria,
+}
+
+# Query string usada em cada rota (as demais vão sem parâmetros)
+CONSULTAS = {
+    "busca_global": "q=bolo",
+    "autocomplete": "q=a",
+}
+
+# Rotas fora do benchmark (GET teria efeito colateral ou não é aceito)
+IGNORADAS = {
+    "logout": "encerra a sessão do cliente",
+    "saida_insumo_lote_api": "aceita só POST",
+}
+
+# Tabelas contadas no relatório, para saber com que volume ele foi gerado
+VOLUMES = [Colaborador, Insumo, CatalogoProduto, ProdutoPronto, SaidaInsumo,
+           FichaProducao, FichaInsumo, Vistoria, VistoriaInsumo]
+
+PERCENTIS = (50, 90, 95, 99)
+
+
+def percentil(valores, p):
+    """Percentil por posição (nearest-rank) de uma lista já ordenada."""
+    return valores[max(math.ceil(p / 100 * len(valores)) - 1, 0)]
+
+
+def rotas(filtro=None):
+    """
+    (nome, url) de cada rota GET de core/urls.py, com os parâmetros
+    preenchidos a partir do banco. Rotas com parâmetros sem regra em
+    ALVOS vêm com url None; as sem registro para preencher são omitidas.
+    Usada também pelos orçamentos de consultas em core/tests.py.
+    """
+    for padrao in urls.urlpatterns:
+        nome = padrao.name
+        if not nome or nome in IGNORADAS or (filtro and filtro not in nome):
+            continue
+        consulta = f"?{CONSULTAS[nome]}" if nome in CONSULTAS else ""
+
+        if not padrao.pattern.converters:
+            yield nome, reverse(nome) + consulta
+        elif nome == "autocomplete":
+            for tipo in views.AUTOCOMPLETE:
+                yield f"{nome}:{tipo}", reverse(nome, args=[tipo]) + consulta
+        elif nome == "foto_colaborador":
+            foto = (Colaborador.objects.exclude(foto_hash="")
+                    .values_list("foto_hash", flat=True).first())
+            if foto:
+                yield nome, reverse(nome, args=[f"{foto}_miniatura.jpg"])
+        elif nome in ALVOS:
+            pk = ALVOS[nome].objects.order_by("-pk").values_list("pk", flat=True).first()
+            if pk is not None:
+                yield nome, reverse(nome, args=[pk]) + consulta
+        else:
+            yield nome, None
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede cada rota GET de core/urls.py pelo cliente de testes: "
+        "percentis de latência e número de consultas SQL, em JSON. "
+        "Use --comparar com um resultado anterior para ver a diferença "
+        "entre commits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeticoes", type=int, default=20)
+        parser.add_argument("--aquecimento", type=int, default=2,
+                            help="Requisições descartadas antes de medir cada rota.")
+        parser.add_argument("--sem-cache", action="store_true",
+                            help="Limpa o cache antes de cada requisição (pior caso).")
+        parser.add_argument("--filtro", help="Mede só as rotas cujo nome contém o texto.")
+        parser.add_argument("--usuario", default="benchmark",
+                            help="Usuário das requisições (criado como superusuário se não existir).")
+        parser.add_argument("--saida", help="Grava o JSON neste arquivo em vez de imprimir.")
+        parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar.")
+
+    def handle(self, *args, **options):
+        if options["repeticoes"] < 1:
+            raise CommandError("--repeticoes deve ser pelo menos 1.")
+
+        usuario, _ = User.objects.get_or_create(
+            username=options["usuario"], defaults={"is_superuser": True, "is_staff": True})
+        host = next((h.lstrip(".") for h in settings.ALLOWED_HOSTS if h != "*"), "localhost")
+        # Erros viram status 500 no relatório em vez de interromper a medição
+        cliente = Client(HTTP_HOST=host, raise_request_exception=False)
+        cliente.force_login(usuario)
+
+        resultados = []
+        for nome, url in rotas(options["filtro"]):
+            if url is None:
+                self.stderr.write(f"{nome}: sem regra para os parâmetros, ignorada.")
+                continue
+            resultados.append(self._medir(cliente, nome, url, options))
+            r = resultados[-1]
+            self.stderr.write(
+                f"{nome:<28} {r['status']} p50={r['p50_ms']:7.1f} ms "
+                f"p95={r['p95_ms']:7.1f} ms consultas={r['consultas']}")
+
+        relatorio = {
+            "commit": self._commit(),
+            "gerado_em": timezone.now().isoformat(),
+            "repeticoes": options["repeticoes"],
+            "sem_cache": options["sem_cache"],
+            "volumes": {m._meta.model_name: m.objects.count() for m in VOLUMES},
+            "rotas": resultados,
+        }
+        texto = json.dumps(relatorio, indent=2, ensure_ascii=False)
+        if options["saida"]:
+            with open(options["saida"], "w", encoding="utf-8") as arquivo:
+                arquivo.write(texto)
+        elif not options["comparar"]:
+            self.stdout.write(texto)
+
+        if options["comparar"]:
+            with open(options["comparar"], encoding="utf-8") as arquivo:
+                self._comparar(json.load(arquivo), relatorio)
+
+    # ------------------ MEDIÇÃO ------------------
+
+    def _requisitar(self, cliente, url, sem_cache):
+        if sem_cache:
+            cache.clear()
+        with CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            response = cliente.get(url)
+            if response.streaming:
+                b"".join(response.streaming_content)  # CSVs: mede a geração inteira
+            duracao = (time.perf_counter() - inicio) * 1000
+        return response.status_code, duracao, len(consultas)
+
+    def _medir(self, cliente, nome, url, options):
+        for _ in range(options["aquecimento"]):
+            self._requisitar(cliente, url, options["sem_cache"])
+        amostras = [self._requisitar(cliente, url, options["sem_cache"])
+                    for _ in range(options["repeticoes"])]
+
+        duracoes = sorted(d for _, d, _ in amostras)
+        resultado = {
+            "nome": nome,
+            "url": url,
+            "status": amostras[-1][0],
+            "consultas": amostras[-1][2],
+            "consultas_max": max(c for _, _, c in amostras),
+        }
+        for p in PERCENTIS:
+            resultado[f"p{p}_ms"] = round(percentil(duracoes, p), 2)
+        resultado["max_ms"] = round(duracoes[-1], 2)
+        resultado["media_ms"] = round(sum(duracoes) / len(duracoes), 2)
+        return resultado
+
+    def _commit(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    # ------------------ COMPARAÇÃO ------------------
+
+    def _comparar(self, anterior, atual):
+        antes = {r["nome"]: r for r in anterior["rotas"]}
+        self.stdout.write(
+            f"{'rota':<28} {'p50 (ms)':>19} {'p95 (ms)':>19} {'consultas':>11}"
+            f"   [{anterior.get('commit')} -> {atual['commit']}]")
+        for r in atual["rotas"]:
+            a = antes.get(r["nome"])
+            if not a:
+                self.stdout.write(f"{r['nome']:<28} (nova)")
+                continue
+            self.stdout.write(
+                f"{r['nome']:<28} {a['p50_ms']:8.1f} -> {r['p50_ms']:8.1f} "
+                f"{a['p95_ms']:8.1f} -> {r['p95_ms']:8.1f} "
+                f"{a['consultas']:4} -> {r['consultas']:<4}")
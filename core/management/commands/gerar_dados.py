@@ -0,0 +1,268 @@
+import random
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from core import versoes
+from core.unidades import ESCALA
+from core.models import (
+    CatalogoProduto,
+    Colaborador,
+    FichaInsumo,
+    FichaProducao,
+    Insumo,
+    ProdutoPronto,
+    SaidaInsumo,
+    Vistoria,
+    VistoriaInsumo,
+)
+
+LOTE = 1000
+
+# Volumes padrão (multiplicados por --escala)
+VOLUMES = {
+    "colaboradores": 100,
+    "insumos": 300,
+    "catalogo": 80,
+    "produtos": 2000,
+    "fichas": 5000,
+    "saidas": 50000,
+    "vistorias": 500,
+}
+
+INSUMOS_BASE = [
+    ("Farinha de trigo", "g"), ("Açúcar refinado", "g"), ("Manteiga", "g"),
+    ("Ovos", "un"), ("Leite integral", "ml"), ("Chocolate meio amargo", "g"),
+    ("Creme de leite", "ml"), ("Fermento químico", "g"), ("Leite condensado", "g"),
+    ("Morango", "g"), ("Coco ralado", "g"), ("Essência de baunilha", "ml"),
+    ("Embalagem", "un"), ("Cacau em pó", "g"), ("Óleo", "ml"),
+]
+PRODUTOS_BASE = [
+    "Bolo de chocolate", "Bolo de cenoura", "Torta de limão", "Brigadeiro",
+    "Pão de mel", "Cheesecake", "Bolo de fubá", "Torta holandesa",
+    "Beijinho", "Bolo red velvet", "Pudim", "Mousse de maracujá",
+]
+CATEGORIAS = ["Bolos", "Tortas", "Doces", "Sobremesas"]
+NOMES = ["Ana", "Bruno", "Carla", "Diego", "Elaine", "Fábio", "Gabriela",
+         "Heitor", "Isabela", "João", "Larissa", "Márcio", "Natália", "Otávio"]
+SOBRENOMES = ["Silva", "Souza", "Oliveira", "Pereira", "Lima", "Araújo",
+              "Gonçalves", "Ribeiro", "Conceição", "Assunção"]
+FUNCOES = ["Confeiteiro(a)", "Auxiliar de cozinha", "Estoquista", "Supervisor(a)"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera dados sintéticos em volume (colaboradores, insumos, saídas, "
+        "fichas, produtos prontos e checklists) com inserções em lote. A "
+        "mesma --semente gera sempre os mesmos dados; as datas são "
+        "distribuídas nos --dias anteriores a hoje."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--semente", type=int, default=42)
+        parser.add_argument("--escala", type=float, default=1.0,
+                            help="Multiplica todos os volumes padrão.")
+        for nome, padrao in VOLUMES.items():
+            parser.add_argument(f"--{nome}", type=int, help=f"Padrão: {padrao} x escala.")
+        parser.add_argument("--insumos-por-ficha", type=int, default=6)
+        parser.add_argument("--itens-por-vistoria", type=int, default=20)
+        parser.add_argument("--dias", type=int, default=365)
+        parser.add_argument("--sem-derivados", action="store_true",
+                            help="Não reconstrói contadores, livro, busca, resumo de validade, "
+                                 "consumo diário e previsão de compra.")
+        parser.add_argument("--forcar", action="store_true",
+                            help="Permite rodar com o perfil de produção.")
+
+    def handle(self, *args, **options):
+        if settings.PRODUCAO and not options["forcar"]:
+            raise CommandError("Perfil de produção: use --forcar para gerar dados sintéticos.")
+
+        self.aleatorio = random.Random(options["semente"])
+        self.prefixo = f"S{options['semente']}"
+        self.hoje = timezone.localdate()
+        self.dias = options["dias"]
+        volumes = {
+            nome: options[nome] if options[nome] is not None else round(padrao * options["escala"])
+            for nome, padrao in VOLUMES.items()
+        }
+        if Colaborador.objects.filter(rc__startswith=f"{self.prefixo}-").exists():
+            raise CommandError(
+                f"Já existem dados da semente {options['semente']}; use outra --semente.")
+
+        with transaction.atomic():
+            colaboradores = self._colaboradores(volumes["colaboradores"])
+            insumos = self._insumos(volumes["insumos"])
+            catalogo = self._catalogo(volumes["catalogo"])
+            produtos = self._produtos(volumes["produtos"], catalogo)
+            self._saidas(volumes["saidas"], insumos, colaboradores)
+            self._fichas(volumes["fichas"], options["insumos_por_ficha"],
+                         produtos, insumos, colaboradores)
+            self._vistorias(volumes["vistorias"], options["itens_por_vistoria"], insumos)
+            # bulk_create não dispara os sinais que versionam o cache
+            versoes.invalidar("colaborador", "insumo", "catalogoproduto",
+                              "produtopronto", "fichaproducao")
+
+        for nome, total in volumes.items():
+            self.stdout.write(f"{nome}: {total}")
+
+        if not options["sem_derivados"]:
+            for comando in ("recalcular_contadores", "reconstruir_movimentos",
+                            "reconstruir_busca", "resumo_validade",
+                            "reconstruir_consumo", "prever_consumo"):
+                call_command(comando, stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS("Dados sintéticos gerados."))
+
+    # ------------------ AUXILIARES ------------------
+
+    def _data(self):
+        return self.hoje - timedelta(days=self.aleatorio.randrange(self.dias))
+
+    def _momento(self, dia=None):
+        segundos = self.aleatorio.randrange(7 * 3600, 19 * 3600)  # horário de trabalho
+        return timezone.make_aware(
+            datetime.combine(dia or self._data(), time()) + timedelta(seconds=segundos))
+
+    def _criar(self, Modelo, objetos):
+        return Modelo.objects.bulk_create(objetos, batch_size=LOTE)
+
+    def _datar(self, Modelo, objetos, campo, valores):
+        # Campos auto_now_add são sobrescritos no bulk_create; as datas
+        # históricas vão num bulk_update logo em seguida
+        for obj, valor in zip(objetos, valores):
+            setattr(obj, campo, valor)
+        Modelo.objects.bulk_update(objetos, [campo], batch_size=LOTE)
+
+    # ------------------ CADASTROS ------------------
+
+    def _colaboradores(self, total):
+        a = self.aleatorio
+        return self._criar(Colaborador, [
+            Colaborador(
+                rc=f"{self.prefixo}-{i:06d}",
+                nome=f"{a.choice(NOMES)} {a.choice(SOBRENOMES)} {a.choice(SOBRENOMES)}",
+                data_nascimento=date(a.randint(1960, 2005), a.randint(1, 12), a.randint(1, 28)),
+                sexo=a.choice("MF"),
+                funcao=a.choice(FUNCOES),
+                CPF_RG=f"{self.prefixo}-{i:06d}",
+            )
+            for i in range(total)
+        ])
+
+    def _insumos(self, total):
+        a = self.aleatorio
+        insumos = []
+        for i in range(total):
+            nome, unidade = INSUMOS_BASE[i % len(INSUMOS_BASE)]
+            estoque = a.randint(0, 200) if unidade == "un" else a.randint(0, 50000)
+            insumos.append(Insumo(nome=f"{nome} {self.prefixo}-{i:04d}",
+                                  quantidade_total=estoque * ESCALA, unidade_base=unidade))
+        return self._criar(Insumo, insumos)
+
+    def _catalogo(self, total):
+        return self._criar(CatalogoProduto, [
+            CatalogoProduto(
+                nome=f"{PRODUTOS_BASE[i % len(PRODUTOS_BASE)]} {self.prefixo}-{i:04d}",
+                descricao=f"Receita {i} gerada para testes de volume.",
+            )
+            for i in range(total)
+        ])
+
+    def _produtos(self, total, catalogo):
+        a = self.aleatorio
+        produtos = []
+        for _ in range(total):
+            fabricacao = self._data()
+            produtos.append(ProdutoPronto(
+                catalogo=a.choice(catalogo),
+                quantidade=a.randint(1, 50),
+                data_fabricacao=fabricacao,
+                data_validade=fabricacao + timedelta(days=a.randint(1, 15)),
+                peso_produto=a.randint(100, 3000),
+            ))
+        return self._criar(ProdutoPronto, produtos)
+
+    # ------------------ MOVIMENTAÇÕES ------------------
+
+    def _saidas(self, total, insumos, colaboradores):
+        a = self.aleatorio
+        saidas = []
+        for _ in range(total):
+            insumo = a.choice(insumos)
+            quantidade = ESCALA * (
+                a.randint(1, 24) if insumo.unidade_base == "un" else a.randint(50, 5000))
+            saidas.append(SaidaInsumo(
+                insumo=insumo,
+                colaborador_entregando=a.choice(colaboradores),
+                colaborador_retira=a.choice(colaboradores),
+                quantidade_principal=quantidade,
+                restante=quantidade,
+                unidade=insumo.unidade_base,
+            ))
+        saidas = self._criar(SaidaInsumo, saidas)
+        self._datar(SaidaInsumo, saidas, "data", (self._momento() for _ in saidas))
+
+    def _fichas(self, total, insumos_por_ficha, produtos, insumos, colaboradores):
+        a = self.aleatorio
+        fichas = []
+        for _ in range(total):
+            produto = a.choice(produtos)
+            fichas.append(FichaProducao(
+                produto=produto,
+                colaborador=a.choice(colaboradores),
+                categoria=a.choice(CATEGORIAS),
+                data_fabricacao=produto.data_fabricacao,
+                validade=(produto.data_validade - produto.data_fabricacao).days,
+                tempo_preparo=a.randint(20, 240),
+                rendimento=f"{a.randint(1, 40)} porções",
+                peso_produto=produto.peso_produto,
+            ))
+        fichas = self._criar(FichaProducao, fichas)
+        self._datar(FichaProducao, fichas, "data_criacao",
+                    (self._momento(f.data_fabricacao) for f in fichas))
+
+        itens = []
+        for ficha in fichas:
+            for insumo in a.sample(insumos, min(insumos_por_ficha, len(insumos))):
+                quantidade = ESCALA * (
+                    a.randint(1, 12) if insumo.unidade_base == "un" else a.randint(10, 1500))
+                itens.append(FichaInsumo(ficha=ficha, insumo=insumo,
+                                         quantidade_usada=quantidade,
+                                         unidade=insumo.unidade_base))
+        self._criar(FichaInsumo, itens)
+
+    def _vistorias(self, total, itens_por_vistoria, insumos):
+        a = self.aleatorio
+        cabecalhos, grupos = [], []
+        for _ in range(total):
+            linhas = []
+            for insumo in a.sample(insumos, min(itens_por_vistoria, len(insumos))):
+                retirada = a.randint(0, 10000)
+                usada = a.randint(0, retirada)
+                teorica = retirada - usada
+                real = a.randint(0, teorica) if teorica else 0
+                linhas.append(VistoriaInsumo(
+                    insumo=insumo, quantidade_retirada=retirada * ESCALA,
+                    quantidade_usada=usada * ESCALA, quantidade_teorica=teorica * ESCALA,
+                    quantidade_real=real * ESCALA, desperdicio=(teorica - real) * ESCALA,
+                ))
+            cabecalhos.append(Vistoria(
+                data=self._data(),
+                total_itens=len(linhas),
+            ))
+            grupos.append(linhas)
+
+        cabecalhos = self._criar(Vistoria, cabecalhos)
+        self._datar(Vistoria, cabecalhos, "criado_em",
+                    (self._momento(v.data) for v in cabecalhos))
+        itens = []
+        for vistoria, linhas in zip(cabecalhos, grupos):
+            for linha in linhas:
+                linha.vistoria = vistoria
+                itens.append(linha)
+        itens = self._criar(VistoriaInsumo, itens)
+        self._datar(VistoriaInsumo, itens, "data_vistoria",
+                    (linha.vistoria.data for linha in itens))
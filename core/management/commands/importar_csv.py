@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importacoes import TAMANHO_LOTE, TIPOS, ArquivoInvalido, importar_csv
+
+
+class Command(BaseCommand):
+    help = "Importa insumos, catálogo ou colaboradores de um arquivo CSV (upsert em lotes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("tipo", choices=sorted(TIPOS))
+        parser.add_argument("arquivo", help="Caminho do arquivo CSV (UTF-8, ',' ou ';').")
+        parser.add_argument(
+            "--lote", type=int, default=TAMANHO_LOTE,
+            help=f"Linhas por lote gravado (padrão: {TAMANHO_LOTE}).")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["arquivo"], encoding="utf-8-sig", newline="") as arquivo:
+                resultado = importar_csv(options["tipo"], arquivo, options["lote"])
+        except OSError as e:
+            raise CommandError(f"Não foi possível abrir o arquivo: {e}")
+        except ArquivoInvalido as e:
+            raise CommandError(f"{e} Nenhuma linha foi importada.")
+
+        for linha, erro in resultado["erros"]:
+            self.stderr.write(f"Linha {linha}: {erro}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado['criados']} criado(s), {resultado['atualizados']} atualizado(s), "
+            f"{len(resultado['erros'])} erro(s)."))
@@ -0,0 +1,39 @@
+from datetime import date
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import previsao
+
+
+class Command(BaseCommand):
+    help = (
+        "Calcula a previsão de retirada, o ponto de pedido e os dias de "
+        "cobertura de todos os insumos a partir do consumo diário (agendar "
+        "diariamente, depois de reconstruir_consumo se ele também rodar)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--data", help="Data de referência (AAAA-MM-DD); padrão: hoje.")
+        parser.add_argument("--prazo", type=int, default=previsao.PRAZO_ENTREGA,
+                            help="Dias entre o pedido e a chegada.")
+        parser.add_argument("--ciclo", type=int, default=previsao.CICLO_DIAS,
+                            help="Dias cobertos por cada pedido.")
+        parser.add_argument("--semanas", type=int, default=previsao.HISTORICO_SEMANAS,
+                            help="Semanas de histórico usadas na previsão.")
+
+    def handle(self, *args, **options):
+        try:
+            hoje = date.fromisoformat(options["data"]) if options["data"] else None
+        except ValueError:
+            raise CommandError("Data inválida; use AAAA-MM-DD.")
+        if options["prazo"] < 1 or options["ciclo"] < 0:
+            raise CommandError("Use --prazo de pelo menos 1 dia e --ciclo não negativo.")
+        if options["semanas"] * 7 < previsao.JANELA_MEDIA:
+            raise CommandError(
+                f"Use pelo menos {previsao.JANELA_MEDIA // 7} semanas de histórico.")
+
+        inicio = perf_counter()
+        total = previsao.gerar(hoje, options["prazo"], options["ciclo"], options["semanas"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Previsão gravada para {total} insumo(s) em {perf_counter() - inicio:.2f}s."))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from core import fotos
+from core.models import Colaborador
+
+
+class Command(BaseCommand):
+    help = (
+        "Processa as fotos de colaboradores já gravadas: renomeia pelo hash do "
+        "conteúdo e gera as variantes reduzidas (miniatura e detalhe)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--todas",
+            action="store_true",
+            help="Reprocessa também as fotos que já têm hash (ex.: após mudar VARIANTES).",
+        )
+
+    def handle(self, *args, **options):
+        colaboradores = Colaborador.objects.exclude(foto="").exclude(foto__isnull=True)
+        if not options["todas"]:
+            colaboradores = colaboradores.filter(foto_hash="")
+
+        processadas = falhas = 0
+        for colaborador in colaboradores.only("id", "nome", "foto", "foto_hash").iterator():
+            antigo = colaborador.foto.name
+            try:
+                fotos.processar_colaborador(colaborador)
+            except (OSError, ValueError) as erro:
+                falhas += 1
+                self.stderr.write(f"{colaborador.nome}: {antigo} ignorada ({erro}).")
+                continue
+            colaborador.save(update_fields=["foto", "foto_hash"])
+            processadas += 1
+            self.stdout.write(f"{colaborador.nome}: {antigo} -> {colaborador.foto.name}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{processadas} foto(s) processada(s), {falhas} com erro. "
+            "Os arquivos antigos foram mantidos."))
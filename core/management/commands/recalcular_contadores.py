@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.contadores import calcular_contadores
+from core.models import ContadorInsumo
+
+
+class Command(BaseCommand):
+    help = "Reconstrói (ou apenas verifica) os contadores materializados de insumos."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verificar",
+            action="store_true",
+            help="Apenas compara os contadores com as movimentações, sem gravar.",
+        )
+
+    def handle(self, *args, **options):
+        esperado = calcular_contadores()
+
+        if options["verificar"]:
+            atuais = {
+                c.insumo_id: c
+                for c in ContadorInsumo.objects.all()
+            }
+            divergentes = 0
+            for insumo_id, (retirado, usado, _) in esperado.items():
+                contador = atuais.get(insumo_id)
+                atual = (contador.total_retirado, contador.total_usado) if contador else (0, 0)
+                if atual != (retirado, usado):
+                    divergentes += 1
+                    self.stdout.write(
+                        f"Insumo {insumo_id}: contador {atual} != movimentações {(retirado, usado)}"
+                    )
+            if divergentes:
+                raise CommandError(f"{divergentes} contador(es) divergente(s).")
+            self.stdout.write(self.style.SUCCESS("Contadores conferem."))
+            return
+
+        with transaction.atomic():
+            ContadorInsumo.objects.all().delete()
+            ContadorInsumo.objects.bulk_create(
+                ContadorInsumo(
+                    insumo_id=insumo_id,
+                    total_retirado=retirado,
+                    total_usado=usado,
+                    ultima_movimentacao=ultima,
+                )
+                for insumo_id, (retirado, usado, ultima) in esperado.items()
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(esperado)} contador(es) recalculado(s)."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core import busca
+
+
+class Command(BaseCommand):
+    help = "Reconstrói o índice da busca global (e a tabela FTS5 no SQLite)."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            totais = busca.reconstruir()
+        for tipo, total in totais.items():
+            self.stdout.write(f"{busca.FONTES[tipo]['rotulo']}: {total}")
+        modo = "FTS5" if busca.fts_disponivel(connection) else "busca simples (sem FTS5)"
+        self.stdout.write(self.style.SUCCESS(
+            f"{sum(totais.values())} registro(s) indexado(s) — {modo}."))
@@ -0,0 +1,61 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core import consumo
+from core.models import ConsumoDiario
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstrói (ou apenas verifica) o consumo diário por insumo a partir "
+        "de SaidaInsumo, FichaInsumo e VistoriaInsumo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--desde", help="Só os dias a partir desta data (AAAA-MM-DD).")
+        parser.add_argument(
+            "--verificar",
+            action="store_true",
+            help="Apenas compara a tabela com as movimentações, sem gravar.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            desde = date.fromisoformat(options["desde"]) if options["desde"] else None
+        except ValueError:
+            raise CommandError("Data inválida; use AAAA-MM-DD.")
+
+        if options["verificar"]:
+            esperado = {
+                chave: tuple(valores)
+                for chave, valores in consumo.calcular(desde=desde).items()
+            }
+            atuais = ConsumoDiario.objects.all()
+            if desde:
+                atuais = atuais.filter(data__gte=desde)
+            gravado = {
+                (insumo_id, data): tuple(valores)
+                for insumo_id, data, *valores in atuais.values_list(
+                    "insumo_id", "data", *consumo.CAMPOS).iterator()
+            }
+            # Dias cujas movimentações foram todas estornadas ficam zerados
+            zerado = (0,) * len(consumo.CAMPOS)
+            divergentes = [
+                chave for chave in esperado.keys() | gravado.keys()
+                if esperado.get(chave, zerado) != gravado.get(chave, zerado)
+            ]
+            for insumo_id, data in sorted(divergentes)[:20]:
+                self.stdout.write(
+                    f"Insumo {insumo_id} em {data:%d/%m/%Y}: tabela "
+                    f"{gravado.get((insumo_id, data), zerado)} != movimentações "
+                    f"{esperado.get((insumo_id, data), zerado)}")
+            if divergentes:
+                raise CommandError(f"{len(divergentes)} dia(s) divergente(s).")
+            self.stdout.write(self.style.SUCCESS("Consumo diário confere."))
+            return
+
+        with transaction.atomic():
+            linhas = consumo.reconstruir(desde=desde)
+        self.stdout.write(self.style.SUCCESS(f"{linhas} dia(s) de consumo gravado(s)."))
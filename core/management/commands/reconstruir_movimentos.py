@@ -0,0 +1,113 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import (
+    FichaInsumo,
+    Insumo,
+    MovimentoEstoque,
+    SaidaInsumo,
+    SnapshotEstoque,
+    VistoriaInsumo,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstrói o livro de movimentações e os snapshots a partir de "
+        "SaidaInsumo, FichaInsumo e VistoriaInsumo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--intervalo-dias",
+            type=int,
+            default=7,
+            help="Intervalo entre snapshots gerados no histórico (padrão: 7).",
+        )
+
+    def handle(self, *args, **options):
+        intervalo = timedelta(days=options["intervalo_dias"])
+        agora = timezone.now()
+        eventos = []
+
+        # Consumo em ficha, agrupado por ficha e insumo
+        consumos = defaultdict(int)
+        datas_fichas = {}
+        for fi in FichaInsumo.objects.values(
+                "ficha_id", "ficha__data_criacao", "insumo_id", "quantidade_usada").iterator():
+            consumos[(fi["ficha_id"], fi["insumo_id"])] += fi["quantidade_usada"]
+            datas_fichas[fi["ficha_id"]] = fi["ficha__data_criacao"]
+        for (ficha_id, insumo_id), quantidade in consumos.items():
+            eventos.append(MovimentoEstoque(
+                insumo_id=insumo_id, tipo="consumo", delta_em_uso=-quantidade,
+                data=datas_fichas[ficha_id], referencia=f"ficha:{ficha_id}"))
+
+        # As saídas guardam o total retirado (o saldo do lote fica em `restante`)
+        for saida in SaidaInsumo.objects.only(
+                "id", "insumo_id", "data", "quantidade_principal", "quantidade_complementar"
+        ).iterator():
+            quantidade = saida.quantidade_principal + saida.quantidade_complementar
+            eventos.append(MovimentoEstoque(
+                insumo_id=saida.insumo_id, tipo="saida", delta_estoque=-quantidade,
+                delta_em_uso=quantidade, data=saida.data,
+                referencia=f"saida:{saida.id}"))
+
+        for v in VistoriaInsumo.objects.select_related("vistoria").only(
+                "insumo_id", "data_vistoria", "desperdicio", "vistoria__criado_em").iterator():
+            data = v.vistoria.criado_em if v.vistoria else timezone.make_aware(
+                datetime.combine(v.data_vistoria, time(23, 59, 59)))
+            eventos.append(MovimentoEstoque(
+                insumo_id=v.insumo_id, tipo="vistoria", delta_em_uso=-v.desperdicio,
+                data=data, referencia=f"vistoria:{v.vistoria_id}"))
+
+        # Entrada de abertura: garante que o saldo final bate com quantidade_total
+        primeira_data = {}
+        soma_estoque = defaultdict(int)
+        for e in eventos:
+            soma_estoque[e.insumo_id] += e.delta_estoque
+            if e.insumo_id not in primeira_data or e.data < primeira_data[e.insumo_id]:
+                primeira_data[e.insumo_id] = e.data
+        for insumo_id, quantidade_total in Insumo.objects.values_list("id", "quantidade_total"):
+            eventos.append(MovimentoEstoque(
+                insumo_id=insumo_id, tipo="entrada",
+                delta_estoque=quantidade_total - soma_estoque[insumo_id],
+                data=primeira_data.get(insumo_id, agora) - timedelta(seconds=1),
+                referencia="abertura"))
+
+        eventos.sort(key=lambda e: e.data)
+        snapshots = self._snapshots(eventos, intervalo, agora)
+
+        with transaction.atomic():
+            SnapshotEstoque.objects.all().delete()
+            MovimentoEstoque.objects.all().delete()
+            MovimentoEstoque.objects.bulk_create(eventos, batch_size=1000)
+            SnapshotEstoque.objects.bulk_create(snapshots, batch_size=1000)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(eventos)} movimentação(ões) e {len(snapshots)} snapshot(s) gravados."))
+
+    def _snapshots(self, eventos, intervalo, agora):
+        """Percorre os eventos em ordem e fotografa os saldos a cada intervalo."""
+        if not eventos:
+            return []
+        saldos = defaultdict(lambda: [0, 0])
+        snapshots = []
+        fronteira = eventos[0].data + intervalo
+        indice = 0
+        while fronteira <= agora:
+            while indice < len(eventos) and eventos[indice].data <= fronteira:
+                evento = eventos[indice]
+                saldos[evento.insumo_id][0] += evento.delta_estoque
+                saldos[evento.insumo_id][1] += evento.delta_em_uso
+                indice += 1
+            snapshots.extend(
+                SnapshotEstoque(insumo_id=insumo_id, data=fronteira,
+                                estoque=estoque, em_uso=em_uso)
+                for insumo_id, (estoque, em_uso) in saldos.items()
+            )
+            fronteira += intervalo
+        return snapshots
@@ -0,0 +1,25 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.validade import gerar_resumo
+
+
+class Command(BaseCommand):
+    help = (
+        "Marca os produtos vencidos e grava o resumo de validade do dia "
+        "por item do catálogo (agendar diariamente, logo após a meia-noite)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--data", help="Data de referência (AAAA-MM-DD); padrão: hoje.")
+
+    def handle(self, *args, **options):
+        try:
+            hoje = date.fromisoformat(options["data"]) if options["data"] else None
+        except ValueError:
+            raise CommandError("Data inválida; use AAAA-MM-DD.")
+        marcados, linhas = gerar_resumo(hoje)
+        self.stdout.write(self.style.SUCCESS(
+            f"{marcados} produto(s) com marca de vencido atualizada; "
+            f"{linhas} item(ns) do catálogo no resumo."))
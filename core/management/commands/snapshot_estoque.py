@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from core.movimentos import gerar_snapshots
+
+
+class Command(BaseCommand):
+    help = "Grava um snapshot dos saldos de todos os insumos (agendar diariamente)."
+
+    def handle(self, *args, **options):
+        total = gerar_snapshots()
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} snapshot(s) gravado(s)."))
@@ -0,0 +1,100 @@
+# core/middleware.py
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger("core.desempenho")
+
+# Quantas formas de SQL repetidas aparecem no log de requisição lenta
+FORMAS_NO_LOG = 5
+TAMANHO_FORMA = 300
+
+# Listas de placeholders de tamanho variável (IN (%s, %s, ...)) viram uma
+# só forma, para que a mesma consulta com N ids conte como repetição
+_LISTA_PARAMETROS = re.compile(r"%s(?:\s*,\s*%s)+")
+
+
+def forma(sql):
+    return _LISTA_PARAMETROS.sub("%s, ...", sql)[:TAMANHO_FORMA]
+
+
+class MedidorSQL:
+    """
+    Wrapper de execução (connection.execute_wrapper) que conta consultas,
+    soma o tempo no banco e agrupa o SQL por forma.
+    """
+
+    def __init__(self):
+        self.consultas = 0
+        self.duracao = 0.0
+        self.formas = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duracao += time.perf_counter() - inicio
+            self.consultas += 1
+            self.formas[forma(sql)] += 1
+
+    def repetidas(self, limite=FORMAS_NO_LOG):
+        return [(sql, n) for sql, n in self.formas.most_common(limite) if n > 1]
+
+
+class InstrumentacaoSQLMiddleware:
+    """
+    Mede consultas SQL e tempo de banco de cada requisição e registra em
+    "core.desempenho" as requisições acima dos limites de
+    settings.INSTRUMENTACAO_LIMITE_CONSULTAS / INSTRUMENTACAO_LIMITE_MS.
+    Com settings.INSTRUMENTACAO_SERVER_TIMING, devolve também os números
+    no cabeçalho Server-Timing (visível no DevTools do navegador).
+
+    Com settings.INSTRUMENTACAO_SQL = False o Django retira o middleware
+    da cadeia na inicialização (MiddlewareNotUsed): custo zero.
+    Consultas feitas durante o envio de respostas em streaming não entram
+    na contagem, pois o cabeçalho já foi enviado.
+    """
+
+    def __init__(self, get_response):
+        if not settings.INSTRUMENTACAO_SQL:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.limite_consultas = settings.INSTRUMENTACAO_LIMITE_CONSULTAS
+        self.limite_ms = settings.INSTRUMENTACAO_LIMITE_MS
+        self.server_timing = settings.INSTRUMENTACAO_SERVER_TIMING
+
+    def __call__(self, request):
+        medidor = MedidorSQL()
+        inicio = time.perf_counter()
+        with ExitStack() as pilha:
+            for conexao in connections.all():
+                pilha.enter_context(conexao.execute_wrapper(medidor))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - inicio) * 1000
+        banco_ms = medidor.duracao * 1000
+
+        if self.server_timing:
+            response["Server-Timing"] = ", ".join(filter(None, [
+                response.get("Server-Timing"),
+                f'db;dur={banco_ms:.1f};desc="{medidor.consultas} consultas"',
+                f"total;dur={total_ms:.1f}",
+            ]))
+
+        if medidor.consultas > self.limite_consultas or total_ms > self.limite_ms:
+            self._registrar(request, response, medidor, total_ms, banco_ms)
+        return response
+
+    def _registrar(self, request, response, medidor, total_ms, banco_ms):
+        linhas = [
+            f"{request.method} {request.get_full_path()} -> {response.status_code}: "
+            f"{total_ms:.0f} ms, {medidor.consultas} consultas ({banco_ms:.0f} ms no banco)"
+        ]
+        linhas += [f"  {n}x {sql}" for sql, n in medidor.repetidas()]
+        logger.warning("\n".join(linhas))
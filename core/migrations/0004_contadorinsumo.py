@@ -0,0 +1,63 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Max, Sum
+
+
+def popular_contadores(apps, schema_editor):
+    Insumo = apps.get_model('core', 'Insumo')
+    SaidaInsumo = apps.get_model('core', 'SaidaInsumo')
+    FichaInsumo = apps.get_model('core', 'FichaInsumo')
+    ContadorInsumo = apps.get_model('core', 'ContadorInsumo')
+
+    # Mesmo cálculo de contadores.calcular_contadores, com os modelos deste
+    # ponto da história: totais e data da última movimentação por insumo
+    saidas = {
+        row['insumo']: row
+        for row in SaidaInsumo.objects.values('insumo').annotate(
+            principal=Sum('quantidade_principal'),
+            complementar=Sum('quantidade_complementar'),
+            ultima=Max('data'),
+        ).order_by()
+    }
+    fichas = {
+        row['insumo']: row
+        for row in FichaInsumo.objects.values('insumo').annotate(
+            total=Sum('quantidade_usada'),
+            ultima=Max('ficha__data_criacao'),
+        ).order_by()
+    }
+
+    contadores = []
+    for insumo_id in Insumo.objects.values_list('id', flat=True):
+        saida = saidas.get(insumo_id, {})
+        ficha = fichas.get(insumo_id, {})
+        datas = [d for d in (saida.get('ultima'), ficha.get('ultima')) if d]
+        contadores.append(ContadorInsumo(
+            insumo_id=insumo_id,
+            total_retirado=(saida.get('principal') or 0) + (saida.get('complementar') or 0),
+            total_usado=ficha.get('total') or 0,
+            ultima_movimentacao=max(datas) if datas else None,
+        ))
+    ContadorInsumo.objects.bulk_create(contadores)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_vistoriainsumo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorInsumo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_retirado', models.FloatField(default=0)),
+                ('total_usado', models.FloatField(default=0)),
+                ('ultima_movimentacao', models.DateTimeField(blank=True, null=True)),
+                ('insumo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='contador', to='core.insumo')),
+            ],
+        ),
+        migrations.RunPython(popular_contadores, migrations.RunPython.noop),
+    ]
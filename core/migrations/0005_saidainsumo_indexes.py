@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_contadorinsumo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='saidainsumo',
+            index=models.Index(fields=['-data', '-id'], name='saida_data_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='saidainsumo',
+            index=models.Index(fields=['insumo', '-data', '-id'], name='saida_insumo_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='saidainsumo',
+            index=models.Index(fields=['colaborador_retira', '-data', '-id'], name='saida_retira_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='saidainsumo',
+            index=models.Index(fields=['colaborador_entregando', '-data', '-id'], name='saida_entrega_data_idx'),
+        ),
+    ]
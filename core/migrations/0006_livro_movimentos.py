@@ -0,0 +1,103 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:57
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def popular_livro(apps, schema_editor):
+    # Mesma reconstrução do comando reconstruir_movimentos, com os modelos
+    # deste ponto da história (sem snapshots: o saldo sai do livro inteiro)
+    banco = schema_editor.connection.alias
+    Insumo = apps.get_model("core", "Insumo")
+    SaidaInsumo = apps.get_model("core", "SaidaInsumo")
+    FichaInsumo = apps.get_model("core", "FichaInsumo")
+    VistoriaInsumo = apps.get_model("core", "VistoriaInsumo")
+    MovimentoEstoque = apps.get_model("core", "MovimentoEstoque")
+    eventos = []
+
+    consumos = defaultdict(float)
+    datas_fichas = {}
+    for fi in FichaInsumo.objects.using(banco).values(
+            "ficha_id", "ficha__data_criacao", "insumo_id", "quantidade_usada").iterator():
+        consumos[(fi["ficha_id"], fi["insumo_id"])] += fi["quantidade_usada"]
+        datas_fichas[fi["ficha_id"]] = fi["ficha__data_criacao"]
+    for (ficha_id, insumo_id), quantidade in consumos.items():
+        eventos.append(MovimentoEstoque(
+            insumo_id=insumo_id, tipo="consumo", delta_em_uso=-quantidade,
+            data=datas_fichas[ficha_id], referencia=f"ficha:{ficha_id}"))
+
+    for saida in SaidaInsumo.objects.using(banco).values(
+            "id", "insumo_id", "data", "quantidade_principal", "quantidade_complementar").iterator():
+        quantidade = (saida["quantidade_principal"] or 0) + (saida["quantidade_complementar"] or 0)
+        eventos.append(MovimentoEstoque(
+            insumo_id=saida["insumo_id"], tipo="saida", delta_estoque=-quantidade,
+            delta_em_uso=quantidade, data=saida["data"], referencia=f"saida:{saida['id']}"))
+
+    for v in VistoriaInsumo.objects.using(banco).values(
+            "insumo_id", "data_vistoria", "desperdicio").iterator():
+        eventos.append(MovimentoEstoque(
+            insumo_id=v["insumo_id"], tipo="vistoria", delta_em_uso=-v["desperdicio"],
+            data=timezone.make_aware(datetime.combine(v["data_vistoria"], time(23, 59, 59))),
+            referencia="vistoria"))
+
+    # Entrada de abertura: o saldo final bate com quantidade_total
+    primeira_data = {}
+    soma_estoque = defaultdict(float)
+    for e in eventos:
+        soma_estoque[e.insumo_id] += e.delta_estoque
+        if e.insumo_id not in primeira_data or e.data < primeira_data[e.insumo_id]:
+            primeira_data[e.insumo_id] = e.data
+    agora = timezone.now()
+    for insumo_id, quantidade_total in Insumo.objects.using(banco).values_list(
+            "id", "quantidade_total"):
+        eventos.append(MovimentoEstoque(
+            insumo_id=insumo_id, tipo="entrada",
+            delta_estoque=quantidade_total - soma_estoque[insumo_id],
+            data=primeira_data.get(insumo_id, agora) - timedelta(seconds=1),
+            referencia="abertura"))
+
+    MovimentoEstoque.objects.using(banco).bulk_create(eventos, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_saidainsumo_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimentoEstoque',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('entrada', 'Entrada'), ('saida', 'Saída'), ('consumo', 'Consumo em ficha'), ('vistoria', 'Ajuste de vistoria'), ('devolucao', 'Devolução'), ('ajuste', 'Ajuste manual')], max_length=10)),
+                ('delta_estoque', models.FloatField(default=0)),
+                ('delta_em_uso', models.FloatField(default=0)),
+                ('data', models.DateTimeField(default=django.utils.timezone.now)),
+                ('referencia', models.CharField(blank=True, max_length=50)),
+                ('insumo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimentos', to='core.insumo')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['insumo', 'data'], name='movimento_insumo_data_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SnapshotEstoque',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateTimeField()),
+                ('estoque', models.FloatField(default=0)),
+                ('em_uso', models.FloatField(default=0)),
+                ('insumo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='core.insumo')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('insumo', 'data'), name='snapshot_insumo_data_unico')],
+            },
+        ),
+        migrations.RunPython(popular_livro, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:07
+
+import datetime
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def agrupar_vistorias(apps, schema_editor):
+    """Cria um cabeçalho por data para as linhas já gravadas."""
+    Vistoria = apps.get_model('core', 'Vistoria')
+    VistoriaInsumo = apps.get_model('core', 'VistoriaInsumo')
+
+    for row in VistoriaInsumo.objects.values('data_vistoria').annotate(
+        itens=Count('id'),
+        teorico=Sum('quantidade_teorica'),
+        real=Sum('quantidade_real'),
+        desperdicio=Sum('desperdicio'),
+    ).order_by('data_vistoria'):
+        vistoria = Vistoria.objects.create(
+            data=row['data_vistoria'],
+            total_itens=row['itens'],
+            total_teorico=row['teorico'] or 0,
+            total_real=row['real'] or 0,
+            total_desperdicio=row['desperdicio'] or 0,
+        )
+        VistoriaInsumo.objects.filter(
+            data_vistoria=row['data_vistoria']).update(vistoria=vistoria)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_livro_movimentos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Vistoria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(default=datetime.date.today)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('total_itens', models.PositiveIntegerField(default=0)),
+                ('total_teorico', models.FloatField(default=0)),
+                ('total_real', models.FloatField(default=0)),
+                ('total_desperdicio', models.FloatField(default=0)),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='vistoriainsumo',
+            name='vistoria',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='itens', to='core.vistoria'),
+        ),
+        migrations.AddIndex(
+            model_name='vistoria',
+            index=models.Index(fields=['-data', '-id'], name='vistoria_data_id_idx'),
+        ),
+        migrations.RunPython(agrupar_vistorias, migrations.RunPython.noop),
+    ]
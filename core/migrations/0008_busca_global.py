@@ -0,0 +1,130 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:10
+
+import unicodedata
+
+from django.db import OperationalError, migrations, models
+
+# DDL da busca neste ponto da história (o mesmo de core/busca.py): tabela
+# FTS5 de conteúdo externo sobre core_indicebusca, mantida por gatilhos
+SQL_CRIAR_FTS = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS core_busca_fts USING fts5(
+        titulo, texto,
+        content='core_indicebusca', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS core_busca_ai AFTER INSERT ON core_indicebusca BEGIN
+        INSERT INTO core_busca_fts(rowid, titulo, texto) VALUES (new.id, new.titulo, new.texto);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS core_busca_ad AFTER DELETE ON core_indicebusca BEGIN
+        INSERT INTO core_busca_fts(core_busca_fts, rowid, titulo, texto)
+        VALUES ('delete', old.id, old.titulo, old.texto);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS core_busca_au AFTER UPDATE ON core_indicebusca BEGIN
+        INSERT INTO core_busca_fts(core_busca_fts, rowid, titulo, texto)
+        VALUES ('delete', old.id, old.titulo, old.texto);
+        INSERT INTO core_busca_fts(rowid, titulo, texto) VALUES (new.id, new.titulo, new.texto);
+    END""",
+]
+
+SQL_REMOVER_FTS = [
+    "DROP TRIGGER IF EXISTS core_busca_ai",
+    "DROP TRIGGER IF EXISTS core_busca_ad",
+    "DROP TRIGGER IF EXISTS core_busca_au",
+    "DROP TABLE IF EXISTS core_busca_fts",
+]
+
+TAMANHO_LOTE = 2000
+
+
+def _normalizar(texto):
+    decomposto = unicodedata.normalize("NFKD", str(texto or ""))
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).lower()
+
+
+def _juntar(*partes):
+    return " ".join(str(p) for p in partes if p)
+
+
+def _documentos(apps, banco):
+    """(tipo, objeto_id, titulo, subtitulo, texto) de cada cadastro pesquisável."""
+    Colaborador = apps.get_model("core", "Colaborador")
+    Insumo = apps.get_model("core", "Insumo")
+    CatalogoProduto = apps.get_model("core", "CatalogoProduto")
+    FichaProducao = apps.get_model("core", "FichaProducao")
+
+    for c in Colaborador.objects.using(banco).iterator(chunk_size=TAMANHO_LOTE):
+        yield ("colaborador", c.pk, c.nome, _juntar(f"RC {c.rc}", c.funcao),
+               _juntar(c.nome, c.rc, c.funcao, c.CPF_RG, c.email, c.cidade))
+    for i in Insumo.objects.using(banco).iterator(chunk_size=TAMANHO_LOTE):
+        yield ("insumo", i.pk, i.nome, i.unidade_base, i.nome)
+    for p in CatalogoProduto.objects.using(banco).iterator(chunk_size=TAMANHO_LOTE):
+        yield ("catalogo", p.pk, p.nome, (p.descricao or "")[:120], _juntar(p.nome, p.descricao))
+    for f in (FichaProducao.objects.using(banco).select_related("produto__catalogo")
+              .iterator(chunk_size=TAMANHO_LOTE)):
+        catalogo = f.produto.catalogo if f.produto_id else None
+        produto = catalogo.nome if catalogo else ""
+        yield ("ficha", f.pk, _juntar(f"Ficha #{f.pk}", produto), f.categoria or "",
+               _juntar(produto, f.categoria, f.observacoes))
+
+
+def popular_indice(apps, schema_editor):
+    """Indexa os cadastros existentes e cria a tabela FTS5 (se houver)."""
+    banco = schema_editor.connection.alias
+    IndiceBusca = apps.get_model("core", "IndiceBusca")
+    lote = []
+    for tipo, objeto_id, titulo, subtitulo, texto in _documentos(apps, banco):
+        lote.append(IndiceBusca(
+            tipo=tipo, objeto_id=objeto_id, titulo=titulo[:255], subtitulo=subtitulo[:255],
+            texto=_normalizar(_juntar(titulo, texto))))
+        if len(lote) >= TAMANHO_LOTE:
+            IndiceBusca.objects.using(banco).bulk_create(lote)
+            lote = []
+    IndiceBusca.objects.using(banco).bulk_create(lote)
+
+    # FTS criado depois da carga (sem gatilhos durante o bulk_create) e
+    # preenchido de uma vez; SQLite sem FTS5 fica com a busca simples
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    try:
+        with connection.cursor() as cursor:
+            for sql in SQL_CRIAR_FTS:
+                cursor.execute(sql)
+            cursor.execute("INSERT INTO core_busca_fts(core_busca_fts) VALUES ('rebuild')")
+    except OperationalError:
+        return
+    connection.core_busca_fts = True  # cache de core.busca.fts_disponivel
+
+
+def remover_fts(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            for sql in SQL_REMOVER_FTS:
+                cursor.execute(sql)
+    connection.core_busca_fts = False
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_vistoria_lote'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndiceBusca',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('colaborador', 'Colaborador'), ('insumo', 'Insumo'), ('catalogo', 'Catálogo'), ('ficha', 'Ficha de produção')], max_length=20)),
+                ('objeto_id', models.PositiveBigIntegerField()),
+                ('titulo', models.CharField(max_length=255)),
+                ('subtitulo', models.CharField(blank=True, max_length=255)),
+                ('texto', models.TextField(blank=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('tipo', 'objeto_id'), name='indice_busca_objeto_unico')],
+            },
+        ),
+        migrations.RunPython(popular_indice, remover_fts),
+    ]
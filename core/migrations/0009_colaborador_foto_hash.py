@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_busca_global'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='colaborador',
+            name='foto_hash',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:26
+
+from datetime import date
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def marcar_vencidos(apps, schema_editor):
+    ProdutoPronto = apps.get_model("core", "ProdutoPronto")
+    ProdutoPronto.objects.filter(data_validade__lt=date.today()).update(vencido=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_colaborador_foto_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoValidade',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField()),
+                ('lotes_vencidos', models.PositiveIntegerField(default=0)),
+                ('quantidade_vencida', models.FloatField(default=0)),
+                ('lotes_hoje', models.PositiveIntegerField(default=0)),
+                ('quantidade_hoje', models.FloatField(default=0)),
+                ('lotes_semana', models.PositiveIntegerField(default=0)),
+                ('quantidade_semana', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='produtopronto',
+            name='vencido',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='produtopronto',
+            index=models.Index(fields=['data_validade'], name='produto_validade_idx'),
+        ),
+        migrations.AddField(
+            model_name='resumovalidade',
+            name='catalogo',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='resumos_validade', to='core.catalogoproduto'),
+        ),
+        migrations.AddConstraint(
+            model_name='resumovalidade',
+            constraint=models.UniqueConstraint(fields=('data', 'catalogo'), name='resumo_validade_data_catalogo_unico'),
+        ),
+        migrations.RunPython(marcar_vencidos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,133 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:29
+
+from bisect import bisect_right
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def separar_restante(apps, schema_editor):
+    """
+    Até aqui o consumo em fichas baixava as quantidades da própria saída,
+    que guardavam só o saldo. O saldo vai para `restante` e o consumido
+    volta para a saída (à mais recente do insumo antes da ficha, como em
+    reconstruir_movimentos), que passa a guardar o total retirado.
+    """
+    SaidaInsumo = apps.get_model("core", "SaidaInsumo")
+    FichaInsumo = apps.get_model("core", "FichaInsumo")
+    ContadorInsumo = apps.get_model("core", "ContadorInsumo")
+
+    SaidaInsumo.objects.update(
+        restante=models.F("quantidade_principal") + models.F("quantidade_complementar"))
+
+    lotes = defaultdict(list)
+    for saida_id, insumo_id, data in SaidaInsumo.objects.order_by(
+            "data", "id").values_list("id", "insumo_id", "data").iterator():
+        lotes[insumo_id].append((data, saida_id))
+    datas = {insumo_id: [d for d, _ in l] for insumo_id, l in lotes.items()}
+
+    acrescimos = defaultdict(float)
+    for insumo_id, data_ficha, quantidade in FichaInsumo.objects.values_list(
+            "insumo_id", "ficha__data_criacao", "quantidade_usada").iterator():
+        if insumo_id in lotes:
+            posicao = bisect_right(datas[insumo_id], data_ficha)
+            acrescimos[lotes[insumo_id][max(posicao - 1, 0)][1]] += quantidade
+
+    saidas = SaidaInsumo.objects.in_bulk(list(acrescimos))
+    por_insumo = defaultdict(float)
+    for saida_id, quantidade in acrescimos.items():
+        saidas[saida_id].quantidade_principal += quantidade
+        por_insumo[saidas[saida_id].insumo_id] += quantidade
+    SaidaInsumo.objects.bulk_update(saidas.values(), ["quantidade_principal"], batch_size=500)
+
+    # Os contadores somam as saídas: acompanham o total retirado
+    contadores = list(ContadorInsumo.objects.filter(insumo_id__in=list(por_insumo)))
+    for contador in contadores:
+        contador.total_retirado += por_insumo[contador.insumo_id]
+    ContadorInsumo.objects.bulk_update(contadores, ["total_retirado"], batch_size=500)
+
+    corrigir_livro(apps)
+
+
+def corrigir_livro(apps):
+    """
+    O livro de 0006 registrou as saídas com o saldo (total menos o já
+    consumido) e ainda lançou o consumo das fichas: o em_uso ficava
+    descontado duas vezes. Cada movimento de saída passa a valer o total
+    retirado restaurado acima; a diferença no estoque vai para a entrada
+    de abertura (o saldo final continua igual a quantidade_total) e os
+    snapshots já gravados são acertados pelas mesmas diferenças.
+    """
+    SaidaInsumo = apps.get_model("core", "SaidaInsumo")
+    MovimentoEstoque = apps.get_model("core", "MovimentoEstoque")
+    SnapshotEstoque = apps.get_model("core", "SnapshotEstoque")
+
+    totais = {
+        f"saida:{saida_id}": principal + complementar
+        for saida_id, principal, complementar in SaidaInsumo.objects.values_list(
+            "id", "quantidade_principal", "quantidade_complementar").iterator()
+    }
+    alterados = []
+    diferencas = defaultdict(list)
+    for movimento in MovimentoEstoque.objects.filter(tipo="saida").only(
+            "id", "insumo_id", "data", "referencia", "delta_estoque", "delta_em_uso").iterator():
+        total = totais.get(movimento.referencia)
+        # Saídas gravadas depois de 0006 já lançaram o total retirado
+        if total is None or total == -movimento.delta_estoque:
+            continue
+        diferenca = total + movimento.delta_estoque
+        movimento.delta_estoque = -total
+        movimento.delta_em_uso += diferenca
+        alterados.append(movimento)
+        diferencas[movimento.insumo_id].append((movimento.data, diferenca))
+    MovimentoEstoque.objects.bulk_update(
+        alterados, ["delta_estoque", "delta_em_uso"], batch_size=500)
+
+    aberturas = list(MovimentoEstoque.objects.filter(
+        referencia="abertura", insumo_id__in=list(diferencas)))
+    datas_abertura = {}
+    for abertura in aberturas:
+        abertura.delta_estoque += sum(d for _, d in diferencas[abertura.insumo_id])
+        datas_abertura[abertura.insumo_id] = abertura.data
+    MovimentoEstoque.objects.bulk_update(aberturas, ["delta_estoque"], batch_size=500)
+
+    # Depois da abertura, a diferença das saídas até a data do snapshot está
+    # em uso e a das posteriores ainda no estoque
+    acumulados = {}
+    for insumo_id, lista in diferencas.items():
+        lista.sort()
+        soma, parciais = 0, []
+        for _, diferenca in lista:
+            soma += diferenca
+            parciais.append(soma)
+        acumulados[insumo_id] = ([data for data, _ in lista], parciais)
+    snapshots = []
+    for snapshot in SnapshotEstoque.objects.filter(insumo_id__in=list(diferencas)).iterator():
+        datas, parciais = acumulados[snapshot.insumo_id]
+        posicao = bisect_right(datas, snapshot.data)
+        ate = parciais[posicao - 1] if posicao else 0
+        abertura = datas_abertura.get(snapshot.insumo_id)
+        snapshot.em_uso += ate
+        snapshot.estoque += (parciais[-1] if abertura and abertura <= snapshot.data else 0) - ate
+        snapshots.append(snapshot)
+    SnapshotEstoque.objects.bulk_update(snapshots, ["estoque", "em_uso"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_validade_produtos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='saidainsumo',
+            name='restante',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(separar_restante, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='saidainsumo',
+            index=models.Index(condition=models.Q(('restante__gt', 0)), fields=['insumo', 'data', 'id'], name='saida_aberta_idx'),
+        ),
+    ]
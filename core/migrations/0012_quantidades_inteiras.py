@@ -0,0 +1,144 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:33
+
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Round
+
+# Milésimos da unidade base (core.unidades.ESCALA, fixado aqui)
+ESCALA = 1000
+
+CAMPOS = {
+    "Insumo": ["quantidade_total"],
+    "SaidaInsumo": ["quantidade_principal", "quantidade_complementar", "restante"],
+    "FichaInsumo": ["quantidade_usada"],
+    "Vistoria": ["total_teorico", "total_real", "total_desperdicio"],
+    "VistoriaInsumo": [
+        "quantidade_retirada", "quantidade_usada", "quantidade_teorica",
+        "quantidade_real", "desperdicio",
+    ],
+    "ContadorInsumo": ["total_retirado", "total_usado"],
+    "MovimentoEstoque": ["delta_estoque", "delta_em_uso"],
+    "SnapshotEstoque": ["estoque", "em_uso"],
+}
+
+
+def para_milesimos(apps, schema_editor):
+    """
+    Unidade base (float) -> milésimos arredondados, ainda na coluna real:
+    a troca de tipo logo depois só copia valores inteiros.
+    """
+    for modelo, campos in CAMPOS.items():
+        apps.get_model("core", modelo).objects.update(
+            **{campo: Round(F(campo) * ESCALA) for campo in campos})
+
+
+def para_unidade_base(apps, schema_editor):
+    for modelo, campos in CAMPOS.items():
+        apps.get_model("core", modelo).objects.update(
+            **{campo: F(campo) / float(ESCALA) for campo in campos})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_lotes_saidas'),
+    ]
+
+    operations = [
+        migrations.RunPython(para_milesimos, para_unidade_base),
+        migrations.AlterField(
+            model_name='contadorinsumo',
+            name='total_retirado',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='contadorinsumo',
+            name='total_usado',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='fichainsumo',
+            name='quantidade_usada',
+            field=models.BigIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name='insumo',
+            name='quantidade_total',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='movimentoestoque',
+            name='delta_em_uso',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='movimentoestoque',
+            name='delta_estoque',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='saidainsumo',
+            name='quantidade_complementar',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='saidainsumo',
+            name='quantidade_principal',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='saidainsumo',
+            name='restante',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='snapshotestoque',
+            name='em_uso',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='snapshotestoque',
+            name='estoque',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='vistoria',
+            name='total_desperdicio',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='vistoria',
+            name='total_real',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='vistoria',
+            name='total_teorico',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='vistoriainsumo',
+            name='desperdicio',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='vistoriainsumo',
+            name='quantidade_real',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='vistoriainsumo',
+            name='quantidade_retirada',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='vistoriainsumo',
+            name='quantidade_teorica',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='vistoriainsumo',
+            name='quantidade_usada',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:37
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def popular_consumo(apps, schema_editor):
+    # Totais por insumo e dia das movimentações existentes, com os modelos
+    # deste ponto da história (mesma regra de core/consumo.calcular)
+    banco = schema_editor.connection.alias
+    SaidaInsumo = apps.get_model("core", "SaidaInsumo")
+    FichaInsumo = apps.get_model("core", "FichaInsumo")
+    VistoriaInsumo = apps.get_model("core", "VistoriaInsumo")
+    ConsumoDiario = apps.get_model("core", "ConsumoDiario")
+
+    totais = defaultdict(lambda: [0, 0, 0, 0])
+    for row in (SaidaInsumo.objects.using(banco).annotate(dia=TruncDate("data"))
+                .values("insumo", "dia").annotate(
+                    principal=Sum("quantidade_principal"),
+                    complementar=Sum("quantidade_complementar"),
+                    total=Count("id")).order_by()):
+        linha = totais[(row["insumo"], row["dia"])]
+        linha[0] += (row["principal"] or 0) + (row["complementar"] or 0)
+        linha[3] += row["total"]
+    for row in (FichaInsumo.objects.using(banco).annotate(dia=F("ficha__data_fabricacao"))
+                .values("insumo", "dia").annotate(
+                    usado=Sum("quantidade_usada"), total=Count("id")).order_by()):
+        linha = totais[(row["insumo"], row["dia"])]
+        linha[1] += row["usado"] or 0
+        linha[3] += row["total"]
+    for row in (VistoriaInsumo.objects.using(banco).annotate(dia=F("data_vistoria"))
+                .values("insumo", "dia").annotate(
+                    desperdicio=Sum("desperdicio"), total=Count("id")).order_by()):
+        linha = totais[(row["insumo"], row["dia"])]
+        linha[2] += row["desperdicio"] or 0
+        linha[3] += row["total"]
+
+    ConsumoDiario.objects.using(banco).bulk_create(
+        (ConsumoDiario(insumo_id=insumo_id, data=data, retirado=retirado, usado=usado,
+                       desperdicio=desperdicio, movimentacoes=movimentacoes)
+         for (insumo_id, data), (retirado, usado, desperdicio, movimentacoes) in totais.items()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_quantidades_inteiras'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsumoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField()),
+                ('retirado', models.BigIntegerField(default=0)),
+                ('usado', models.BigIntegerField(default=0)),
+                ('desperdicio', models.BigIntegerField(default=0)),
+                ('movimentacoes', models.IntegerField(default=0)),
+                ('insumo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='consumo_diario', to='core.insumo')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['data'], name='consumo_data_idx')],
+                'constraints': [models.UniqueConstraint(fields=('insumo', 'data'), name='consumo_insumo_data_unico')],
+            },
+        ),
+        migrations.RunPython(popular_consumo, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_consumo_diario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrevisaoInsumo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField()),
+                ('estoque', models.BigIntegerField(default=0)),
+                ('media_diaria', models.BigIntegerField(default=0)),
+                ('demanda_prazo', models.BigIntegerField(default=0)),
+                ('estoque_seguranca', models.BigIntegerField(default=0)),
+                ('ponto_pedido', models.BigIntegerField(default=0)),
+                ('nivel_maximo', models.BigIntegerField(default=0)),
+                ('dias_cobertura', models.PositiveIntegerField(blank=True, null=True)),
+                ('insumo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='previsao', to='core.insumo')),
+            ],
+        ),
+    ]
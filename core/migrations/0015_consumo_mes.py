@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:05
+
+from django.db import migrations, models
+
+
+def preencher_mes(apps, schema_editor):
+    # Uma faixa de datas por mês (a truncagem por linha fica só nesta carga)
+    ConsumoDiario = apps.get_model("core", "ConsumoDiario")
+    consumo = ConsumoDiario.objects.using(schema_editor.connection.alias)
+    for mes in consumo.dates("data", "month"):
+        seguinte = mes.replace(year=mes.year + 1, month=1) if mes.month == 12 \
+            else mes.replace(month=mes.month + 1)
+        consumo.filter(data__gte=mes, data__lt=seguinte).update(mes=mes)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_previsao_insumo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consumodiario',
+            name='mes',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(preencher_mes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='consumodiario',
+            name='mes',
+            field=models.DateField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='consumodiario',
+            index=models.Index(fields=['mes', 'insumo'], name='consumo_mes_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_consumo_mes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='vistoria',
+            name='data',
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+    ]
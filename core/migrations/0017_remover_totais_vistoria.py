@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:20
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_vistoria_data_localdate'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='vistoria',
+            name='total_desperdicio',
+        ),
+        migrations.RemoveField(
+            model_name='vistoria',
+            name='total_real',
+        ),
+        migrations.RemoveField(
+            model_name='vistoria',
+            name='total_teorico',
+        ),
+    ]
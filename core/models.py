@@ -1,5 +1,9 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+
+from . import unidades
 
 # ------------------ PRODUTO ------------------
 
@@ -38,6 +42,13 @@ class ProdutoPronto(models.Model):
     data_fabricacao = models.DateField()
     data_validade = models.DateField()
     peso_produto = models.FloatField(default=0)
+    # Marcado em lote pelo comando resumo_validade (ver core/validade.py)
+    vencido = models.BooleanField(default=False, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['data_validade'], name='produto_validade_idx'),
+        ]
 
     def __str__(self):
         return f"{self.catalogo.nome if self.catalogo else 'Sem catálogo'} - {self.quantidade} unidades"
@@ -54,6 +65,8 @@ class Colaborador(models.Model):
     funcao = models.CharField(max_length=50)
     CPF_RG = models.CharField(max_length=20, unique=True)
     foto = models.ImageField(upload_to="colaboradores/", blank=True, null=True)
+    # Hash do conteúdo da foto; nomeia o original e as variantes (core/fotos.py)
+    foto_hash = models.CharField(max_length=32, blank=True, editable=False)
     email = models.EmailField(max_length=100, blank=True, null=True)
     celular = models.CharField(max_length=20, blank=True, null=True)
     cep = models.CharField(max_length=10, blank=True, null=True)
@@ -69,6 +82,21 @@ class Colaborador(models.Model):
     def __str__(self):
         return self.nome
 
+    def _foto_url(self, variante):
+        if not self.foto:
+            return ""
+        if not self.foto_hash:
+            return self.foto.url  # ainda não processada (ver processar_fotos)
+        return reverse("foto_colaborador", args=[f"{self.foto_hash}_{variante}.jpg"])
+
+    @property
+    def foto_miniatura_url(self):
+        return self._foto_url("miniatura")
+
+    @property
+    def foto_detalhe_url(self):
+        return self._foto_url("detalhe")
+
 
 # ------------------ INSUMO ------------------
 class Insumo(models.Model):
@@ -79,7 +107,9 @@ class Insumo(models.Model):
     ]
 
     nome = models.CharField(max_length=100)
-    quantidade_total = models.FloatField(default=0)  # sempre em g/ml/un
+    # Quantidades de insumo (aqui e nos demais modelos) são inteiros em
+    # milésimos da unidade base: mg, µl ou milésimo de un (core/unidades.py)
+    quantidade_total = models.BigIntegerField(default=0)
     unidade_base = models.CharField(
         max_length=10, choices=UNIDADES, default="un")
 
@@ -88,17 +118,7 @@ class Insumo(models.Model):
 
     @property
     def formatar_quantidade(self):
-        q = self.quantidade_total
-        if self.unidade_base == "g":
-            kg = int(q // 1000)
-            g = q % 1000
-            return f"{kg} kg {int(g)} g" if kg else f"{int(g)} g"
-        elif self.unidade_base == "ml":
-            l = int(q // 1000)
-            ml = q % 1000
-            return f"{l} L {int(ml)} ml" if l else f"{int(ml)} ml"
-        else:
-            return f"{int(q)} un"
+        return unidades.formatar(self.quantidade_total, self.unidade_base)
 
 
 # ------------------ SAÍDA DE INSUMO ------------------
@@ -113,36 +133,38 @@ class SaidaInsumo(models.Model):
         Colaborador, on_delete=models.CASCADE, related_name='entregas')
     colaborador_retira = models.ForeignKey(
         Colaborador, on_delete=models.CASCADE, related_name='retiradas')
-    quantidade_principal = models.FloatField(default=0)  # ex: quilos, litros
-    quantidade_complementar = models.FloatField(default=0)  # ex: gramas, ml
+    quantidade_principal = models.BigIntegerField(default=0)
+    quantidade_complementar = models.BigIntegerField(default=0)
     unidade = models.CharField(max_length=5, choices=UNIDADES, default="un")
     data = models.DateTimeField(auto_now_add=True)
-
-    def total_em_unidade_base(self):
-        """Converte principal + complementar para unidade base do insumo"""
-        total = self.quantidade_principal
-        if self.unidade in ['g', 'ml', 'un']:
-            total += self.quantidade_complementar
-        return total
+    # Saldo do lote ainda não consumido em fichas. As quantidades acima
+    # guardam o que foi retirado; o consumo só baixa este campo, pelo
+    # alocador em core/lotes.py
+    restante = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Parcial: só os lotes abertos, na ordem de consumo (mais antigos primeiro)
+            models.Index(fields=['insumo', 'data', 'id'], name='saida_aberta_idx',
+                         condition=models.Q(restante__gt=0)),
+            models.Index(fields=['-data', '-id'], name='saida_data_id_idx'),
+            models.Index(fields=['insumo', '-data', '-id'],
+                         name='saida_insumo_data_idx'),
+            models.Index(fields=['colaborador_retira', '-data', '-id'],
+                         name='saida_retira_data_idx'),
+            models.Index(fields=['colaborador_entregando', '-data', '-id'],
+                         name='saida_entrega_data_idx'),
+        ]
 
     @property
     def quantidade_total(self):
-        """Retorna a quantidade total em unidade base (principal + complementar)"""
-        if self.unidade in ['g', 'ml']:
-            return self.quantidade_principal * 1000 + self.quantidade_complementar
-        else:
-            return self.quantidade_principal + self.quantidade_complementar
+        """Quantidade retirada (principal + complementar), em milésimos da unidade base"""
+        return self.quantidade_principal + self.quantidade_complementar
 
     @property
     def exibir_quantidade(self):
         """Retorna a quantidade formatada para exibição"""
-        total = self.quantidade_total
-        if self.unidade == 'g':
-            return f"{int(total/1000)} kg" if total >= 1000 else f"{int(total)} g"
-        elif self.unidade == 'ml':
-            return f"{int(total/1000)} L" if total >= 1000 else f"{int(total)} ml"
-        else:
-            return f"{int(total)} un"
+        return unidades.formatar(self.quantidade_total, self.unidade)
 
     def __str__(self):
         return f"{self.exibir_quantidade} de {self.insumo.nome}"
@@ -180,42 +202,237 @@ class FichaInsumo(models.Model):
     ficha = models.ForeignKey(
         FichaProducao, on_delete=models.CASCADE, related_name='ficha_insumos')
     insumo = models.ForeignKey(Insumo, on_delete=models.CASCADE)
-    quantidade_usada = models.FloatField()
+    quantidade_usada = models.BigIntegerField()
     unidade = models.CharField(
         max_length=10, choices=Insumo._meta.get_field('unidade_base').choices)
 
     def __str__(self):
-        return f"{self.insumo.nome} - {self.quantidade_usada}{self.unidade}"
+        return f"{self.insumo.nome} - {self.formatar_quantidade(self.quantidade_usada, self.unidade)}"
 
     @staticmethod
     def formatar_quantidade(qtd, unidade):
-        if unidade == 'ml':
-            litros = int(qtd // 1000)
-            ml = int(qtd % 1000)
-            if litros > 0:
-                return f"{litros} L + {ml} ml" if ml else f"{litros} L"
-            else:
-                return f"{ml} ml"
-        elif unidade == 'g':
-            kg = int(qtd // 1000)
-            g = int(qtd % 1000)
-            if kg > 0:
-                return f"{kg} kg + {g} g" if g else f"{kg} kg"
-            else:
-                return f"{g} g"
-        else:
-            return f"{qtd} {unidade}"
+        return unidades.formatar(qtd, unidade)
+
+
+# ------------------ VISTORIA (CHECKLIST) ------------------
+class Vistoria(models.Model):
+    """
+    Cabeçalho de um checklist: agrupa as linhas. O desperdício só se soma
+    por unidade base (relatorios.desperdicio_por_unidade).
+    """
+    data = models.DateField(default=timezone.localdate)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    usuario = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True)
+    total_itens = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-data', '-id'], name='vistoria_data_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"Checklist {self.id} ({self.data:%d/%m/%Y})"
 
 
 class VistoriaInsumo(models.Model):
+    vistoria = models.ForeignKey(
+        Vistoria, on_delete=models.CASCADE, related_name='itens', null=True)
     insumo = models.ForeignKey(Insumo, on_delete=models.CASCADE)
-    quantidade_retirada = models.FloatField(default=0)
-    quantidade_usada = models.FloatField(default=0)
-    quantidade_teorica = models.FloatField(default=0)
-    quantidade_real = models.FloatField(default=0)
-    desperdicio = models.FloatField(default=0)
-    data_vistoria = models.DateField(auto_now_add=True)
+    quantidade_retirada = models.BigIntegerField(default=0)
+    quantidade_usada = models.BigIntegerField(default=0)
+    quantidade_teorica = models.BigIntegerField(default=0)
+    quantidade_real = models.BigIntegerField(default=0)
+    desperdicio = models.BigIntegerField(default=0)
     data_vistoria = models.DateField(auto_now_add=True)
 
     def __str__(self):
         return f"Vistoria - {self.insumo.nome} ({self.data_vistoria})"
+
+
+# ------------------ CONTADORES DE INSUMO ------------------
+class ContadorInsumo(models.Model):
+    """
+    Totais materializados por insumo, atualizados a cada movimentação
+    (saída registrada/excluída e consumo em ficha). Espelham as somas de
+    SaidaInsumo e FichaInsumo e podem ser reconstruídos com o comando
+    `recalcular_contadores`.
+    """
+    insumo = models.OneToOneField(
+        Insumo, on_delete=models.CASCADE, related_name='contador')
+    total_retirado = models.BigIntegerField(default=0)
+    total_usado = models.BigIntegerField(default=0)
+    ultima_movimentacao = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Contador - {self.insumo.nome}"
+
+
+# ------------------ CONSUMO DIÁRIO ------------------
+class ConsumoDiario(models.Model):
+    """
+    Totais por insumo e dia (retirado, usado em fichas e desperdício das
+    vistorias), atualizados a cada movimentação por core/consumo.py. As
+    tendências e os gráficos de insumos leem só daqui; o comando
+    `reconstruir_consumo` regrava a tabela a partir das movimentações.
+    """
+    insumo = models.ForeignKey(
+        Insumo, on_delete=models.CASCADE, related_name='consumo_diario')
+    data = models.DateField()
+    # Primeiro dia do mês de `data`: as séries mensais agrupam por ele sem
+    # aplicar função de data a cada linha
+    mes = models.DateField(editable=False)
+    retirado = models.BigIntegerField(default=0)
+    usado = models.BigIntegerField(default=0)
+    desperdicio = models.BigIntegerField(default=0)
+    movimentacoes = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['insumo', 'data'], name='consumo_insumo_data_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['data'], name='consumo_data_idx'),
+            # Faixa de meses já na ordem do agrupamento (mes, insumo) das séries
+            models.Index(fields=['mes', 'insumo'], name='consumo_mes_idx'),
+        ]
+
+    def __str__(self):
+        return f"Consumo - {self.insumo.nome} ({self.data:%d/%m/%Y})"
+
+
+# ------------------ PREVISÃO DE CONSUMO ------------------
+class PrevisaoInsumo(models.Model):
+    """
+    Previsão de retirada e ponto de pedido por insumo, gravada pelo
+    comando `prever_consumo` (core/previsao.py) a partir do consumo
+    diário. A página "À comprar" compara o estoque atual com ponto_pedido.
+    """
+    insumo = models.OneToOneField(
+        Insumo, on_delete=models.CASCADE, related_name='previsao')
+    data = models.DateField()
+    estoque = models.BigIntegerField(default=0)
+    media_diaria = models.BigIntegerField(default=0)
+    demanda_prazo = models.BigIntegerField(default=0)
+    estoque_seguranca = models.BigIntegerField(default=0)
+    ponto_pedido = models.BigIntegerField(default=0)
+    nivel_maximo = models.BigIntegerField(default=0)
+    # Dias que o estoque cobre pela previsão; nulo sem consumo previsto
+    dias_cobertura = models.PositiveIntegerField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Previsão - {self.insumo.nome} ({self.data:%d/%m/%Y})"
+
+
+# ------------------ LIVRO DE MOVIMENTAÇÕES ------------------
+class MovimentoEstoque(models.Model):
+    """
+    Registro imutável (append-only) de cada movimentação de um insumo.
+    Guarda dois saldos: o estoque (Insumo.quantidade_total) e o que está
+    "em uso" na produção (retirado e ainda não consumido nas fichas).
+    """
+    TIPOS = [
+        ("entrada", "Entrada"),
+        ("saida", "Saída"),
+        ("consumo", "Consumo em ficha"),
+        ("vistoria", "Ajuste de vistoria"),
+        ("devolucao", "Devolução"),
+        ("ajuste", "Ajuste manual"),
+    ]
+
+    insumo = models.ForeignKey(
+        Insumo, on_delete=models.CASCADE, related_name='movimentos')
+    tipo = models.CharField(max_length=10, choices=TIPOS)
+    delta_estoque = models.BigIntegerField(default=0)
+    delta_em_uso = models.BigIntegerField(default=0)
+    data = models.DateTimeField(default=timezone.now)
+    referencia = models.CharField(max_length=50, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['insumo', 'data'],
+                         name='movimento_insumo_data_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} - {self.insumo.nome} ({self.data:%d/%m/%Y})"
+
+
+class SnapshotEstoque(models.Model):
+    """
+    Saldos de um insumo em um instante, gerados periodicamente pelo comando
+    `snapshot_estoque`. O saldo em uma data é o snapshot anterior mais
+    próximo somado às movimentações entre ele e a data.
+    """
+    insumo = models.ForeignKey(
+        Insumo, on_delete=models.CASCADE, related_name='snapshots')
+    data = models.DateTimeField()
+    estoque = models.BigIntegerField(default=0)
+    em_uso = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['insumo', 'data'], name='snapshot_insumo_data_unico'),
+        ]
+
+    def __str__(self):
+        return f"Snapshot - {self.insumo.nome} ({self.data:%d/%m/%Y})"
+
+
+class ResumoValidade(models.Model):
+    """
+    Resumo diário de validade por item do catálogo, gerado pelo comando
+    `resumo_validade`: lotes com estoque vencidos, vencendo hoje e nos
+    próximos dias. A página inicial lê o resumo mais recente.
+    """
+    data = models.DateField()
+    catalogo = models.ForeignKey(
+        CatalogoProduto, on_delete=models.CASCADE, null=True, blank=True,
+        related_name='resumos_validade')
+    lotes_vencidos = models.PositiveIntegerField(default=0)
+    quantidade_vencida = models.FloatField(default=0)
+    lotes_hoje = models.PositiveIntegerField(default=0)
+    quantidade_hoje = models.FloatField(default=0)
+    lotes_semana = models.PositiveIntegerField(default=0)
+    quantidade_semana = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['data', 'catalogo'], name='resumo_validade_data_catalogo_unico'),
+        ]
+
+    def __str__(self):
+        return f"Resumo de validade - {self.catalogo or 'Sem catálogo'} ({self.data:%d/%m/%Y})"
+
+
+# ------------------ BUSCA GLOBAL ------------------
+class IndiceBusca(models.Model):
+    """
+    Uma entrada por cadastro pesquisável (ver core/busca.py). O texto é
+    guardado sem acentos; no SQLite a tabela FTS5 core_busca_fts indexa
+    estas linhas e é mantida por gatilhos.
+    """
+    TIPOS = [
+        ('colaborador', 'Colaborador'),
+        ('insumo', 'Insumo'),
+        ('catalogo', 'Catálogo'),
+        ('ficha', 'Ficha de produção'),
+    ]
+
+    tipo = models.CharField(max_length=20, choices=TIPOS)
+    objeto_id = models.PositiveBigIntegerField()
+    titulo = models.CharField(max_length=255)
+    subtitulo = models.CharField(max_length=255, blank=True)
+    texto = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tipo', 'objeto_id'], name='indice_busca_objeto_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} - {self.titulo}"
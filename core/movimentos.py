@@ -0,0 +1,82 @@
+# core/movimentos.py
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import DateTimeField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Insumo, MovimentoEstoque, SnapshotEstoque
+
+# Anterior a qualquer movimentação: limite inferior da faixa sem snapshot
+INICIO_LIVRO = datetime(1, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def registrar(insumo_id, tipo, estoque=0, em_uso=0, referencia=""):
+    """Acrescenta uma movimentação ao livro. Chamar dentro da transação da operação."""
+    MovimentoEstoque.objects.create(
+        insumo_id=insumo_id,
+        tipo=tipo,
+        delta_estoque=estoque,
+        delta_em_uso=em_uso,
+        referencia=referencia,
+    )
+
+
+def registrar_varios(movimentos):
+    """Acrescenta várias movimentações (instâncias não salvas) com um bulk_create."""
+    MovimentoEstoque.objects.bulk_create(movimentos)
+
+
+def saldos_em(data, insumos=None):
+    """
+    Saldos (estoque, em_uso) de cada insumo no instante `data`.
+
+    Para cada insumo busca só o snapshot mais recente anterior a `data`
+    (um acesso ao índice insumo+data) e soma apenas as movimentações
+    entre ele e `data` (faixa do índice movimento_insumo_data_idx), sem
+    reprocessar todo o histórico. Tudo em uma consulta.
+    Retorna {insumo_id: (estoque, em_uso)}.
+    """
+    anteriores = SnapshotEstoque.objects.filter(
+        insumo=OuterRef('pk'), data__lte=data
+    ).order_by('-data')
+
+    def do_snapshot(campo):
+        return Coalesce(Subquery(anteriores.values(campo)[:1]), 0)
+
+    def movimentado(campo):
+        return Coalesce(Subquery(
+            MovimentoEstoque.objects.filter(
+                insumo=OuterRef('pk'), data__gt=OuterRef('corte'), data__lte=data,
+            ).values('insumo').annotate(total=Sum(campo)).values('total')
+        ), 0)
+
+    consulta = Insumo.objects.annotate(
+        # Sem snapshot anterior, a faixa começa no início do livro
+        corte=Coalesce(Subquery(anteriores.values('data')[:1]),
+                       Value(INICIO_LIVRO, output_field=DateTimeField())),
+    ).annotate(
+        estoque=do_snapshot('estoque') + movimentado('delta_estoque'),
+        em_uso=do_snapshot('em_uso') + movimentado('delta_em_uso'),
+    )
+    if insumos is not None:
+        consulta = consulta.filter(pk__in=insumos)
+    return {
+        insumo_id: (estoque, em_uso)
+        for insumo_id, estoque, em_uso in consulta.values_list('id', 'estoque', 'em_uso')
+    }
+
+
+def gerar_snapshots(data=None):
+    """Grava um snapshot de todos os insumos no instante `data` (padrão: agora)."""
+    data = data or timezone.now()
+    saldos = saldos_em(data)
+    SnapshotEstoque.objects.bulk_create(
+        [
+            SnapshotEstoque(insumo_id=insumo_id, data=data,
+                            estoque=estoque, em_uso=em_uso)
+            for insumo_id, (estoque, em_uso) in saldos.items()
+        ],
+        ignore_conflicts=True,
+    )
+    return len(saldos)
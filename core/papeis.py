@@ -0,0 +1,87 @@
+# core/papeis.py
+from django.conf import settings
+from django.core.cache import cache
+
+# Nome da variável de template -> grupo correspondente. is_admin fica de
+# fora: é só para superusuários (ver papeis)
+PAPEIS = {
+    "is_rh": "RH",
+    "is_insumo": "Insumos",
+    "is_confeitaria": "Confeitaria",
+}
+
+# Ordem usada para decidir a página inicial após o login
+PAGINA_INICIAL = [
+    ("Administrador", "home"),
+    ("RH", "colaboradores_list"),
+    ("Insumos", "insumos_list"),
+    ("Confeitaria", "produtos_list"),
+]
+
+
+def _chave_cache(user_id):
+    return f"core:grupos:{user_id}"
+
+
+def grupos_do_usuario(user):
+    """
+    Retorna o conjunto de nomes de grupo do usuário.
+    Consulta o banco no máximo uma vez por requisição (guarda o resultado
+    no próprio objeto user) e, se GRUPOS_CACHE_TIMEOUT > 0, também no cache
+    entre requisições. O cache é invalidado pelos sinais em core/signals.py.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+
+    grupos = getattr(user, "_grupos_nomes", None)
+    if grupos is not None:
+        return grupos
+
+    timeout = getattr(settings, "GRUPOS_CACHE_TIMEOUT", 300)
+    grupos = cache.get(_chave_cache(user.pk)) if timeout else None
+    if grupos is None:
+        grupos = frozenset(user.groups.values_list("name", flat=True))
+        if timeout:
+            cache.set(_chave_cache(user.pk), grupos, timeout)
+
+    user._grupos_nomes = grupos
+    return grupos
+
+
+def invalidar_grupos(*user_ids):
+    """Remove do cache os grupos dos usuários informados."""
+    cache.delete_many([_chave_cache(user_id) for user_id in user_ids])
+
+
+def pertence(user, grupos):
+    """
+    Verifica se o usuário pertence a algum dos grupos.
+    Aceita string (um grupo) ou lista/tupla. Superusuários sempre passam.
+    """
+    if not user.is_authenticated:
+        return False
+    if user.is_superuser:
+        return True
+    if isinstance(grupos, str):
+        grupos = [grupos]
+    return not grupos_do_usuario(user).isdisjoint(grupos)
+
+
+def papeis(user):
+    """
+    Dicionário is_admin/is_rh/is_insumo/is_confeitaria para os templates.
+    is_admin (links de gestão de usuários) continua valendo só para
+    superusuários; o grupo Administrador não o liga.
+    """
+    return {
+        "is_admin": user.is_superuser,
+        **{var: pertence(user, grupo) for var, grupo in PAPEIS.items()},
+    }
+
+
+def pagina_inicial(user):
+    """Nome da URL para onde o usuário vai após o login, ou None se não tiver grupo."""
+    for grupo, url in PAGINA_INICIAL:
+        if pertence(user, grupo):
+            return url
+    return None
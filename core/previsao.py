@@ -0,0 +1,134 @@
+# core/previsao.py
+# Previsão de retirada por insumo, ponto de pedido e dias de cobertura.
+# Carrega o consumo diário de todos os insumos de uma vez em uma matriz
+# NumPy (insumo x dia) e calcula tudo em operações vetorizadas, sem laço
+# por insumo; o resultado fica em PrevisaoInsumo para a página "À comprar".
+from datetime import date, timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ConsumoDiario, Insumo, PrevisaoInsumo
+
+HISTORICO_SEMANAS = 104  # semanas inteiras de histórico (fatores por dia da semana)
+JANELA_MEDIA = 28        # dias da média móvel (múltiplo de 7)
+HORIZONTE_DIAS = 120     # limite dos dias de cobertura
+PRAZO_ENTREGA = 7        # dias entre o pedido e a chegada
+CICLO_DIAS = 14          # dias cobertos por cada pedido
+FATOR_SEGURANCA = 1.65   # ~95% de nível de serviço
+TAMANHO_LOTE = 1000
+
+
+def historico(hoje=None, semanas=HISTORICO_SEMANAS):
+    """
+    Retirada diária dos insumos nas `semanas` que terminam ontem, com uma
+    consulta ao consumo diário. Retorna (ids, estoque, matriz), com a
+    matriz insumo x dia em milésimos e o dia mais antigo na coluna 0.
+    """
+    hoje = hoje or timezone.localdate()
+    dias = semanas * 7
+    inicio = hoje - timedelta(days=dias)
+
+    insumos = list(Insumo.objects.order_by("id").values_list("id", "quantidade_total"))
+    ids = np.array([pk for pk, _ in insumos], dtype=np.int64)
+    estoque = np.array([total for _, total in insumos], dtype=np.float64).clip(min=0)
+    matriz = np.zeros((len(ids), dias), dtype=np.float64)
+
+    linhas = list(ConsumoDiario.objects.filter(data__gte=inicio, data__lt=hoje)
+                  .values_list("insumo_id", "data", "retirado"))
+    if linhas:
+        insumo_ids, datas, retirados = zip(*linhas)
+        # Dia -> coluna pelo ordinal (bem mais rápido que converter para datetime64)
+        colunas = np.fromiter(map(date.toordinal, datas), dtype=np.int64,
+                              count=len(datas)) - inicio.toordinal()
+        # (insumo, data) é único em ConsumoDiario: atribuição direta, sem somar
+        matriz[np.searchsorted(ids, insumo_ids), colunas] = retirados
+    return ids, estoque, matriz.clip(min=0)
+
+
+def calcular(estoque, matriz, prazo=PRAZO_ENTREGA, ciclo=CICLO_DIAS):
+    """
+    Previsão sazonal por dia da semana sobre a matriz de historico(), em
+    uma passada vetorizada. A média dos últimos JANELA_MEDIA dias dá o
+    nível; o histórico inteiro dá o peso de cada dia da semana. Retorna
+    um dicionário de vetores (um valor por insumo), em milésimos, e a
+    máscara com_consumo (insumos com retirada na janela da média).
+    """
+    quantidade, dias = matriz.shape
+    # Com o histórico em semanas inteiras, a coluna j e o dia futuro k
+    # caem na mesma posição da semana quando j % 7 == k % 7
+    por_dia_semana = matriz.reshape(quantidade, -1, 7).mean(axis=1)
+    media_geral = por_dia_semana.mean(axis=1, keepdims=True)
+    fatores = np.divide(por_dia_semana, media_geral,
+                        out=np.ones_like(por_dia_semana), where=media_geral > 0)
+
+    recente = matriz[:, -JANELA_MEDIA:]
+    media = recente.mean(axis=1)
+    ajuste = media[:, None] * fatores[:, np.arange(dias - JANELA_MEDIA, dias) % 7]
+    desvio = (recente - ajuste).std(axis=1)
+
+    horizonte = max(HORIZONTE_DIAS, prazo + ciclo)
+    previsto = media[:, None] * fatores[:, np.arange(horizonte) % 7]
+    acumulado = previsto.cumsum(axis=1)
+
+    seguranca = FATOR_SEGURANCA * desvio * np.sqrt(prazo)
+    demanda_prazo = acumulado[:, prazo - 1]
+    cobertura = (acumulado <= estoque[:, None]).sum(axis=1)
+    return {
+        "media_diaria": media,
+        "demanda_prazo": demanda_prazo,
+        "estoque_seguranca": seguranca,
+        "ponto_pedido": demanda_prazo + seguranca,
+        "nivel_maximo": acumulado[:, prazo + ciclo - 1] + seguranca,
+        "dias_cobertura": np.minimum(cobertura, HORIZONTE_DIAS),
+        "com_consumo": media > 0,
+    }
+
+
+def gerar(hoje=None, prazo=PRAZO_ENTREGA, ciclo=CICLO_DIAS, semanas=HISTORICO_SEMANAS):
+    """
+    Calcula e regrava a previsão de todos os insumos. Retorna o número de
+    insumos com previsão gravada.
+    """
+    hoje = hoje or timezone.localdate()
+    ids, estoque, matriz = historico(hoje, semanas)
+    resultado = calcular(estoque, matriz, prazo, ciclo)
+    com_consumo = resultado.pop("com_consumo").tolist()
+    # Vetores para listas de int do Python de uma vez (arredondados ao milésimo)
+    inteiros = {
+        campo: np.rint(valores).astype(np.int64).tolist()
+        for campo, valores in resultado.items()
+    }
+    previsoes = [
+        PrevisaoInsumo(
+            insumo_id=insumo_id, data=hoje, estoque=int(estoque[i]),
+            **{campo: valores[i] for campo, valores in inteiros.items()})
+        for i, insumo_id in enumerate(ids.tolist())
+    ]
+    for previsao, consome in zip(previsoes, com_consumo):
+        if not consome:
+            previsao.dias_cobertura = None
+    with transaction.atomic():
+        PrevisaoInsumo.objects.all().delete()
+        PrevisaoInsumo.objects.bulk_create(previsoes, batch_size=TAMANHO_LOTE)
+    return len(previsoes)
+
+
+def a_comprar(todos=False):
+    """
+    Previsões com o insumo (uma consulta), da menor cobertura para a maior.
+    Sem `todos`, só os insumos cujo estoque atual está no ponto de pedido
+    ou abaixo. Cada previsão ganha `sugestao`: quanto falta para o nível
+    máximo com o estoque atual.
+    """
+    previsoes = PrevisaoInsumo.objects.select_related("insumo").order_by(
+        F("dias_cobertura").asc(nulls_last=True), "insumo__nome")
+    if not todos:
+        previsoes = previsoes.filter(
+            ponto_pedido__gt=0, insumo__quantidade_total__lte=F("ponto_pedido"))
+    previsoes = list(previsoes)
+    for previsao in previsoes:
+        previsao.sugestao = max(previsao.nivel_maximo - previsao.insumo.quantidade_total, 0)
+    return previsoes
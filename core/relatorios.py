@@ -0,0 +1,81 @@
+# core/relatorios.py
+from collections import defaultdict
+
+from django.db.models import Sum
+
+from .models import ConsumoDiario, Insumo, VistoriaInsumo
+
+
+def calcular_relatorio_insumos(insumos=None, data_inicio=None, data_fim=None):
+    """
+    Calcula retirado / usado / teórico de todos os insumos com um número
+    constante de consultas. Sem janela de datas lê os contadores
+    materializados (ContadorInsumo); com janela, soma o consumo diário
+    (ConsumoDiario) dos dias da janela.
+
+    - insumos: queryset ou lista de ids para restringir o relatório
+    - data_inicio / data_fim: janela de datas (inclusiva) das movimentações
+    Retorna uma lista de dicionários no mesmo formato usado pelo template.
+    """
+    insumos_qs = Insumo.objects.all().order_by('nome')
+    if insumos is not None:
+        insumos_qs = insumos_qs.filter(pk__in=insumos)
+
+    if not data_inicio and not data_fim:
+        # Sem janela de datas os totais vêm direto dos contadores materializados
+        relatorio = []
+        for insumo in insumos_qs.select_related('contador'):
+            contador = getattr(insumo, 'contador', None)
+            retirado = contador.total_retirado if contador else 0
+            usado = contador.total_usado if contador else 0
+            relatorio.append({
+                'insumo': insumo,
+                'retirado': retirado,
+                'usado': usado,
+                'teorico': max(retirado - usado, 0),
+            })
+        return relatorio
+
+    # Com janela, uma consulta agrupada sobre o consumo diário: {insumo_id: totais}
+    consumo = ConsumoDiario.objects.all()
+    if insumos is not None:
+        consumo = consumo.filter(insumo__in=insumos)
+    if data_inicio:
+        consumo = consumo.filter(data__gte=data_inicio)
+    if data_fim:
+        consumo = consumo.filter(data__lte=data_fim)
+    totais = {
+        row['insumo']: row
+        for row in consumo.values('insumo').annotate(
+            retirado=Sum('retirado'),
+            usado=Sum('usado'),
+        ).order_by()
+    }
+
+    relatorio = []
+    for insumo in insumos_qs:
+        total = totais.get(insumo.id, {})
+        retirado = total.get('retirado') or 0
+        usado = total.get('usado') or 0
+        relatorio.append({
+            'insumo': insumo,
+            'retirado': retirado,
+            'usado': usado,
+            'teorico': max(retirado - usado, 0),
+        })
+    return relatorio
+
+
+def desperdicio_por_unidade(vistorias):
+    """
+    Desperdício de cada vistoria somado por unidade base (g, ml e un não
+    se somam entre si), com uma consulta agrupada.
+    Retorna {vistoria_id: [(unidade, total), ...]} em ordem de unidade.
+    """
+    totais = defaultdict(list)
+    for row in (VistoriaInsumo.objects.filter(vistoria__in=vistorias)
+                .values('vistoria', 'insumo__unidade_base')
+                .annotate(total=Sum('desperdicio'))
+                .order_by('vistoria', 'insumo__unidade_base')):
+        totais[row['vistoria']].append((row['insumo__unidade_base'], row['total']))
+    return dict(totais)
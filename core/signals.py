@@ -1,11 +1,239 @@
 # core/signals.py
-from django.contrib.auth.models import Group
-from django.db.models.signals import post_migrate
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.db.backends.signals import connection_created
+from django.db.models import QuerySet
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_migrate, post_save, pre_delete, pre_save,
+)
 from django.dispatch import receiver
 
+from . import busca, consumo, contadores, versoes
+from .models import (
+    CatalogoProduto, Colaborador, FichaInsumo, FichaProducao, Insumo, ProdutoPronto,
+    SaidaInsumo,
+)
+from .papeis import invalidar_grupos
+
+
+@receiver(connection_created)
+def configurar_sqlite(sender, connection, **kwargs):
+    """Aplica settings.SQLITE_PRAGMAS (perfil de produção) a cada conexão nova."""
+    if connection.vendor != "sqlite" or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        for pragma, valor in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma} = {valor}")
+
 
 @receiver(post_migrate)
 def criar_grupos(sender, **kwargs):
     if sender.name == "core":  # substitua "core" pelo nome do seu app principal
         Group.objects.get_or_create(name="RH")
         Group.objects.get_or_create(name="Insumos")
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidar_grupos_membros(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear", "pre_clear"):
+        return
+    versoes.invalidar("user")
+    if not reverse:
+        # user.groups.add/remove/clear(...)
+        invalidar_grupos(instance.pk)
+    elif pk_set:
+        # group.user_set.add/remove(...)
+        invalidar_grupos(*pk_set)
+    else:
+        # group.user_set.clear(): usa a lista antes da limpeza
+        invalidar_grupos(*instance.user_set.values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=Group)
+@receiver(post_save, sender=Group)
+def invalidar_grupos_grupo(sender, instance, **kwargs):
+    invalidar_grupos(*instance.user_set.values_list("pk", flat=True))
+
+
+# ------------------ BUSCA GLOBAL ------------------
+@receiver(post_save, sender=Colaborador)
+@receiver(post_save, sender=Insumo)
+@receiver(post_save, sender=FichaProducao)
+def indexar_busca(sender, instance, raw=False, **kwargs):
+    if not raw:
+        busca.indexar(instance)
+
+
+@receiver(post_save, sender=CatalogoProduto)
+def indexar_busca_catalogo(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    busca.indexar(instance)
+    # O título das fichas leva o nome do produto do catálogo
+    busca.indexar_varios(
+        FichaProducao.objects.filter(produto__catalogo=instance)
+        .select_related("produto__catalogo"))
+
+
+@receiver(post_delete, sender=Colaborador)
+@receiver(post_delete, sender=Insumo)
+@receiver(post_delete, sender=CatalogoProduto)
+@receiver(post_delete, sender=FichaProducao)
+def remover_busca(sender, instance, **kwargs):
+    busca.remover(instance)
+
+
+# ------------------ CONTADORES E CONSUMO DIÁRIO ------------------
+# Saídas e linhas de ficha gravadas ou excluídas mantêm aqui o contador do
+# insumo e o consumo do dia. Os caminhos em lote chamam
+# contadores.registrar_movimentos e consumo.registrar_movimentos
+# diretamente, porque bulk_create não dispara sinais.
+
+# Exclusões destes modelos levam saídas ou linhas de ficha em cascata. O
+# Collector envia o post_delete dos dependentes antes do da origem: os
+# descontos ficam guardados na origem e são aplicados em lote no post_delete
+# dela, em vez de uma atualização por linha excluída.
+ORIGENS_CASCATA = (Colaborador, ProdutoPronto, FichaProducao)
+
+
+def _modelo(origin):
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+def _excluidos(origin):
+    return origin.__dict__.setdefault(
+        "_movimentos_excluidos", {"movimentos": [], "fichas": [], "datas": {}})
+
+
+def _movimento(instance):
+    """(insumo_id, dia, retirado, usado) de uma saída ou de uma linha de ficha."""
+    if isinstance(instance, SaidaInsumo):
+        return (instance.insumo_id, consumo.dia(instance.data),
+                instance.quantidade_principal + instance.quantidade_complementar, 0)
+    return instance.insumo_id, instance.ficha.data_fabricacao, 0, instance.quantidade_usada
+
+
+def _registrar(movimento, sinal):
+    insumo_id, dia, retirado, usado = movimento
+    if sinal > 0:
+        contadores.registrar_movimento(insumo_id, retirado=retirado, usado=usado)
+    else:
+        contadores.descontar_movimento(insumo_id, retirado=retirado, usado=usado)
+    consumo.registrar_movimento(insumo_id, dia, retirado=sinal * retirado,
+                                usado=sinal * usado, movimentacoes=sinal)
+
+
+def _descontar_em_lote(excluidos):
+    # Linhas de ficha esperam a data da ficha (post_delete da FichaProducao)
+    movimentos, pendentes = excluidos["movimentos"], []
+    for insumo_id, ficha_id, usado in excluidos["fichas"]:
+        dia = excluidos["datas"].get(ficha_id)
+        if dia is None:
+            pendentes.append((insumo_id, ficha_id, usado))
+        else:
+            movimentos.append((insumo_id, dia, 0, usado))
+    excluidos["movimentos"], excluidos["fichas"] = [], pendentes
+    if not movimentos:
+        return
+    por_insumo = defaultdict(lambda: [0, 0])
+    diario = defaultdict(lambda: [0, 0, 0, 0])
+    for insumo_id, dia, retirado, usado in movimentos:
+        por_insumo[insumo_id][0] -= retirado
+        por_insumo[insumo_id][1] -= usado
+        linha = diario[(insumo_id, dia)]
+        linha[0] -= retirado
+        linha[1] -= usado
+        linha[3] -= 1
+    contadores.registrar_movimentos(por_insumo)
+    consumo.registrar_movimentos(diario)
+
+
+@receiver(pre_save, sender=SaidaInsumo)
+@receiver(pre_save, sender=FichaInsumo)
+def guardar_movimento_anterior(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    anterior = sender.objects.filter(pk=instance.pk).first()
+    instance._movimento_anterior = _movimento(anterior) if anterior else None
+
+
+@receiver(post_save, sender=SaidaInsumo)
+@receiver(post_save, sender=FichaInsumo)
+def registrar_movimento(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    atual = _movimento(instance)
+    anterior = instance.__dict__.pop("_movimento_anterior", None)
+    if anterior == atual:
+        return
+    if anterior:
+        _registrar(anterior, -1)
+    _registrar(atual, 1)
+
+
+@receiver(post_delete, sender=SaidaInsumo)
+@receiver(post_delete, sender=FichaInsumo)
+def descontar_movimento(sender, instance, origin=None, **kwargs):
+    modelo = _modelo(origin)
+    if modelo is Insumo:
+        return  # contador e consumo diário saem junto com o insumo
+    if modelo not in ORIGENS_CASCATA:
+        _registrar(_movimento(instance), -1)
+    elif sender is SaidaInsumo:
+        _excluidos(origin)["movimentos"].append(_movimento(instance))
+    else:
+        _excluidos(origin)["fichas"].append(
+            (instance.insumo_id, instance.ficha_id, instance.quantidade_usada))
+
+
+@receiver(post_delete, sender=Colaborador)
+@receiver(post_delete, sender=ProdutoPronto)
+@receiver(post_delete, sender=FichaProducao)
+def descontar_cascata(sender, instance, origin=None, **kwargs):
+    modelo = _modelo(origin)
+    if modelo not in ORIGENS_CASCATA:
+        return
+    excluidos = _excluidos(origin)
+    if sender is FichaProducao:
+        excluidos["datas"][instance.pk] = instance.data_fabricacao
+    if sender is modelo:
+        _descontar_em_lote(excluidos)
+
+
+@receiver(pre_save, sender=FichaProducao)
+def guardar_data_fabricacao(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    instance._data_fabricacao_anterior = sender.objects.filter(
+        pk=instance.pk).values_list("data_fabricacao", flat=True).first()
+
+
+@receiver(post_save, sender=FichaProducao)
+def mover_consumo_ficha(sender, instance, raw=False, **kwargs):
+    # O uso da ficha conta no dia de fabricação: mudou a data, muda o dia
+    anterior = instance.__dict__.pop("_data_fabricacao_anterior", None)
+    if not raw and anterior and anterior != instance.data_fabricacao:
+        consumo.mover_ficha(instance.pk, anterior, instance.data_fabricacao)
+
+
+# ------------------ VERSÕES DO CACHE ------------------
+@receiver(post_save, sender=Colaborador)
+@receiver(post_save, sender=Insumo)
+@receiver(post_save, sender=CatalogoProduto)
+@receiver(post_save, sender=ProdutoPronto)
+@receiver(post_save, sender=FichaProducao)
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Colaborador)
+@receiver(post_delete, sender=Insumo)
+@receiver(post_delete, sender=CatalogoProduto)
+@receiver(post_delete, sender=ProdutoPronto)
+@receiver(post_delete, sender=FichaProducao)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Group)
+def invalidar_versao(sender, update_fields=None, **kwargs):
+    if update_fields == {"last_login"}:
+        return  # login não altera nada exibido nas listas
+    versoes.invalidar(sender._meta.model_name)
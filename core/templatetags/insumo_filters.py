@@ -1,4 +1,7 @@
 from django import template
+from django.utils.html import format_html
+
+from core import unidades
 
 register = template.Library()
 
@@ -6,26 +9,45 @@ register = template.Library()
 @register.filter
 def formatar_quantidade(valor, unidade):
     """
-    Formata uma quantidade, tratando litros/ml e gramas/ml automaticamente.
+    Formata uma quantidade gravada (milésimos da unidade base), com
+    kg/g e L/ml automaticamente. Ex.: 1500000|formatar_quantidade:"g" -> "1 kg 500 g".
+    """
+    if valor is None or valor == "":
+        return ""
+    return unidades.formatar(valor, unidade)
+
+
+@register.filter
+def quantidade_base(valor):
+    """Quantidade gravada na unidade base (para campos de formulário e somas)."""
+    if valor is None or valor == "":
+        return ""
+    return unidades.para_base(valor)
+
+
+@register.filter
+def sparkline(valores, largura=120):
+    """
+    Mini gráfico de linha (SVG) de uma série, escalado de zero (ou do menor
+    valor, se negativo) até o maior. Ex.: {{ insumo.serie_uso|sparkline }}.
     """
-    if unidade.lower() == 'ml':
-        # valor vem em ml
-        litros = int(valor // 1000)
-        ml = int(valor % 1000)
-        if litros:
-            return f"{litros} L e {ml} ml"
-        return f"{ml} ml"
-
-    if unidade.lower() == 'g':
-        # valor vem em g
-        kg = int(valor // 1000)
-        g = int(valor % 1000)
-        if kg:
-            return f"{kg} kg e {g} g"
-        return f"{g} g"
-
-    # outros tipos de unidade
-    return f"{valor} {unidade}"
+    valores = list(valores or [])
+    if len(valores) < 2:
+        return ""
+    altura = 24
+    menor, maior = min(min(valores), 0), max(valores)
+    faixa = (maior - menor) or 1
+    passo = int(largura) / (len(valores) - 1)
+    pontos = " ".join(
+        f"{i * passo:.1f},{altura - 2 - (v - menor) / faixa * (altura - 4):.1f}"
+        for i, v in enumerate(valores)
+    )
+    return format_html(
+        '<svg class="sparkline" width="{0}" height="{1}" viewBox="0 0 {0} {1}" '
+        'aria-hidden="true"><polyline points="{2}" fill="none" stroke="currentColor" '
+        'stroke-width="1.5" stroke-linejoin="round"/></svg>',
+        largura, altura, pontos,
+    )
 
 
 @register.filter
@@ -1,3 +1,595 @@
-from django.test import TestCase
+from datetime import date, datetime, timedelta
+from io import BytesIO, StringIO, TextIOWrapper
 
-# Create your tests here.
+import numpy as np
+from django.apps import apps
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    busca, estoque, exportacoes, importacoes, lotes, movimentos, previsao, unidades, versoes,
+)
+from .management.commands.benchmark_views import rotas
+from .models import (
+    CatalogoProduto, Colaborador, FichaProducao, IndiceBusca, Insumo, MovimentoEstoque,
+    ProdutoPronto, ResumoValidade, SaidaInsumo, SnapshotEstoque, Vistoria,
+)
+from .papeis import papeis
+
+# Máximo de consultas SQL por rota, com o cache vazio. O mesmo orçamento
+# vale para os dois volumes de dados: uma view com consulta dentro de loop
+# (N+1) cabe no volume pequeno e estoura no grande.
+ORCAMENTOS = {
+    "home": 3,
+    "busca_global": 3,
+    "autocomplete": 4,
+    "colaboradores_list": 3,
+    "colaboradores_create": 2,
+    "colaboradores_detail": 3,
+    "colaboradores_edit": 3,
+    "colaboradores_delete": 3,
+    "insumos_list": 4,
+    "insumos_create": 2,
+    "insumos_edit": 3,
+    "insumos_delete": 3,
+    "insumos_tendencias": 4,
+    "insumos_comprar": 4,
+    "estoque_na_data": 6,
+    "produtos_list": 4,
+    "produtos_create": 2,
+    "produtos_edit": 5,
+    "produtos_delete": 4,
+    "catalogo_list": 3,
+    "catalogo_create": 2,
+    "catalogo_edit": 3,
+    "catalogo_delete": 3,
+    "criar_ficha": 4,
+    "visualizar_ficha": 4,
+    "saida_insumo_list": 3,
+    "saida_insumo_create": 2,
+    "saida_insumo_lote": 2,
+    "saida_insumo_delete": 3,
+    "exportar_saidas": 3,
+    "exportar_vistorias": 3,
+    "exportar_fichas": 5,
+    "importar_dados": 2,
+    "criar_usuario": 3,
+    "usuarios_list": 4,
+    "usuario_edit": 3,
+    "usuario_delete": 3,
+    "relatorio_insumos": 5,
+    "visualizar_checklist": 4,
+    "excluir_checklist": 2,
+    # POST
+    "criar_ficha:post": 17,
+    "relatorio_insumos:post": 10,
+    "excluir_checklist:post": 11,
+}
+
+SEM_CACHE_COMPARTILHADO = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+
+class OrcamentoConsultasMixin:
+    """
+    Orçamentos de consultas sobre dados de `gerar_dados` no volume da
+    classe. Também variam as linhas por ficha e por checklist, para pegar
+    loops nas páginas de detalhe.
+    """
+
+    escala = None
+    insumos_por_ficha = None
+    itens_por_vistoria = None
+    SENHA = "orcamento-123"
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("gerar_dados", escala=cls.escala, semente=20, dias=90,
+                     insumos_por_ficha=cls.insumos_por_ficha,
+                     itens_por_vistoria=cls.itens_por_vistoria, stdout=StringIO())
+        cls.usuario = User.objects.create_superuser("orcamento", password=cls.SENHA)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.usuario)
+
+    def requisitar(self, nome, metodo, url, dados=None):
+        """Faz a requisição e confere o orçamento de `nome`. Retorna a resposta."""
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = getattr(self.client, metodo)(url, dados)
+            if resposta.streaming:
+                b"".join(resposta.streaming_content)
+        self.assertLess(resposta.status_code, 500)
+        self.assertLessEqual(
+            len(consultas), ORCAMENTOS[nome],
+            f"{nome} ({url}) fez {len(consultas)} consultas com "
+            f"{SaidaInsumo.objects.count()} saídas:\n"
+            + "\n".join(c["sql"] for c in consultas.captured_queries))
+        return resposta
+
+    def test_rotas_get(self):
+        for nome, url in rotas():
+            base = nome.split(":")[0]
+            with self.subTest(rota=nome):
+                self.assertIn(base, ORCAMENTOS, f"Rota {base} sem orçamento de consultas.")
+                self.assertIsNotNone(url, f"Rota {base} sem regra em benchmark_views.ALVOS.")
+                self.requisitar(base, "get", url)
+
+    def test_criar_ficha_post(self):
+        produto = ProdutoPronto.objects.first()
+        linhas = list(lotes.disponiveis().filter(disponivel__gt=10 * unidades.ESCALA)[:3])
+        resposta = self.requisitar("criar_ficha:post", "post", reverse("criar_ficha"), {
+            "produto": produto.id,
+            "senha_confirmacao": self.SENHA,
+            "categoria": "Bolos",
+            "data_fabricacao": "2025-01-10",
+            "validade": 3,
+            "peso_produto": 500,
+            **{f"consumo_{l['insumo']}": 5 for l in linhas},
+        })
+        ficha = FichaProducao.objects.latest("id")
+        self.assertRedirects(resposta, reverse("visualizar_ficha", args=[ficha.id]),
+                             fetch_redirect_response=False)
+        self.assertEqual(ficha.ficha_insumos.count(), 3)
+        saldos = dict(lotes.disponiveis().values_list("insumo", "disponivel"))
+        for linha in linhas:
+            self.assertEqual(saldos[linha["insumo"]], linha["disponivel"] - 5 * unidades.ESCALA)
+        # O consumo diário acompanha a ficha (levanta CommandError se divergir)
+        call_command("reconstruir_consumo", verificar=True, stdout=StringIO())
+
+    def test_checklist_post(self):
+        insumos = Insumo.objects.values_list("id", flat=True)[:3]
+        total = Vistoria.objects.count()
+        self.requisitar("relatorio_insumos:post", "post", reverse("relatorio_insumos"),
+                        {f"real_{i}": 10 for i in insumos})
+        self.assertEqual(Vistoria.objects.count(), total + 1)
+
+        vistoria = Vistoria.objects.latest("id")
+        self.requisitar("excluir_checklist:post", "post",
+                        reverse("excluir_checklist", args=[vistoria.id]))
+        self.assertFalse(Vistoria.objects.filter(id=vistoria.id).exists())
+        call_command("reconstruir_consumo", verificar=True, stdout=StringIO())
+
+
+@override_settings(CACHES=SEM_CACHE_COMPARTILHADO, INSTRUMENTACAO_SQL=False)
+class OrcamentoConsultasPequenoTests(OrcamentoConsultasMixin, TestCase):
+    escala = 0.01
+    insumos_por_ficha = 2
+    itens_por_vistoria = 2
+
+
+@override_settings(CACHES=SEM_CACHE_COMPARTILHADO, INSTRUMENTACAO_SQL=False)
+class OrcamentoConsultasGrandeTests(OrcamentoConsultasMixin, TestCase):
+    escala = 0.05
+    insumos_por_ficha = 8
+    itens_por_vistoria = 10
+
+
+class UnidadesTests(TestCase):
+    def test_para_inteiro(self):
+        self.assertEqual(unidades.para_inteiro(2), 2000)
+        self.assertEqual(unidades.para_inteiro("1,5"), 1500)
+        self.assertEqual(unidades.para_inteiro(" 0.0005 "), 1)
+        self.assertEqual(unidades.para_inteiro(""), 0)
+        self.assertEqual(unidades.para_inteiro(None), 0)
+        for invalido in ("abc", "inf", "nan"):
+            with self.subTest(valor=invalido), self.assertRaises(ValueError):
+                unidades.para_inteiro(invalido)
+
+    def test_para_base(self):
+        self.assertEqual(unidades.para_base(2000), 2)
+        self.assertIsInstance(unidades.para_base(2000), int)
+        self.assertEqual(unidades.para_base(1500), 1.5)
+        self.assertEqual(unidades.para_base(None), 0)
+
+    def test_compor_e_decompor(self):
+        inteiro = unidades.compor(1000, 500000, "g")  # 1 kg + 500 g
+        self.assertEqual(inteiro, 1500000)
+        self.assertEqual(unidades.decompor(inteiro, "g"), (1000, 500000))
+        self.assertEqual(unidades.compor(3000, 0, "un"), 3000)
+        self.assertEqual(unidades.decompor(3500, "un"), (3000, 500))
+
+    def test_formatar(self):
+        self.assertEqual(unidades.formatar(1500000, "g"), "1 kg 500 g")
+        self.assertEqual(unidades.formatar(2000000, "ml"), "2 L")
+        self.assertEqual(unidades.formatar(250500, "g"), "250,5 g")
+        self.assertEqual(unidades.formatar(2500, "un"), "2,5 un")
+        self.assertEqual(unidades.formatar(-1000000, "g"), "-1 kg")
+        self.assertEqual(unidades.formatar(None, "g"), "0 g")
+        self.assertEqual(unidades.formatar(3000, "cx"), "3 cx")
+
+
+class EstoqueTestsMixin:
+    """Um insumo com estoque e dois colaboradores para as retiradas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.insumo = Insumo.objects.create(
+            nome="Farinha", unidade_base="g", quantidade_total=10 * unidades.ESCALA)
+        cls.entrega, cls.retira = (
+            Colaborador.objects.create(
+                rc=f"RC{i}", nome=f"Colaborador {i}", data_nascimento=date(1990, 1, 1),
+                sexo="F", funcao="Confeiteira", CPF_RG=f"000.000.000-0{i}")
+            for i in (1, 2)
+        )
+
+    def saldo(self):
+        self.insumo.refresh_from_db()
+        return self.insumo.quantidade_total
+
+    def criar_saida(self, quantidade):
+        return SaidaInsumo.objects.create(
+            insumo=self.insumo, colaborador_entregando=self.entrega,
+            colaborador_retira=self.retira, unidade="g",
+            quantidade_principal=quantidade, restante=quantidade)
+
+
+class EstoqueTests(EstoqueTestsMixin, TestCase):
+    def linha(self, quantidade, **extra):
+        return {"insumo": self.insumo.id, "colaborador_entregando": self.entrega.id,
+                "colaborador_retira": self.retira.id, "quantidade": quantidade, **extra}
+
+    def test_retirar(self):
+        estoque.retirar(self.insumo.id, 4 * unidades.ESCALA)
+        self.assertEqual(self.saldo(), 6 * unidades.ESCALA)
+
+    def test_retirar_sem_saldo(self):
+        with self.assertRaises(estoque.EstoqueInsuficiente) as erro:
+            estoque.retirar(self.insumo.id, 11 * unidades.ESCALA)
+        self.assertEqual(erro.exception.insumo_id, self.insumo.id)
+        self.assertEqual(self.saldo(), 10 * unidades.ESCALA)
+
+    def test_saidas_em_lote(self):
+        resultados = estoque.registrar_saidas_em_lote([
+            self.linha("4"),
+            self.linha("5,5"),
+            self.linha("1"),  # passa do saldo que sobrou das linhas anteriores
+            self.linha("1", insumo=0),
+            self.linha("1", colaborador_retira="x"),
+            self.linha(""),
+            self.linha("1", unidade="kg"),
+            self.linha("1", unidade="ml"),
+        ])
+        self.assertEqual([r["ok"] for r in resultados],
+                         [True, True, False, False, False, False, False, False])
+        self.assertIn("excede o estoque disponível (0,5 g)", resultados[2]["erro"])
+        self.assertEqual(resultados[3]["erro"], "Insumo inválido.")
+        self.assertEqual(resultados[4]["erro"], "Colaborador inválido.")
+        self.assertEqual(resultados[5]["erro"], "Você precisa informar a quantidade.")
+        self.assertEqual(resultados[6]["erro"], "Unidade inválida.")
+        self.assertEqual(resultados[7]["erro"], estoque.unidade_incompativel(self.insumo))
+
+        self.assertEqual(self.saldo(), 500)
+        saidas = SaidaInsumo.objects.in_bulk([r["saida_id"] for r in resultados[:2]])
+        self.assertEqual(sorted(s.restante for s in saidas.values()), [4000, 5500])
+        self.assertTrue(all(s.unidade == "g" for s in saidas.values()))
+        self.assertEqual(
+            movimentos.saldos_em(timezone.now(), [self.insumo.id])[self.insumo.id],
+            (-9500, 9500))
+
+    def test_saidas_em_lote_sem_validas(self):
+        resultados = estoque.registrar_saidas_em_lote([self.linha("20")])
+        self.assertFalse(resultados[0]["ok"])
+        self.assertEqual(self.saldo(), 10 * unidades.ESCALA)
+        self.assertFalse(SaidaInsumo.objects.exists())
+
+
+class ExportacaoTests(EstoqueTestsMixin, TestCase):
+    def test_periodo_em_dias_locais(self):
+        # 22h30 em São Paulo já é o dia seguinte em UTC
+        saida = self.criar_saida(unidades.ESCALA)
+        SaidaInsumo.objects.filter(pk=saida.pk).update(
+            data=timezone.make_aware(datetime(2025, 3, 10, 22, 30)))
+        dia = date(2025, 3, 10)
+        self.assertEqual([l[0] for l in exportacoes.linhas_saidas(dia, dia)], [saida.pk])
+        seguinte = dia + timedelta(days=1)
+        self.assertEqual(list(exportacoes.linhas_saidas(seguinte, seguinte)), [])
+
+
+class LotesTests(EstoqueTestsMixin, TestCase):
+    def test_alocar_do_mais_antigo(self):
+        antigo, novo = self.criar_saida(1000), self.criar_saida(1000)
+        # O mais novo pelo id, mas retirado antes: a ordem é a da data
+        SaidaInsumo.objects.filter(pk=novo.pk).update(
+            data=antigo.data - timedelta(hours=1))
+        with transaction.atomic():
+            alocacoes = lotes.alocar({self.insumo.id: 1500})
+        self.assertEqual(alocacoes, {self.insumo.id: [(novo.id, 1000), (antigo.id, 500)]})
+        antigo.refresh_from_db()
+        novo.refresh_from_db()
+        self.assertEqual((novo.restante, antigo.restante), (0, 500))
+        self.assertEqual(list(lotes.disponiveis().values_list("disponivel", "lotes")),
+                         [(500, 1)])
+
+    def test_alocar_sem_saldo_nao_grava(self):
+        saida = self.criar_saida(1000)
+        outro = Insumo.objects.create(nome="Açúcar", unidade_base="g")
+        with self.assertRaises(lotes.LotesInsuficientes) as erro, transaction.atomic():
+            lotes.alocar({self.insumo.id: 500, outro.id: 1})
+        self.assertEqual(erro.exception.faltas, {outro.id: (1, 0)})
+        saida.refresh_from_db()
+        self.assertEqual(saida.restante, 1000)
+
+
+class SaldosEmTests(EstoqueTestsMixin, TestCase):
+    def movimento(self, data, estoque, em_uso=0):
+        MovimentoEstoque.objects.create(
+            insumo=self.insumo, tipo="ajuste", delta_estoque=estoque,
+            delta_em_uso=em_uso, data=data)
+
+    def test_saldos_em(self):
+        inicio = timezone.now() - timedelta(days=10)
+        outro = Insumo.objects.create(nome="Açúcar", unidade_base="g")
+        self.movimento(inicio, 10000)
+        self.movimento(inicio + timedelta(days=1), -3000, 3000)
+        self.movimento(inicio + timedelta(days=5), -1000, 1000)
+
+        self.assertEqual(movimentos.saldos_em(inicio - timedelta(seconds=1)),
+                         {self.insumo.id: (0, 0), outro.id: (0, 0)})
+        self.assertEqual(movimentos.saldos_em(inicio)[self.insumo.id], (10000, 0))
+        self.assertEqual(movimentos.saldos_em(inicio + timedelta(days=2))[self.insumo.id],
+                         (7000, 3000))
+        self.assertEqual(movimentos.saldos_em(timezone.now(), [self.insumo.id]),
+                         {self.insumo.id: (6000, 4000)})
+
+    def test_saldos_em_parte_do_snapshot(self):
+        inicio = timezone.now() - timedelta(days=10)
+        self.movimento(inicio, 10000)
+        movimentos.gerar_snapshots(inicio + timedelta(days=1))
+        # Só o que vem depois do snapshot é somado: ajustá-lo muda o saldo
+        SnapshotEstoque.objects.update(estoque=8000, em_uso=500)
+        self.movimento(inicio + timedelta(days=2), -1000, 1000)
+
+        self.assertEqual(movimentos.saldos_em(inicio)[self.insumo.id], (10000, 0))
+        self.assertEqual(movimentos.saldos_em(inicio + timedelta(days=1))[self.insumo.id],
+                         (8000, 500))
+        self.assertEqual(movimentos.saldos_em(inicio + timedelta(days=3))[self.insumo.id],
+                         (7000, 1500))
+
+
+class PrevisaoTests(TestCase):
+    def test_calcular(self):
+        # Um insumo com retirada constante e outro sem retirada, em 8 semanas
+        matriz = np.zeros((2, 56))
+        matriz[0] = 1000
+        resultado = previsao.calcular(np.array([10000.0, 5000.0]), matriz,
+                                      prazo=7, ciclo=14)
+        self.assertEqual(resultado["media_diaria"].tolist(), [1000, 0])
+        self.assertEqual(resultado["demanda_prazo"].tolist(), [7000, 0])
+        self.assertEqual(resultado["estoque_seguranca"].tolist(), [0, 0])
+        self.assertEqual(resultado["nivel_maximo"].tolist(), [21000, 0])
+        self.assertEqual(resultado["dias_cobertura"].tolist(), [10, previsao.HORIZONTE_DIAS])
+        self.assertEqual(resultado["com_consumo"].tolist(), [True, False])
+
+    def test_calcular_por_dia_da_semana(self):
+        # Retirada só no último dia de cada semana: a demanda da próxima
+        # semana cai inteira no mesmo dia da semana
+        matriz = np.zeros((1, 28))
+        matriz[0, 6::7] = 7000
+        resultado = previsao.calcular(np.array([0.0]), matriz, prazo=7, ciclo=7)
+        self.assertEqual(resultado["media_diaria"].tolist(), [1000])
+        self.assertAlmostEqual(resultado["demanda_prazo"][0], 7000)
+        self.assertAlmostEqual(resultado["estoque_seguranca"][0], 0)
+
+
+class ImportacaoTests(TestCase):
+    CABECALHO = b"nome;unidade_base;quantidade_principal\n"
+
+    def importar(self, conteudo, tamanho_lote=2):
+        arquivo = TextIOWrapper(BytesIO(self.CABECALHO + conteudo), encoding="utf-8-sig")
+        return importacoes.importar_csv("insumos", arquivo, tamanho_lote)
+
+    def test_arquivo_invalido_nao_grava_nada(self):
+        # Os dois primeiros lotes são válidos; o erro de codificação vem no terceiro
+        with self.assertRaises(importacoes.ArquivoInvalido):
+            self.importar(b"A;g;1\nB;g;1\nC;g;1\nD;g;1\n\xff;g;1\n")
+        self.assertFalse(Insumo.objects.exists())
+        self.assertFalse(MovimentoEstoque.objects.exists())
+
+    def test_nome_repetido_no_cadastro(self):
+        Insumo.objects.create(nome="Farinha", unidade_base="g")
+        Insumo.objects.create(nome="Farinha", unidade_base="g")
+        resultado = self.importar("Farinha;g;2\nAçúcar;g;1\n".encode())
+        self.assertEqual((resultado["criados"], resultado["atualizados"]), (1, 0))
+        self.assertEqual([linha for linha, _ in resultado["erros"]], [2])
+        self.assertFalse(Insumo.objects.filter(nome="Farinha", quantidade_total__gt=0).exists())
+
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", password="x")
+        User.objects.bulk_create(User(username=f"usuario{i:02}") for i in range(60))
+
+    def resultados(self, limite):
+        self.client.force_login(self.admin)
+        resposta = self.client.get(
+            reverse("autocomplete", args=["usuarios"]), {"limite": limite})
+        self.assertEqual(resposta.status_code, 200)
+        return len(resposta.json()["resultados"])
+
+    def test_limite(self):
+        self.assertEqual(self.resultados(5), 5)
+        self.assertEqual(self.resultados(-5), 1)
+        self.assertEqual(self.resultados(0), 1)
+        self.assertEqual(self.resultados(999), 50)
+        self.assertEqual(self.resultados("abc"), 20)
+        self.assertEqual(self.resultados(""), 20)
+
+
+class SemJavaScriptTests(EstoqueTestsMixin, TestCase):
+    """Sem JavaScript, os selects de autocomplete aceitam o nome digitado."""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser("admin", password="x"))
+
+    def test_formulario(self):
+        resposta = self.client.get(reverse("saida_insumo_create"))
+        self.assertContains(resposta, '<noscript><input type="text" name="insumo_nome"')
+        self.client.post(reverse("saida_insumo_create"), {
+            "insumo_nome": "farinha", "colaborador_entregando_nome": "Colaborador 1",
+            "colaborador_retira_nome": "Colaborador 2", "unidade": "g", "quantidade": "1"})
+        saida = SaidaInsumo.objects.get()
+        self.assertEqual((saida.insumo, saida.colaborador_retira), (self.insumo, self.retira))
+
+    def test_lote(self):
+        resposta = self.client.post(reverse("saida_insumo_lote"), {
+            "insumo[]": ["", ""], "insumo_nome[]": ["Farinha", "Açúcar"],
+            "quantidade[]": ["1", "1"], "unidade[]": ["", ""],
+            "colaborador_entregando[]": ["", ""],
+            "colaborador_entregando_nome[]": ["Colaborador 1"] * 2,
+            "colaborador_retira[]": ["", ""],
+            "colaborador_retira_nome[]": ["Colaborador 2"] * 2,
+        })
+        self.assertEqual(resposta.status_code, 200)  # a linha do Açúcar volta com erro
+        self.assertEqual(SaidaInsumo.objects.get().insumo, self.insumo)
+
+
+class InstrumentacaoTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser("admin", password="x"))
+
+    @override_settings(INSTRUMENTACAO_SQL=True, INSTRUMENTACAO_SERVER_TIMING=False,
+                       INSTRUMENTACAO_LIMITE_CONSULTAS=0)
+    def test_log_sem_server_timing(self):
+        with self.assertLogs("core.desempenho", "WARNING") as log:
+            resposta = self.client.get(reverse("home"))
+        self.assertNotIn("Server-Timing", resposta)
+        self.assertIn("consultas", log.output[0])
+
+    @override_settings(INSTRUMENTACAO_SQL=True, INSTRUMENTACAO_SERVER_TIMING=True)
+    def test_server_timing(self):
+        self.assertIn("consultas", self.client.get(reverse("home"))["Server-Timing"])
+
+
+class InvariantesTests(TestCase):
+    """
+    Tabelas derivadas (contadores, consumo diário, índice da busca, versões
+    do cache, resumo de validade) e permissões continuam de acordo com os
+    cadastros depois das operações que as mantêm incrementalmente.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("gerar_dados", escala=0.01, semente=20, dias=90, colaboradores=10,
+                     stdout=StringIO())
+        cls.admin = User.objects.create_superuser("admin", password="x")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def verificar_derivados(self):
+        # Os comandos levantam CommandError se houver divergência
+        call_command("recalcular_contadores", verificar=True, stdout=StringIO())
+        call_command("reconstruir_consumo", verificar=True, stdout=StringIO())
+
+    def indice(self):
+        return set(IndiceBusca.objects.values_list(
+            "tipo", "objeto_id", "titulo", "subtitulo", "texto"))
+
+    def indice_esperado(self):
+        esperado = set()
+        for tipo, fonte in busca.FONTES.items():
+            consulta = apps.get_model(fonte["modelo"]).objects.select_related(
+                *fonte.get("relacionados", []))
+            for obj in consulta:
+                e = busca._entrada(IndiceBusca, tipo, obj)
+                esperado.add((e.tipo, e.objeto_id, e.titulo, e.subtitulo, e.texto))
+        return esperado
+
+    def test_exclusoes_em_cascata(self):
+        # Cada objeto é escolhido depois da exclusão anterior (as cascatas levam saídas)
+        exclusoes = [
+            ("saida_insumo_delete", lambda: SaidaInsumo.objects.first()),
+            ("produtos_delete", lambda: ProdutoPronto.objects.filter(
+                fichaproducao__ficha_insumos__isnull=False).first()),
+            ("colaboradores_delete", lambda: Colaborador.objects.filter(
+                retiradas__isnull=False).first()),
+            ("insumos_delete", lambda: Insumo.objects.filter(saidainsumo__isnull=False).first()),
+        ]
+        for nome, escolher in exclusoes:
+            with self.subTest(rota=nome):
+                objeto = escolher()
+                resposta = self.client.post(reverse(nome, args=[objeto.id]))
+                self.assertEqual(resposta.status_code, 302)
+                self.assertFalse(type(objeto).objects.filter(pk=objeto.pk).exists())
+                self.verificar_derivados()
+
+    def test_indice_busca(self):
+        self.assertEqual(self.indice(), self.indice_esperado())
+        colaborador = Colaborador.objects.first()
+        colaborador.nome = "Joana Sincronizada"
+        colaborador.save()
+        catalogo = CatalogoProduto.objects.filter(produtos__fichaproducao__isnull=False).first()
+        catalogo.nome = "Bolo Renomeado"
+        catalogo.save()  # o título das fichas leva o nome do catálogo
+        excluido = Colaborador.objects.exclude(pk=colaborador.pk).first()
+        self.client.post(reverse("colaboradores_delete", args=[excluido.id]))
+        self.assertEqual(self.indice(), self.indice_esperado())
+        self.assertEqual(
+            [r.objeto_id for r in busca.consultar("joana sincr", ["colaborador"])],
+            [colaborador.id])
+
+    def test_versoes_do_cache(self):
+        colaborador = Colaborador.objects.order_by("nome").first()
+        self.client.get(reverse("colaboradores_list"))  # guarda a lista no cache
+        antes = versoes.versao("colaborador", "consumodiario")
+        with self.captureOnCommitCallbacks(execute=True):
+            colaborador.nome = "Aaron Versionado"
+            colaborador.save()
+            SaidaInsumo.objects.first().delete()
+        self.assertNotEqual(versoes.versao("colaborador"), antes.split("-")[0])
+        self.assertNotEqual(versoes.versao("consumodiario"), antes.split("-")[1])
+        self.assertContains(self.client.get(reverse("colaboradores_list")), "Aaron Versionado")
+
+    def test_papeis(self):
+        usuario = User.objects.create_user("rh", password="x")
+        usuario.groups.add(Group.objects.get(name="RH"))
+        self.client.force_login(usuario)
+        self.assertEqual(self.client.get(reverse("colaboradores_list")).status_code, 200)
+        self.assertEqual(self.client.get(reverse("insumos_list")).status_code, 302)
+
+        # A mudança de grupo vale na requisição seguinte (cache invalidado)
+        usuario.groups.add(Group.objects.get(name="Insumos"))
+        self.assertEqual(self.client.get(reverse("insumos_list")).status_code, 200)
+        usuario.groups.set([Group.objects.get_or_create(name="Administrador")[0]])
+        self.assertEqual(self.client.get(reverse("colaboradores_list")).status_code, 302)
+        # is_admin (gestão de usuários) é só de superusuários
+        self.assertFalse(papeis(User.objects.get(pk=usuario.pk))["is_admin"])
+        self.assertTrue(papeis(self.admin)["is_admin"])
+
+    def test_resumo_validade(self):
+        hoje = timezone.localdate()
+        catalogo = CatalogoProduto.objects.create(nome="Torta de Validade")
+        dias = {-1: 2, 0: 1, 3: 4, 10: 5}
+        produtos = {
+            d: ProdutoPronto.objects.create(
+                catalogo=catalogo, quantidade=q, data_fabricacao=hoje - timedelta(days=5),
+                data_validade=hoje + timedelta(days=d))
+            for d, q in dias.items()
+        }
+        call_command("resumo_validade", data=hoje.isoformat(), stdout=StringIO())
+        resumo = ResumoValidade.objects.get(data=hoje, catalogo=catalogo)
+        self.assertEqual(
+            (resumo.lotes_vencidos, resumo.quantidade_vencida, resumo.lotes_hoje,
+             resumo.lotes_semana, resumo.quantidade_semana),
+            (1, 2, 1, 1, 4))
+        self.assertEqual(
+            set(ProdutoPronto.objects.filter(catalogo=catalogo, vencido=True)),
+            {produtos[-1]})
+
+        # Validade alterada: a marca e o resumo do dia são refeitos
+        ProdutoPronto.objects.filter(pk=produtos[-1].pk).update(
+            data_validade=hoje + timedelta(days=1))
+        call_command("resumo_validade", data=hoje.isoformat(), stdout=StringIO())
+        resumo = ResumoValidade.objects.get(data=hoje, catalogo=catalogo)
+        self.assertEqual((resumo.lotes_vencidos, resumo.lotes_semana), (0, 2))
+        self.assertFalse(ProdutoPronto.objects.filter(catalogo=catalogo, vencido=True).exists())
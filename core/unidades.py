@@ -0,0 +1,112 @@
+# core/unidades.py
+# Motor único de quantidades de insumo. Tudo é gravado como inteiro em
+# milésimos da unidade base (mg, µl ou milésimo de unidade): somas e
+# comparações no banco ficam exatas e a conversão acontece só nas bordas
+# (formulários, filtros de template, CSV e API).
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import NamedTuple
+
+# Milésimos da unidade base por unidade base
+ESCALA = 1000
+
+
+class Formato(NamedTuple):
+    base: str        # unidade base do insumo (g, ml, un)
+    multiplo: str    # múltiplo usado na exibição e no cadastro (kg, L); "" se não houver
+    fator: int       # unidades base por múltiplo
+
+
+FORMATOS = {
+    "g": Formato("g", "kg", 1000),
+    "ml": Formato("ml", "L", 1000),
+    "un": Formato("un", "", 1),
+}
+
+
+# ------------------ CONVERSÃO ------------------
+
+def para_inteiro(valor):
+    """
+    Quantidade em unidade base (número, Decimal ou texto, com vírgula ou
+    ponto) para o inteiro gravado. Vazio vale 0; texto inválido levanta
+    ValueError.
+    """
+    if valor is None or valor == "":
+        return 0
+    if isinstance(valor, int):
+        return valor * ESCALA
+    try:
+        numero = Decimal(str(valor).strip().replace(",", "."))
+    except InvalidOperation:
+        raise ValueError(f"Quantidade inválida: {valor!r}.")
+    if not numero.is_finite():
+        raise ValueError(f"Quantidade inválida: {valor!r}.")
+    return int((numero * ESCALA).to_integral_value(ROUND_HALF_UP))
+
+
+def para_base(inteiro):
+    """Inteiro gravado para a unidade base (int quando exato, senão float)."""
+    inteiro = inteiro or 0
+    if inteiro % ESCALA:
+        return inteiro / ESCALA
+    return inteiro // ESCALA
+
+
+def compor(principal, complementar, unidade):
+    """
+    Junta as duas partes do cadastro (principal no múltiplo, ex. kg, e
+    complementar na base, ex. g), ambas já em milésimos, em um inteiro.
+    """
+    return (principal or 0) * FORMATOS[unidade].fator + (complementar or 0)
+
+
+def decompor(inteiro, unidade):
+    """Inverso de compor: (principal, complementar) em milésimos."""
+    fator = FORMATOS[unidade].fator
+    principal, complementar = divmod(inteiro or 0, fator * ESCALA)
+    return principal * ESCALA, complementar
+
+
+# ------------------ FORMATAÇÃO ------------------
+
+def _numero(inteiro):
+    """Milésimos (não negativos) como número pt-BR: 2500 -> '2,5'."""
+    parte, fracao = divmod(inteiro, ESCALA)
+    if not fracao:
+        return str(parte)
+    return f"{parte},{fracao:03d}".rstrip("0")
+
+
+def _formatador(formato):
+    # Regras da unidade resolvidas uma vez; a função devolvida só faz a aritmética
+    base, multiplo = formato.base, formato.multiplo
+    fator = formato.fator * ESCALA
+
+    def formatar(inteiro):
+        inteiro = inteiro or 0
+        sinal = "-" if inteiro < 0 else ""
+        inteiro = abs(inteiro)
+        if multiplo and inteiro >= fator:
+            multiplos, resto = divmod(inteiro, fator)
+            if resto:
+                return f"{sinal}{multiplos} {multiplo} {_numero(resto)} {base}"
+            return f"{sinal}{multiplos} {multiplo}"
+        return f"{sinal}{_numero(inteiro)} {base}"
+
+    return formatar
+
+
+FORMATADORES = {unidade: _formatador(formato) for unidade, formato in FORMATOS.items()}
+
+
+def formatador(unidade):
+    """Função que formata inteiros de uma unidade (regras resolvidas uma vez)."""
+    try:
+        return FORMATADORES[unidade]
+    except KeyError:
+        return _formatador(Formato(unidade or "", "", 1))
+
+
+def formatar(inteiro, unidade):
+    """Inteiro gravado para exibição: 1500000 em 'g' -> '1 kg 500 g'."""
+    return formatador(unidade)(inteiro)
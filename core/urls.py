@@ -3,6 +3,8 @@ from . import views
 
 urlpatterns = [
     path('', views.home, name='home'),
+    path('busca/', views.busca_global, name='busca_global'),
+    path('autocomplete/<str:tipo>/', views.autocomplete, name='autocomplete'),
 
     # Colaboradores
     path('colaboradores/', views.colaboradores_list, name='colaboradores_list'),
@@ -14,12 +16,18 @@ urlpatterns = [
          views.colaboradores_edit, name='colaboradores_edit'),
     path('colaboradores/<int:id>/excluir/',
          views.colaboradores_delete, name='colaboradores_delete'),
+    path('colaboradores/fotos/<str:nome>', views.foto_colaborador,
+         name='foto_colaborador'),
 
     # Insumos
     path('insumos/', views.insumos_list, name='insumos_list'),
     path('insumos/novo/', views.insumos_create, name='insumos_create'),
     path('insumos/<int:id>/editar/', views.insumos_edit, name='insumos_edit'),
     path('insumos/<int:id>/deletar/', views.insumos_delete, name='insumos_delete'),
+    path('insumos/tendencias/', views.insumos_tendencias, name='insumos_tendencias'),
+    path('insumos/a-comprar/', views.insumos_comprar, name='insumos_comprar'),
+    path('insumos/estoque-na-data/', views.estoque_na_data,
+         name='estoque_na_data'),
 
     # Produtos Prontos
     path('produtos/', views.produtos_list, name='produtos_list'),
@@ -30,7 +38,7 @@ urlpatterns = [
     path('catalogo/', views.catalogo_list, name='catalogo_list'),
     path('catalogo/novo/', views.catalogo_create, name='catalogo_create'),
     path('catalogo/<int:pk>/editar/', views.catalogo_edit, name='catalogo_edit'),
-    path('catalogo/<int:pk>/deletar/',
+    path('catalogo/<int:id>/deletar/',
          views.catalogo_delete, name='catalogo_delete'),
 
 
@@ -42,9 +50,21 @@ urlpatterns = [
     # Saída de Insumos
     path('saidas/', views.saida_insumo_list, name='saida_insumo_list'),
     path('saidas/novo/', views.saida_insumo_create, name='saida_insumo_create'),
+    path('saidas/lote/', views.saida_insumo_lote, name='saida_insumo_lote'),
+    path('saidas/lote/api/', views.saida_insumo_lote_api,
+         name='saida_insumo_lote_api'),
     path('saidas/<int:id>/deletar/', views.saida_insumo_delete,
          name='saida_insumo_delete'),
 
+    # Exportações CSV
+    path('exportar/saidas.csv', views.exportar_saidas, name='exportar_saidas'),
+    path('exportar/vistorias.csv', views.exportar_vistorias,
+         name='exportar_vistorias'),
+    path('exportar/fichas.csv', views.exportar_fichas, name='exportar_fichas'),
+
+    # Importação CSV
+    path('importar/', views.importar_dados, name='importar_dados'),
+
     # Criar Usuário
     path('usuarios_create/', views.usuarios_create, name='criar_usuario'),
 
@@ -60,8 +80,8 @@ urlpatterns = [
 
     # Relatório de Insumos (somente Administrador)
     path('relatorio-insumos/', views.relatorio_insumos, name='relatorio_insumos'),
-    path('checklist/<str:data_vistoria>/',
+    path('checklist/<int:id>/',
          views.visualizar_checklist, name='visualizar_checklist'),
-    path('checklist/<str:data_vistoria>/excluir/',
+    path('checklist/<int:id>/excluir/',
          views.excluir_checklist, name='excluir_checklist'),
 ]
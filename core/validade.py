@@ -0,0 +1,108 @@
+# core/validade.py
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, CharField, Count, Q, Subquery, Sum, Value, When
+from django.utils import timezone
+
+from .models import ProdutoPronto, ResumoValidade
+
+DIAS_PROXIMO = 3    # status "proximo" na lista de produtos
+DIAS_SEMANA = 7     # janela "vence na semana" do resumo
+DIAS_HISTORICO = 30  # resumos mais antigos são apagados
+
+STATUS_VALIDADE = ("vencido", "hoje", "proximo", "ok")
+
+
+def filtro_status(status, hoje=None):
+    """
+    Condição de um status de validade como faixa de data_validade, para
+    usar o índice produto_validade_idx (filtrar pela anotação de
+    anotar_status faria o banco avaliar o CASE linha a linha).
+    """
+    hoje = hoje or timezone.localdate()
+    limite = hoje + timedelta(days=DIAS_PROXIMO)
+    return {
+        "vencido": Q(data_validade__lt=hoje),
+        "hoje": Q(data_validade=hoje),
+        "proximo": Q(data_validade__gt=hoje, data_validade__lte=limite),
+        "ok": Q(data_validade__gt=limite),
+    }[status]
+
+
+def anotar_status(produtos, hoje=None):
+    """Anota validade_status (vencido/hoje/proximo/ok) para exibição."""
+    hoje = hoje or timezone.localdate()
+    return produtos.annotate(validade_status=Case(
+        *(When(filtro_status(s, hoje), then=Value(s)) for s in STATUS_VALIDADE[:-1]),
+        default=Value("ok"),
+        output_field=CharField(),
+    ))
+
+
+def marcar_vencidos(hoje=None):
+    """
+    Acerta ProdutoPronto.vencido com um único UPDATE, só nas linhas em que
+    a marca está desatualizada (inclusive validades alteradas depois).
+    Retorna o número de linhas alteradas.
+    """
+    hoje = hoje or timezone.localdate()
+    return ProdutoPronto.objects.filter(
+        Q(vencido=False, data_validade__lt=hoje) | Q(vencido=True, data_validade__gte=hoje)
+    ).update(vencido=Case(
+        When(data_validade__lt=hoje, then=Value(True)),
+        default=Value(False),
+    ))
+
+
+def gerar_resumo(hoje=None):
+    """
+    Marca os vencidos e grava o resumo do dia por item do catálogo, com
+    uma consulta agregada sobre os lotes com estoque até o fim da semana.
+    Retorna (produtos marcados, linhas de resumo).
+    """
+    hoje = hoje or timezone.localdate()
+    semana = hoje + timedelta(days=DIAS_SEMANA)
+    vencido = Q(data_validade__lt=hoje)
+    vence_hoje = Q(data_validade=hoje)
+    na_semana = Q(data_validade__gt=hoje)
+
+    with transaction.atomic():
+        marcados = marcar_vencidos(hoje)
+        linhas = (
+            ProdutoPronto.objects.filter(quantidade__gt=0, data_validade__lte=semana)
+            .values("catalogo")
+            .annotate(
+                lotes_vencidos=Count("id", filter=vencido),
+                quantidade_vencida=Sum("quantidade", filter=vencido, default=0),
+                lotes_hoje=Count("id", filter=vence_hoje),
+                quantidade_hoje=Sum("quantidade", filter=vence_hoje, default=0),
+                lotes_semana=Count("id", filter=na_semana),
+                quantidade_semana=Sum("quantidade", filter=na_semana, default=0),
+            )
+            .order_by()
+        )
+        resumos = [
+            ResumoValidade(data=hoje, catalogo_id=linha.pop("catalogo"), **linha)
+            for linha in linhas
+        ]
+        ResumoValidade.objects.filter(
+            Q(data=hoje) | Q(data__lt=hoje - timedelta(days=DIAS_HISTORICO))).delete()
+        ResumoValidade.objects.bulk_create(resumos)
+    return marcados, len(resumos)
+
+
+def resumo_atual():
+    """
+    Linhas do resumo mais recente (uma consulta) e os totais somados.
+    Retorna (data do resumo ou None, linhas, totais).
+    """
+    ultima = ResumoValidade.objects.order_by("-data").values("data")[:1]
+    linhas = list(
+        ResumoValidade.objects.filter(data=Subquery(ultima))
+        .select_related("catalogo")
+        .order_by("-lotes_vencidos", "-lotes_hoje", "-lotes_semana")
+    )
+    campos = ("lotes_vencidos", "lotes_hoje", "lotes_semana")
+    totais = {campo: sum(getattr(l, campo) for l in linhas) for campo in campos}
+    return (linhas[0].data if linhas else None), linhas, totais
@@ -0,0 +1,65 @@
+# core/versoes.py
+# Versões por modelo para o cache de consultas e fragmentos de template.
+# Cada modelo tem um contador no cache ("core:versao:<modelo>") que os
+# sinais em core/signals.py incrementam a cada post_save/post_delete (o
+# código que usa update()/bulk_* chama invalidar() diretamente). As chaves
+# de cache incluem as versões de que dependem, então uma alteração torna
+# as entradas antigas inalcançáveis sem precisar apagá-las.
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _chave(modelo):
+    return f"core:versao:{modelo}"
+
+
+def _nova_versao():
+    # Baseada no relógio: se o contador sumir do cache (expiração/LRU),
+    # o valor recriado não colide com versões já usadas em chaves antigas.
+    return time.time_ns() // 1000
+
+
+def versao(*modelos):
+    """Versão combinada dos modelos, para usar em chaves de cache (ex.: '12-7')."""
+    chaves = [_chave(m) for m in modelos]
+    atuais = cache.get_many(chaves)
+    faltando = {c: _nova_versao() for c in chaves if c not in atuais}
+    if faltando:
+        cache.set_many(faltando, None)
+        atuais.update(faltando)
+    return "-".join(str(atuais[c]) for c in chaves)
+
+
+def _incrementar(modelos):
+    for modelo in modelos:
+        try:
+            cache.incr(_chave(modelo))
+        except ValueError:
+            cache.set(_chave(modelo), _nova_versao(), None)
+
+
+def invalidar(*modelos):
+    """
+    Incrementa a versão dos modelos (nomes como em _meta.model_name),
+    invalidando o que depende deles. Dentro de uma transação, só após o
+    commit, para que ninguém guarde no cache dados ainda não gravados
+    sob a versão nova.
+    """
+    transaction.on_commit(lambda: _incrementar(modelos))
+
+
+def em_cache(nome, modelos, calcular, timeout=None):
+    """
+    Resultado de `calcular()` guardado sob `nome` + versões dos modelos.
+    `calcular` deve devolver algo serializável (ex.: list(queryset.values())).
+    """
+    timeout = settings.CACHE_LISTAS_TIMEOUT if timeout is None else timeout
+    chave = f"core:consulta:{nome}:{versao(*modelos)}"
+    resultado = cache.get(chave)
+    if resultado is None:
+        resultado = calcular()
+        cache.set(chave, resultado, timeout)
+    return resultado
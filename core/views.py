@@ -1,17 +1,36 @@
 from collections import defaultdict
-from datetime import date, timedelta
+from datetime import datetime, time, timedelta
 
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponseNotModified, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.db.models import Q, Sum, Avg, F, FloatField
+from django.db import transaction
+from django.core.paginator import Paginator
+from django.db.models import (
+    Q, Sum, Avg, F, FloatField, OuterRef, Subquery, Prefetch
+)
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_POST
 from django.contrib.auth.hashers import check_password
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.functional import SimpleLazyObject
 from django.contrib.auth.models import User, Group
+from urllib.parse import urlencode
+import io
 import json
 
+from . import (
+    busca, consumo, estoque, exportacoes, fotos, importacoes, lotes, movimentos, previsao,
+    unidades, validade, versoes,
+)
+from .contadores import registrar_movimentos
 from .decorators import check_group
+from .papeis import pagina_inicial, papeis, pertence
+from .relatorios import calcular_relatorio_insumos, desperdicio_por_unidade
 from .models import (
     Colaborador,
     Produto,
@@ -21,15 +40,29 @@ from .models import (
     SaidaInsumo,
     Insumo,
     CatalogoProduto,
-    VistoriaInsumo  # adicionado
+    Vistoria,
+    VistoriaInsumo,  # adicionado
+    MovimentoEstoque,
+    PrevisaoInsumo,
 )
 from .forms import (
     ProdutoProntoForm,
     FichaProducaoForm,
     InsumoForm,
     SaidaInsumoForm,
-    ColaboradorForm
+    ColaboradorForm,
+    FiltroInsumoForm,
+    FiltroSaidasForm,
 )
+from .widgets import SUFIXO_SEM_JS, buscar_por_nome
+
+
+def _data_get(request, nome):
+    """Data AAAA-MM-DD de um parâmetro GET; ausente ou inválida (ex. 2025-02-30) vale None."""
+    try:
+        return parse_date(request.GET.get(nome) or "")
+    except ValueError:
+        return None
 
 
 # =========================================================
@@ -45,14 +78,9 @@ def login_view(request):
         if user:
             login(request, user)
             # redireciona pelo grupo
-            if user.is_superuser or user.groups.filter(name="Administrador").exists():
-                return redirect("home")
-            elif user.groups.filter(name="RH").exists():
-                return redirect("colaboradores_list")
-            elif user.groups.filter(name="Insumos").exists():
-                return redirect("insumos_list")
-            elif user.groups.filter(name="Confeitaria").exists():
-                return redirect("produtos_list")
+            destino = pagina_inicial(user)
+            if destino:
+                return redirect(destino)
             else:
                 messages.error(request, "Usuário sem grupo definido.")
                 return redirect("login")
@@ -74,13 +102,108 @@ def logout_view(request):
 
 @login_required
 def home(request):
-    context = {
-        "is_admin": request.user.is_superuser or request.user.groups.filter(name="Administrador").exists(),
-        "is_rh": request.user.groups.filter(name="RH").exists() or request.user.is_superuser,
-        "is_insumo": request.user.groups.filter(name="Insumos").exists() or request.user.is_superuser,
-        "is_confeitaria": request.user.groups.filter(name="Confeitaria").exists() or request.user.is_superuser,
-    }
-    return render(request, "core/home.html", context)
+    contexto = papeis(request.user)
+    if contexto["is_confeitaria"]:
+        # Contagens do resumo diário (comando resumo_validade), sem varrer os produtos
+        data, linhas, totais = validade.resumo_atual()
+        contexto.update(resumo_data=data, resumo_linhas=linhas[:5], resumo_totais=totais)
+    return render(request, "core/home.html", contexto)
+
+
+# =========================================================
+# BUSCA GLOBAL
+# =========================================================
+
+@login_required
+def busca_global(request):
+    """
+    Busca sem acentos e por prefixo em colaboradores, insumos, catálogo e
+    fichas, limitada aos cadastros que o usuário pode acessar.
+    """
+    query = request.GET.get('q', '').strip()
+    resultados = busca.buscar(
+        query, tipos=busca.tipos_permitidos(request.user)) if query else []
+    return render(request, "core/busca.html", {
+        "query": query,
+        "resultados": resultados,
+    })
+
+
+# =========================================================
+# AUTOCOMPLETE (widgets dos formulários)
+# =========================================================
+
+LIMITE_AUTOCOMPLETE = 20
+LIMITE_AUTOCOMPLETE_MAX = 50
+
+# tipo -> grupos com acesso, consulta base, campo de ordenação/prefixo e,
+# quando houver, o tipo correspondente no índice da busca global
+AUTOCOMPLETE = {
+    "colaboradores": {
+        "grupos": ["RH", "Insumos"],
+        "consulta": lambda: Colaborador.objects.only("id", "nome"),
+        "campo": "nome",
+        "busca": "colaborador",
+    },
+    "insumos": {
+        "grupos": ["Insumos", "Administrador"],  # filtro do relatório de insumos
+        "consulta": lambda: Insumo.objects.all(),
+        "campo": "nome",
+        "busca": "insumo",
+    },
+    "catalogo": {
+        "grupos": ["Confeitaria"],
+        "consulta": lambda: CatalogoProduto.objects.only("id", "nome"),
+        "campo": "nome",
+        "busca": "catalogo",
+    },
+    "usuarios": {
+        "grupos": ["RH"],
+        "consulta": lambda: User.objects.only("id", "username"),
+        "campo": "username",
+    },
+}
+
+
+@login_required
+def autocomplete(request, tipo):
+    """
+    JSON {"resultados": [{"id", "texto"}]} com no máximo `limite` itens.
+    Com `q`, busca por prefixo (pelo índice da busca global, sem acentos,
+    quando o tipo estiver indexado); sem `q`, os primeiros em ordem alfabética.
+    """
+    config = AUTOCOMPLETE.get(tipo)
+    if config is None:
+        raise Http404("Tipo de autocomplete desconhecido.")
+    if not pertence(request.user, config["grupos"]):
+        return JsonResponse({"erro": "Acesso negado."}, status=403)
+
+    query = request.GET.get("q", "").strip()
+    try:
+        limite = max(1, min(int(request.GET.get("limite") or LIMITE_AUTOCOMPLETE),
+                            LIMITE_AUTOCOMPLETE_MAX))
+    except (TypeError, ValueError):
+        limite = LIMITE_AUTOCOMPLETE
+
+    consulta, campo = config["consulta"](), config["campo"]
+
+    def _resultados(objetos):
+        return [{"id": obj.pk, "texto": str(obj)} for obj in objetos]
+
+    if query and config.get("busca"):
+        ids = [r.objeto_id for r in busca.consultar(query, [config["busca"]], limite)]
+        encontrados = consulta.in_bulk(ids)
+        resultados = _resultados(encontrados[i] for i in ids if i in encontrados)
+    elif query:
+        resultados = _resultados(consulta.filter(
+            **{f"{campo}__istartswith": query}).order_by(campo)[:limite])
+    else:
+        # Lista inicial (ao focar o campo) é igual para todos: cache por versão
+        resultados = versoes.em_cache(
+            f"autocomplete:{tipo}:{limite}", [consulta.model._meta.model_name],
+            lambda: _resultados(consulta.order_by(campo)[:limite]))
+
+    return JsonResponse({"resultados": resultados})
 
 
 # =========================================================
@@ -92,11 +215,15 @@ def home(request):
 def colaboradores_list(request):
     query = request.GET.get('q')
     if query:
+        # Índice da busca global: ignora acentos e aceita prefixos
         colaboradores = Colaborador.objects.filter(
-            nome__icontains=query).order_by('nome')
+            id__in=busca.ids(query, "colaborador")).order_by('nome')
     else:
         colaboradores = Colaborador.objects.all().order_by('nome')
-    return render(request, "core/colaboradores_list.html", {"colaboradores": colaboradores})
+    return render(request, "core/colaboradores_list.html", {
+        "colaboradores": colaboradores,
+        "query": query or "",
+    })
 
 
 @login_required
@@ -149,6 +276,28 @@ def colaboradores_detail(request, id):
     return render(request, "core/colaboradores_detail.html", {"colaborador": colaborador})
 
 
+# Fotos têm nome pelo hash do conteúdo: a URL nunca muda de conteúdo
+CACHE_FOTOS = 60 * 60 * 24 * 365
+
+
+@login_required
+def foto_colaborador(request, nome):
+    """Serve uma foto processada (original ou variante) com cache longo."""
+    if not fotos.NOME_VALIDO.match(nome):
+        raise Http404
+    caminho = f"{fotos.PASTA}/{nome}"
+    if not default_storage.exists(caminho):
+        raise Http404
+    etag = f'"{nome}"'
+    if etag in request.headers.get("If-None-Match", ""):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(default_storage.open(caminho, "rb"))
+    response["ETag"] = etag
+    response["Cache-Control"] = f"private, max-age={CACHE_FOTOS}, immutable"
+    return response
+
+
 # =========================================================
 # USUÁRIOS
 # =========================================================
@@ -189,8 +338,13 @@ def usuarios_create(request):
 @login_required
 @check_group("Administrador")
 def usuarios_list(request):
-    usuarios = User.objects.all().order_by("username")
-    return render(request, "core/usuarios_list.html", {"usuarios": usuarios})
+    # A consulta só é avaliada se o fragmento da tabela não estiver em cache
+    usuarios = User.objects.prefetch_related("groups").order_by("username")
+    return render(request, "core/usuarios_list.html", {
+        "usuarios": usuarios,
+        "versao": versoes.versao("user", "group"),
+        "cache_timeout": settings.CACHE_LISTAS_TIMEOUT,
+    })
 
 
 @login_required
@@ -201,7 +355,7 @@ def usuario_delete(request, id):
         user.delete()
         messages.success(
             request, f"Usuário {user.username} deletado com sucesso!")
-        return redirect("listar_usuarios")
+        return redirect("usuarios_list")
     return render(request, "core/delete.html", {"obj": user})
 
 
@@ -212,8 +366,78 @@ def usuario_delete(request, id):
 @login_required
 @check_group("Insumos")
 def insumos_list(request):
-    insumos = Insumo.objects.all()
-    return render(request, "core/insumos_list.html", {"insumos": insumos})
+    def com_series():
+        # Uso dos últimos 12 meses de todos os insumos: uma consulta agrupada
+        # no consumo diário, sem tocar nas saídas/fichas
+        _, series = consumo.mensal()
+        insumos = list(Insumo.objects.all())
+        for insumo in insumos:
+            insumo.serie_uso = series.get(insumo.id, {}).get("usado")
+        return insumos
+
+    # As consultas só são avaliadas se o fragmento da tabela não estiver em cache
+    return render(request, "core/insumos_list.html", {
+        "insumos": SimpleLazyObject(com_series),
+        "versao": versoes.versao("insumo", "consumodiario"),
+        "mes": timezone.localdate().strftime("%Y-%m"),
+        "cache_timeout": settings.CACHE_LISTAS_TIMEOUT,
+    })
+
+
+@login_required
+@check_group("Insumos")
+def insumos_tendencias(request):
+    """
+    Retirado, usado e desperdício mês a mês (GET: meses=3..24, padrão 12),
+    lidos só do consumo diário. Com insumo=<id>, detalha os meses do insumo.
+    """
+    try:
+        quantidade = min(max(int(request.GET.get("meses") or consumo.MESES_TENDENCIA), 3), 24)
+    except ValueError:
+        quantidade = consumo.MESES_TENDENCIA
+    insumo_id = request.GET.get("insumo")
+    insumos = Insumo.objects.only("id", "nome", "unidade_base").order_by("nome")
+    if insumo_id and insumo_id.isdigit():
+        insumos = insumos.filter(pk=insumo_id)
+    insumos = list(insumos)
+    meses, series = consumo.mensal(
+        insumos=[i.id for i in insumos] if insumo_id else None, quantidade=quantidade)
+
+    linhas = []
+    for insumo in insumos:
+        serie = series.get(insumo.id)
+        if serie is None and not insumo_id:
+            continue  # sem movimento no período
+        serie = serie or {campo: [0] * len(meses) for campo in consumo.CAMPOS}
+        linhas.append({
+            "insumo": insumo,
+            "serie": serie,
+            "totais": {campo: sum(valores) for campo, valores in serie.items()},
+            "meses": list(zip(meses, *(serie[campo] for campo in consumo.CAMPOS))),
+        })
+
+    return render(request, "core/insumos_tendencias.html", {
+        "linhas": linhas,
+        "meses": meses,
+        "quantidade": quantidade,
+        "detalhe": bool(insumo_id) and bool(linhas),
+    })
+
+
+@login_required
+@check_group("Insumos")
+def insumos_comprar(request):
+    """
+    Insumos com estoque no ponto de pedido ou abaixo, pela última
+    previsão gravada (comando prever_consumo). GET todos=1 lista todos.
+    """
+    todos = request.GET.get("todos") == "1"
+    previsoes = previsao.a_comprar(todos=todos)
+    return render(request, "core/insumos_comprar.html", {
+        "previsoes": previsoes,
+        "todos": todos,
+        "data": PrevisaoInsumo.objects.order_by("-data").values_list("data", flat=True).first(),
+    })
 
 
 @login_required
@@ -221,7 +445,11 @@ def insumos_list(request):
 def insumos_create(request):
     form = InsumoForm(request.POST or None)
     if request.method == "POST" and form.is_valid():
-        form.save()
+        with transaction.atomic():
+            insumo = form.save()
+            movimentos.registrar(
+                insumo.id, "entrada", estoque=insumo.quantidade_total,
+                referencia=f"insumo:{insumo.id}")
         messages.success(request, "Insumo cadastrado com sucesso!")
         return redirect("insumos_list")
     return render(request, "core/form.html", {"form": form, "titulo": "Cadastrar Insumo"})
@@ -231,9 +459,16 @@ def insumos_create(request):
 @check_group("Insumos")
 def insumos_edit(request, id):
     insumo = get_object_or_404(Insumo, id=id)
+    quantidade_anterior = insumo.quantidade_total
     form = InsumoForm(request.POST or None, instance=insumo)
     if request.method == "POST" and form.is_valid():
-        form.save()
+        with transaction.atomic():
+            insumo = form.save()
+            diferenca = insumo.quantidade_total - quantidade_anterior
+            if diferenca:
+                movimentos.registrar(
+                    insumo.id, "ajuste", estoque=diferenca,
+                    referencia=f"insumo:{insumo.id}")
         messages.success(request, "Insumo atualizado com sucesso!")
         return redirect("insumos_list")
     return render(request, "core/form.html", {"form": form, "titulo": "Editar Insumo"})
@@ -249,15 +484,97 @@ def insumos_delete(request, id):
     return render(request, "core/delete.html", {"obj": insumo})
 
 
+@login_required
+@check_group("Insumos")
+def estoque_na_data(request):
+    """
+    Saldos de todos os insumos ao final de uma data (GET: data=AAAA-MM-DD),
+    calculados pelo livro de movimentações a partir do snapshot mais próximo.
+    """
+    data = _data_get(request, "data") or timezone.localdate()
+    instante = timezone.make_aware(datetime.combine(data, time.max))
+    saldos = movimentos.saldos_em(instante)
+
+    itens = []
+    for insumo in Insumo.objects.only("id", "nome", "unidade_base").order_by("nome"):
+        estoque, em_uso = saldos.get(insumo.id, (0, 0))
+        itens.append({"insumo": insumo, "estoque": estoque, "em_uso": em_uso})
+
+    return render(request, "core/estoque_na_data.html", {"itens": itens, "data": data})
+
+
 # =========================================================
 # SAÍDA DE INSUMOS
 # =========================================================
 
+SAIDAS_POR_PAGINA = 50
+
+
 @login_required
 @check_group("Insumos")
 def saida_insumo_list(request):
-    saidas = SaidaInsumo.objects.all().order_by("-data")
-    return render(request, "core/saida_insumo_list.html", {"saidas": saidas})
+    """
+    Histórico de saídas com paginação por cursor (keyset) em (data, id),
+    do mais recente para o mais antigo.
+    Filtros via GET: data_inicio, data_fim, insumo e colaborador.
+    """
+    saidas = SaidaInsumo.objects.select_related(
+        "insumo", "colaborador_entregando", "colaborador_retira"
+    ).order_by("-data", "-id")
+
+    filtros = {
+        "data_inicio": request.GET.get("data_inicio", ""),
+        "data_fim": request.GET.get("data_fim", ""),
+        "insumo": request.GET.get("insumo", ""),
+        "colaborador": request.GET.get("colaborador", ""),
+    }
+    # Limites do dia como instantes, para o banco usar o índice (-data, -id)
+    data_inicio = _data_get(request, "data_inicio")
+    data_fim = _data_get(request, "data_fim")
+    if data_inicio:
+        saidas = saidas.filter(data__gte=consumo.inicio_do_dia(data_inicio))
+    if data_fim:
+        saidas = saidas.filter(data__lt=consumo.inicio_do_dia(data_fim + timedelta(days=1)))
+    if filtros["insumo"].isdigit():
+        saidas = saidas.filter(insumo_id=filtros["insumo"])
+    if filtros["colaborador"].isdigit():
+        saidas = saidas.filter(
+            Q(colaborador_retira_id=filtros["colaborador"]) |
+            Q(colaborador_entregando_id=filtros["colaborador"])
+        )
+
+    # Cursor no formato "<data ISO>_<id>" da última linha da página anterior
+    cursor = request.GET.get("cursor", "")
+    data_cursor, _, id_cursor = cursor.rpartition("_")
+    try:
+        data_cursor = parse_datetime(data_cursor)
+    except ValueError:
+        data_cursor = None  # cursor adulterado: volta à primeira página
+    if data_cursor and timezone.is_naive(data_cursor):
+        data_cursor = timezone.make_aware(data_cursor)
+    if data_cursor and id_cursor.isdigit():
+        saidas = saidas.filter(
+            Q(data__lt=data_cursor) | Q(data=data_cursor, id__lt=id_cursor)
+        )
+
+    pagina = list(saidas[:SAIDAS_POR_PAGINA + 1])
+    proximo_cursor = None
+    if len(pagina) > SAIDAS_POR_PAGINA:
+        pagina = pagina[:SAIDAS_POR_PAGINA]
+        ultima = pagina[-1]
+        proximo_cursor = f"{ultima.data.isoformat()}_{ultima.id}"
+
+    filtros_query = urlencode({k: v for k, v in filtros.items() if v})
+
+    return render(request, "core/saida_insumo_list.html", {
+        "saidas": pagina,
+        "proximo_cursor": proximo_cursor,
+        "primeira_pagina": not cursor,
+        "filtros": filtros,
+        "filtros_query": filtros_query,
+        # Sem validar (o filtro já usou os ids): cada select busca só o escolhido
+        "filtro_form": FiltroSaidasForm(initial=filtros),
+    })
 
 
 @login_required
@@ -276,47 +593,145 @@ def saida_insumo_create(request):
             messages.error(request, "Você precisa informar a quantidade.")
             return redirect(request.path)
 
-        if quantidade > insumo.quantidade_total:
+        try:
+            with transaction.atomic():
+                # Baixa o estoque só se houver saldo (UPDATE condicional)
+                estoque.retirar(insumo.id, quantidade)
+
+                # Salva a saída no modelo
+                saida.quantidade_principal = quantidade
+                saida.quantidade_complementar = 0  # zera complementar
+                saida.restante = quantidade  # lote aberto com tudo que foi retirado
+                saida.save()  # contador e consumo diário acompanham (core/signals.py)
+                movimentos.registrar(
+                    insumo.id, "saida", estoque=-quantidade, em_uso=quantidade,
+                    referencia=f"saida:{saida.id}")
+        except estoque.EstoqueInsuficiente:
+            insumo.refresh_from_db(fields=["quantidade_total"])
             messages.error(
                 request,
-                f"A quantidade solicitada ({quantidade} {insumo.unidade_base}) "
-                f"excede o estoque disponível ({insumo.quantidade_total} {insumo.unidade_base})."
+                f"A quantidade solicitada ({unidades.formatar(quantidade, insumo.unidade_base)}) "
+                f"excede o estoque disponível "
+                f"({unidades.formatar(insumo.quantidade_total, insumo.unidade_base)})."
             )
             return redirect(request.path)
 
-        # Atualiza o estoque
-        insumo.quantidade_total -= quantidade
-        insumo.save()
-
-        # Salva a saída no modelo
-        saida.quantidade_principal = quantidade
-        saida.quantidade_complementar = 0  # zera complementar
-        saida.save()
-
         messages.success(request, "Saída de insumo registrada com sucesso.")
         return redirect("saida_insumo_list")
 
     return render(request, "core/form.html", {"form": form, "titulo": "Registrar Saída de Insumo"})
 
 
+LINHAS_LOTE = 10
+
+
+@login_required
+@check_group("Insumos")
+def saida_insumo_lote(request):
+    """
+    Registro de várias saídas em uma única tela/transação.
+    Cada linha do formulário vira uma saída; linhas em branco são ignoradas.
+    """
+    pendentes = []
+    if request.method == "POST":
+        campos = ("insumo", "colaborador_entregando",
+                  "colaborador_retira", "unidade", "quantidade")
+        colunas = [request.POST.getlist(f"{campo}[]") for campo in campos]
+        # Sem JavaScript os selects chegam vazios e valem os nomes digitados
+        for coluna, campo, modelo in ((colunas[0], "insumo", Insumo),
+                                      (colunas[1], "colaborador_entregando", Colaborador),
+                                      (colunas[2], "colaborador_retira", Colaborador)):
+            for i, nome in enumerate(request.POST.getlist(f"{campo}{SUFIXO_SEM_JS}[]")[:len(coluna)]):
+                if nome.strip() and not coluna[i]:
+                    pk = buscar_por_nome(modelo.objects.all(), "nome", nome.strip())
+                    coluna[i] = nome.strip() if pk is None else str(pk)
+        linhas = [
+            dict(zip(campos, valores))
+            for valores in zip(*colunas)
+            if any(valores[i] for i in (0, 4))  # ignora linhas vazias
+        ]
+        if not linhas:
+            messages.error(request, "Informe ao menos uma saída.")
+            return redirect(request.path)
+
+        resultados = estoque.registrar_saidas_em_lote(linhas)
+        registradas = sum(1 for r in resultados if r["ok"])
+        if registradas == len(resultados):
+            messages.success(
+                request, f"{registradas} saída(s) registrada(s) com sucesso.")
+            return redirect("saida_insumo_list")
+        messages.warning(
+            request, f"{registradas} de {len(resultados)} saída(s) registrada(s). Verifique as linhas com erro.")
+        # Reapresenta só as linhas com erro (as demais já foram gravadas)
+        pendentes = [
+            dict(linha, erro=resultado["erro"])
+            for linha, resultado in zip(linhas, resultados)
+            if not resultado["ok"]
+        ]
+        # Os selects usam autocomplete: carrega só os valores já escolhidos
+        def _id(valor):
+            return int(valor) if valor.isdigit() else None
+
+        insumos = Insumo.objects.in_bulk(
+            {_id(p["insumo"]) for p in pendentes} - {None})
+        colaboradores = Colaborador.objects.only("id", "nome").in_bulk(
+            {_id(p[campo]) for p in pendentes
+             for campo in ("colaborador_entregando", "colaborador_retira")} - {None})
+        for p in pendentes:
+            p["insumo_obj"] = insumos.get(_id(p["insumo"]))
+            p["entregando_obj"] = colaboradores.get(_id(p["colaborador_entregando"]))
+            p["retira_obj"] = colaboradores.get(_id(p["colaborador_retira"]))
+
+    return render(request, "core/saida_insumo_lote.html", {
+        "pendentes": pendentes,
+        "linhas_vazias": range(0 if pendentes else LINHAS_LOTE),
+        "unidades": SaidaInsumo.UNIDADES,
+    })
+
+
+@login_required
+@check_group("Insumos")
+@require_POST
+def saida_insumo_lote_api(request):
+    """
+    Endpoint JSON do registro em lote.
+    Corpo: {"linhas": [{"insumo": 1, "colaborador_entregando": 2,
+             "colaborador_retira": 3, "quantidade": 500, "unidade": "g"}, ...]}
+    Resposta: {"resultados": [{"linha", "ok", "erro", "saida_id"}, ...]}
+    """
+    try:
+        linhas = json.loads(request.body or b"{}").get("linhas")
+    except (ValueError, AttributeError):
+        linhas = None
+    if not isinstance(linhas, list) or not all(isinstance(l, dict) for l in linhas):
+        return JsonResponse({"erro": "Envie um objeto JSON com a lista 'linhas'."}, status=400)
+
+    resultados = estoque.registrar_saidas_em_lote(linhas)
+    return JsonResponse({"resultados": resultados})
+
+
 @login_required
 @check_group("Insumos")
 def saida_insumo_delete(request, id):
     """
     Deleta uma saída de insumo e devolve a quantidade retirada ao insumo original.
     """
-    saida = get_object_or_404(SaidaInsumo, pk=id)
+    saida = get_object_or_404(
+        SaidaInsumo.objects.select_related("insumo"), pk=id)
     insumo = saida.insumo
 
     if request.method == "POST":
-        # Recupera a quantidade total em unidade base
-        quantidade_devolvida = saida.quantidade_total
-        # Atualiza o estoque do insumo
-        insumo.quantidade_total += quantidade_devolvida
-        insumo.save()
-
-        # Deleta a saída
-        saida.delete()
+        # Só o saldo do lote volta ao estoque; o já consumido fica nas fichas
+        quantidade_devolvida = saida.restante
+        with transaction.atomic():
+            # Atualiza o estoque do insumo
+            estoque.devolver(insumo.id, quantidade_devolvida)
+
+            # Deleta a saída (contador e consumo diário são descontados em core/signals.py)
+            movimentos.registrar(
+                insumo.id, "devolucao", estoque=quantidade_devolvida,
+                em_uso=-quantidade_devolvida, referencia=f"saida:{saida.id}")
+            saida.delete()
         messages.success(
             request, f"Saída de {insumo.nome} removida com sucesso e estoque atualizado.")
         # ajuste para a sua URL de listagem de saídas
@@ -324,6 +739,82 @@ def saida_insumo_delete(request, id):
 
     return render(request, "core/saida_insumo_confirm_delete.html", {"saida": saida})
 
+# =========================================================
+# EXPORTAÇÕES CSV
+# =========================================================
+
+def _periodo(request):
+    # Datas inválidas são ignoradas, como nos filtros das listas
+    return _data_get(request, "data_inicio"), _data_get(request, "data_fim")
+
+
+@login_required
+@check_group("Insumos")
+def exportar_saidas(request):
+    return exportacoes.resposta_csv(
+        "saidas.csv",
+        ["ID", "Data", "Insumo", "Qtd Principal", "Qtd Complementar",
+         "Unidade", "Entregue por", "Retirado por"],
+        exportacoes.linhas_saidas(*_periodo(request)),
+    )
+
+
+@login_required
+@check_group(["Administrador", "Insumos"])
+def exportar_vistorias(request):
+    return exportacoes.resposta_csv(
+        "vistorias.csv",
+        ["Checklist", "Data", "Insumo", "Retirado", "Usado", "Teórico", "Real", "Desperdício"],
+        exportacoes.linhas_vistorias(*_periodo(request)),
+    )
+
+
+@login_required
+@check_group("Confeitaria")
+def exportar_fichas(request):
+    return exportacoes.resposta_csv(
+        "fichas.csv",
+        ["Ficha", "Data Fabricação", "Produto", "Categoria", "Colaborador",
+         "Assinado por", "Data Assinatura", "Insumo", "Qtd Usada", "Unidade"],
+        exportacoes.linhas_fichas(*_periodo(request)),
+    )
+
+
+ERROS_IMPORTACAO_EXIBIDOS = 200
+
+
+@login_required
+@check_group("Administrador")
+def importar_dados(request):
+    """
+    Upload de CSV para cadastro em massa de insumos, catálogo ou colaboradores.
+    O arquivo é lido em streaming e gravado em lotes (ver core/importacoes.py).
+    """
+    resultado = None
+    tipo = request.POST.get("tipo", "")
+    if request.method == "POST":
+        arquivo = request.FILES.get("arquivo")
+        if tipo not in importacoes.TIPOS or not arquivo:
+            messages.error(request, "Selecione o tipo e o arquivo CSV.")
+        else:
+            texto = io.TextIOWrapper(arquivo.file, encoding="utf-8-sig", newline="")
+            try:
+                resultado = importacoes.importar_csv(tipo, texto)
+            except importacoes.ArquivoInvalido as e:
+                messages.error(request, f"{e} Nenhuma linha foi importada.")
+            else:
+                messages.success(
+                    request,
+                    f"{resultado['criados']} criado(s), {resultado['atualizados']} atualizado(s), "
+                    f"{len(resultado['erros'])} erro(s).")
+    return render(request, "core/importar_dados.html", {
+        "tipos": sorted(importacoes.TIPOS),
+        "tipo": tipo,
+        "erros": resultado["erros"][:ERROS_IMPORTACAO_EXIBIDOS] if resultado else [],
+        "total_erros": len(resultado["erros"]) if resultado else 0,
+    })
+
+
 # =========================================================
 # PRODUTOS
 # =========================================================
@@ -331,35 +822,48 @@ def saida_insumo_delete(request, id):
 # -------------------- LISTA DE PRODUTOS --------------------
 
 
+PRODUTOS_POR_PAGINA = 50
+
+
 @login_required
 @check_group("Confeitaria")
 def produtos_list(request):
     """
-    Exibe todos os produtos prontos cadastrados.
+    Exibe os produtos prontos cadastrados, paginados.
+    A ficha mais recente e o status de validade (vencido/hoje/proximo/ok)
+    vêm anotados na própria consulta. Filtro opcional via GET: status
+    (aplicado como faixa de data_validade, que é indexada).
     Acesso: grupo Confeitaria e Administrador.
     """
-    produtos = ProdutoPronto.objects.select_related('catalogo').all()
-
-    for p in produtos:
-        # Verifica se há ficha de produção associada
-        ficha = FichaProducao.objects.filter(produto=p).first()
-        p.ficha_existe = bool(ficha)
-        p.ficha = ficha
-
-        # Define classe CSS conforme a validade
-        if p.data_validade:
-            if p.data_validade < date.today():
-                p.row_class = "produto-vencido"
-            elif p.data_validade == date.today():
-                p.row_class = "produto-hoje"
-            elif p.data_validade <= date.today() + timedelta(days=3):
-                p.row_class = "produto-proximo"
-            else:
-                p.row_class = ""
-        else:
-            p.row_class = ""
-
-    return render(request, "core/produtos_list.html", {"produtos": produtos})
+    hoje = timezone.localdate()
+    ultima_ficha = FichaProducao.objects.filter(
+        produto=OuterRef("pk")).order_by("-id").values("id")[:1]
+
+    produtos = validade.anotar_status(
+        ProdutoPronto.objects.select_related("catalogo").annotate(
+            ficha_id=Subquery(ultima_ficha)),
+        hoje,
+    ).order_by("id")
+
+    status = request.GET.get("status")
+    if status in validade.STATUS_VALIDADE:
+        produtos = produtos.filter(validade.filtro_status(status, hoje))
+
+    pagina = request.GET.get("page")
+    # Preguiçoso: contagem e página só são consultadas se o fragmento da
+    # tabela não estiver em cache (chave: versões + status + página + dia)
+    page_obj = SimpleLazyObject(
+        lambda: Paginator(produtos, PRODUTOS_POR_PAGINA).get_page(pagina))
+
+    return render(request, "core/produtos_list.html", {
+        "produtos": page_obj,
+        "page_obj": page_obj,
+        "status": status,
+        "pagina": pagina,
+        "hoje": hoje,
+        "versao": versoes.versao("produtopronto", "catalogoproduto", "fichaproducao"),
+        "cache_timeout": settings.CACHE_LISTAS_TIMEOUT,
+    })
 
 
 # -------------------- CADASTRAR PRODUTO --------------------
@@ -418,6 +922,9 @@ def produtos_delete(request, id):
     return render(request, "core/confirm_delete.html", {"obj": produto})
 
 
+CHECKLISTS_POR_PAGINA = 20
+
+
 @login_required
 def relatorio_insumos(request):
     """
@@ -426,89 +933,149 @@ def relatorio_insumos(request):
     - Quantidade usada (FichaInsumo)
     - Quantidade teórica (retirado - usado)
     Permite registrar vistoria (checklist) e salvar histórico.
+    Filtros opcionais via GET: data_inicio, data_fim e insumo.
     """
-    relatorio = []
-    insumos = Insumo.objects.all()
-
-    for insumo in insumos:
-        # Calcula quantidade retirada
-        saida_qs = SaidaInsumo.objects.filter(insumo=insumo)
-        soma_principal = saida_qs.aggregate(
-            total=Sum('quantidade_principal'))['total'] or 0
-        soma_complementar = saida_qs.aggregate(
-            total=Sum('quantidade_complementar'))['total'] or 0
-        retirado = float(soma_principal) + float(soma_complementar)
-
-        # Calcula quantidade usada em fichas
-        usado = float(FichaInsumo.objects.filter(insumo=insumo).aggregate(
-            total=Sum('quantidade_usada')
-        )['total'] or 0)
-
-        # Calcula teórico
-        teorico = max(retirado - usado, 0)
-
-        relatorio.append({
-            'insumo': insumo,
-            'retirado': retirado,
-            'usado': usado,
-            'teorico': teorico,
-        })
-
     # Salvar checklist / vistoria
     if request.method == "POST":
-        for item in relatorio:
-            real_str = request.POST.get(f"real_{item['insumo'].id}", "")
-            if not real_str:
+        reais = {}
+        for campo, real_str in request.POST.items():
+            insumo_id = campo.removeprefix("real_")
+            if campo == insumo_id or not insumo_id.isdigit() or not real_str:
                 continue
             try:
-                real = float(real_str)
+                reais[int(insumo_id)] = unidades.para_inteiro(real_str)
             except ValueError:
                 continue  # Ignora valores inválidos
-            desperdicio = item['teorico'] - real
-
-            VistoriaInsumo.objects.create(
-                insumo=item['insumo'],
-                quantidade_retirada=item['retirado'],
-                quantidade_usada=item['usado'],
-                quantidade_teorica=item['teorico'],
-                quantidade_real=real,
-                desperdicio=desperdicio,
-                data_vistoria=date.today(),
-            )
+
+        # Calcula apenas os insumos que foram informados no checklist
+        itens = calcular_relatorio_insumos(
+            insumos=list(reais)) if reais else []
+        if itens:
+            linhas = [
+                VistoriaInsumo(
+                    insumo=item['insumo'],
+                    quantidade_retirada=item['retirado'],
+                    quantidade_usada=item['usado'],
+                    quantidade_teorica=item['teorico'],
+                    quantidade_real=reais[item['insumo'].id],
+                    desperdicio=item['teorico'] - reais[item['insumo'].id],
+                    data_vistoria=timezone.localdate(),
+                )
+                for item in itens
+            ]
+            with transaction.atomic():
+                # Cabeçalho + linhas em um bulk_create
+                vistoria = Vistoria.objects.create(
+                    usuario=request.user,
+                    total_itens=len(linhas),
+                )
+                for linha in linhas:
+                    linha.vistoria = vistoria
+                VistoriaInsumo.objects.bulk_create(linhas)
+                consumo.registrar_movimentos({
+                    (linha.insumo_id, linha.data_vistoria): (0, 0, linha.desperdicio, 1)
+                    for linha in linhas
+                })
+                movimentos.registrar_varios([
+                    MovimentoEstoque(
+                        insumo_id=linha.insumo_id, tipo="vistoria",
+                        delta_em_uso=-linha.desperdicio,
+                        referencia=f"vistoria:{vistoria.id}")
+                    for linha in linhas
+                ])
 
         messages.success(request, "✅ Vistoria registrada com sucesso!")
         return redirect('relatorio_insumos')
 
-    # Histórico de checklists agrupados por data
-    checklists = VistoriaInsumo.objects.values(
-        'data_vistoria'
-    ).distinct().order_by('-data_vistoria')
+    data_inicio = _data_get(request, "data_inicio")
+    data_fim = _data_get(request, "data_fim")
+    insumo_id = request.GET.get("insumo")
+    relatorio = calcular_relatorio_insumos(
+        insumos=[insumo_id] if insumo_id and insumo_id.isdigit() else None,
+        data_inicio=data_inicio,
+        data_fim=data_fim,
+    )
+
+    # Histórico de checklists (cabeçalhos, mais recentes primeiro), paginado
+    # por cursor "<data ISO>_<id>" no índice (-data, -id), como as saídas
+    checklists = Vistoria.objects.order_by('-data', '-id')
+    cursor = request.GET.get("cursor", "")
+    data_cursor, _, id_cursor = cursor.rpartition("_")
+    try:
+        data_cursor = parse_date(data_cursor)
+    except ValueError:
+        data_cursor = None
+    if data_cursor and id_cursor.isdigit():
+        checklists = checklists.filter(
+            Q(data__lt=data_cursor) | Q(data=data_cursor, id__lt=id_cursor))
+
+    pagina = list(checklists[:CHECKLISTS_POR_PAGINA + 1])
+    proximo_cursor = None
+    if len(pagina) > CHECKLISTS_POR_PAGINA:
+        pagina = pagina[:CHECKLISTS_POR_PAGINA]
+        proximo_cursor = f"{pagina[-1].data.isoformat()}_{pagina[-1].id}"
+    desperdicios = desperdicio_por_unidade([c.id for c in pagina])
+    for checklist in pagina:
+        checklist.desperdicio_por_unidade = desperdicios.get(checklist.id, [])
 
     context = {
         'relatorio': relatorio,
-        'checklists': checklists,
+        'checklists': pagina,
+        'proximo_cursor': proximo_cursor,
+        'primeira_pagina': not cursor,
+        'filtros_query': urlencode({
+            k: v for k, v in request.GET.items() if k != "cursor" and v}),
+        'filtro_form': FiltroInsumoForm(initial={'insumo': insumo_id}),
+        'data_inicio': data_inicio,
+        'data_fim': data_fim,
     }
 
     return render(request, 'core/relatorio_insumos.html', context)
 
 
 @login_required
-def visualizar_checklist(request, data_vistoria):
+def visualizar_checklist(request, id):
     """
     Visualiza checklist de uma vistoria específica com opção de impressão.
     """
-    itens = VistoriaInsumo.objects.filter(data_vistoria=data_vistoria)
+    vistoria = get_object_or_404(Vistoria, id=id)
+    itens = list(vistoria.itens.select_related('insumo').order_by('insumo__nome'))
+    # Totais por unidade base: g, ml e un não se somam entre si
+    totais = defaultdict(lambda: [0, 0, 0])
+    for item in itens:
+        total = totais[item.insumo.unidade_base]
+        total[0] += item.quantidade_teorica
+        total[1] += item.quantidade_real
+        total[2] += item.desperdicio
     return render(request, 'core/checklist_vistoria.html', {
+        'vistoria': vistoria,
         'itens': itens,
-        'data_vistoria': data_vistoria
+        'totais': sorted((unidade, *valores) for unidade, valores in totais.items()),
+        'data_vistoria': vistoria.data,
     })
 
 
 @login_required
 @check_group(["Administrador", "Insumos"])
-def excluir_checklist(request, data_vistoria):
+def excluir_checklist(request, id):
     if request.method == "POST":
-        VistoriaInsumo.objects.filter(data_vistoria=data_vistoria).delete()
+        vistoria = get_object_or_404(Vistoria, id=id)
+        itens = list(vistoria.itens.values_list('insumo_id', 'desperdicio', 'data_vistoria'))
+        with transaction.atomic():
+            # O livro é append-only: registra o estorno dos ajustes da vistoria
+            movimentos.registrar_varios([
+                MovimentoEstoque(
+                    insumo_id=insumo_id, tipo="vistoria", delta_em_uso=desperdicio,
+                    referencia=f"vistoria:{vistoria.id}:exclusao")
+                for insumo_id, desperdicio, _ in itens
+            ])
+            diario = defaultdict(lambda: [0, 0, 0, 0])
+            for insumo_id, desperdicio, data in itens:
+                linha = diario[(insumo_id, data)]
+                linha[2] -= desperdicio
+                linha[3] -= 1
+            consumo.registrar_movimentos(diario)
+            vistoria.delete()
         messages.success(request, "Checklist excluído com sucesso!")
     return redirect('relatorio_insumos')
 
@@ -516,24 +1083,37 @@ def excluir_checklist(request, data_vistoria):
 @login_required
 @check_group(["Administrador", "Confeitaria"])
 def criar_ficha(request):
-    produtos_list = ProdutoPronto.objects.all()
+    """
+    Cria e assina uma ficha de produção. O consumo é informado por insumo
+    (campos consumo_<insumo_id>) e baixado dos lotes abertos (saídas com
+    saldo), dos mais antigos para os mais novos, por core/lotes.py.
+    """
+    produtos_list = ProdutoPronto.objects.select_related("catalogo")
     colaborador_logado = None if request.user.is_superuser else Colaborador.objects.filter(
         usuario=request.user).first()
 
     # Produto selecionado via GET ou POST
     produto_id = request.GET.get("produto") or request.POST.get("produto")
     produto = get_object_or_404(
-        ProdutoPronto, id=produto_id) if produto_id else None
-
-    # Insumos disponíveis (soma principal + complementar > 0)
-    insumos_disponiveis = SaidaInsumo.objects.filter(
-        Q(quantidade_principal__gt=0) | Q(quantidade_complementar__gt=0)
-    ).select_related("insumo")
+        ProdutoPronto.objects.select_related("catalogo"), id=produto_id) if produto_id else None
 
     # Inicializa formulário com peso do produto, se existir
     initial_data = {"peso_produto": produto.peso_produto} if produto else {}
     form = FichaProducaoForm(request.POST or None, initial=initial_data)
 
+    # Consumo informado por insumo (digitado em unidade base)
+    consumos = {}
+    for campo, valor in request.POST.items():
+        insumo_id = campo.removeprefix("consumo_")
+        if campo == insumo_id or not insumo_id.isdigit() or not valor:
+            continue
+        try:
+            quantidade = unidades.para_inteiro(valor)
+        except ValueError:
+            continue  # Ignora valores inválidos
+        if quantidade > 0:
+            consumos[int(insumo_id)] = quantidade
+
     if request.method == "POST":
         # Verifica senha
         senha = request.POST.get("senha_confirmacao")
@@ -547,54 +1127,57 @@ def criar_ficha(request):
             return redirect(request.path)
 
         if form.is_valid():
-            ficha = form.save(commit=False)
-            ficha.produto = produto
-            ficha.peso_produto = produto.peso_produto  # garante o peso cadastrado
-            ficha.assinado_por = colaborador_logado.nome if colaborador_logado else request.user.username
-            ficha.data_assinatura = timezone.now()
-            ficha.colaborador = colaborador_logado
-            ficha.save()
-
-            # Registrar insumos usados
-            insumos_ids = request.POST.getlist("insumo_id[]")
-            quantidades = request.POST.getlist("quantidade_usada[]")
-            unidades = request.POST.getlist("unidade[]")
-
-            for i, insumo_id in enumerate(insumos_ids):
-                if insumo_id and quantidades[i]:
-                    insumo_saida = get_object_or_404(SaidaInsumo, id=insumo_id)
-                    quantidade_usada = float(quantidades[i])
-                    unidade = unidades[i]
-
-                    # Cria registro na ficha
-                    FichaInsumo.objects.create(
-                        ficha=ficha,
-                        insumo=insumo_saida.insumo,
-                        quantidade_usada=quantidade_usada,
-                        unidade=unidade
-                    )
-
-                    # Calcula total disponível
-                    total_disponivel = insumo_saida.quantidade_principal + \
-                        insumo_saida.quantidade_complementar
-                    restante = total_disponivel - quantidade_usada
-
-                    # Ajusta principal e complementar proporcionalmente ou zera
-                    if restante >= 0:
-                        if quantidade_usada <= insumo_saida.quantidade_principal:
-                            insumo_saida.quantidade_principal -= quantidade_usada
-                        else:
-                            insumo_saida.quantidade_complementar = max(
-                                restante, 0)
-                            insumo_saida.quantidade_principal = 0
-                    else:
-                        insumo_saida.quantidade_principal = 0
-                        insumo_saida.quantidade_complementar = 0
-
-                    insumo_saida.save()
-
-            messages.success(request, "Ficha criada e assinada com sucesso!")
-            return redirect("visualizar_ficha", ficha_id=ficha.id)
+            insumos = Insumo.objects.only("id", "nome", "unidade_base").in_bulk(list(consumos))
+            try:
+                with transaction.atomic():
+                    ficha = form.save(commit=False)
+                    ficha.produto = produto
+                    ficha.peso_produto = produto.peso_produto  # garante o peso cadastrado
+                    ficha.assinado_por = colaborador_logado.nome if colaborador_logado else request.user.username
+                    ficha.data_assinatura = timezone.now()
+                    ficha.colaborador = colaborador_logado
+                    ficha.save()
+
+                    # Baixa o consumo dos lotes abertos (uma leitura + um bulk_update)
+                    lotes.alocar({i: q for i, q in consumos.items() if i in insumos})
+                    FichaInsumo.objects.bulk_create([
+                        FichaInsumo(ficha=ficha, insumo_id=insumo_id, quantidade_usada=quantidade,
+                                    unidade=insumos[insumo_id].unidade_base)
+                        for insumo_id, quantidade in consumos.items() if insumo_id in insumos
+                    ])
+
+                    # Mantém os contadores e o livro em sincronia com os lotes e a ficha
+                    registrar_movimentos({
+                        insumo_id: (0, quantidade)
+                        for insumo_id, quantidade in consumos.items() if insumo_id in insumos
+                    })
+                    consumo.registrar_movimentos({
+                        (insumo_id, ficha.data_fabricacao): (0, quantidade, 0, 1)
+                        for insumo_id, quantidade in consumos.items() if insumo_id in insumos
+                    })
+                    movimentos.registrar_varios([
+                        MovimentoEstoque(
+                            insumo_id=insumo_id, tipo="consumo",
+                            delta_em_uso=-quantidade, referencia=f"ficha:{ficha.id}")
+                        for insumo_id, quantidade in consumos.items() if insumo_id in insumos
+                    ])
+            except lotes.LotesInsuficientes as erro:
+                for insumo_id, (pedido, disponivel) in erro.faltas.items():
+                    insumo = insumos[insumo_id]
+                    messages.error(
+                        request,
+                        f"{insumo.nome}: consumo de {unidades.formatar(pedido, insumo.unidade_base)} "
+                        f"maior que o disponível nos lotes "
+                        f"({unidades.formatar(disponivel, insumo.unidade_base)}).")
+            else:
+                messages.success(request, "Ficha criada e assinada com sucesso!")
+                return redirect("visualizar_ficha", ficha_id=ficha.id)
+
+    # Uma linha por insumo com o saldo somado dos lotes abertos
+    insumos_disponiveis = list(lotes.disponiveis())
+    for linha in insumos_disponiveis:
+        informado = consumos.get(linha["insumo"])
+        linha["consumo"] = unidades.para_base(informado) if informado else ""
 
     context = {
         "form": form,
@@ -609,7 +1192,11 @@ def criar_ficha(request):
 
 @login_required
 def visualizar_ficha(request, ficha_id):
-    ficha = get_object_or_404(FichaProducao, id=ficha_id)
+    # Produto, catálogo e insumos das linhas em consultas fixas (sem uma por linha)
+    ficha = get_object_or_404(
+        FichaProducao.objects.select_related("produto__catalogo").prefetch_related(
+            Prefetch("ficha_insumos", queryset=FichaInsumo.objects.select_related("insumo"))),
+        id=ficha_id)
     ficha_insumos = ficha.ficha_insumos.all()
     return render(request, "core/ficha_detalhada.html", {"ficha": ficha, "ficha_insumos": ficha_insumos})
 
@@ -648,8 +1235,13 @@ def deletar_ficha(request, id):
 @login_required
 @check_group("Administrador")
 def catalogo_list(request):
+    # A consulta só é avaliada se o fragmento da tabela não estiver em cache
     catalogo = CatalogoProduto.objects.all()
-    return render(request, "core/catalogo_list.html", {"catalogo": catalogo})
+    return render(request, "core/catalogo_list.html", {
+        "catalogo": catalogo,
+        "versao": versoes.versao("catalogoproduto"),
+        "cache_timeout": settings.CACHE_LISTAS_TIMEOUT,
+    })
 
 
 @login_required
@@ -0,0 +1,67 @@
+# core/widgets.py
+from django import forms
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+
+
+# Sufixo do campo de texto que substitui o select quando não há JavaScript
+SUFIXO_SEM_JS = "_nome"
+
+
+def buscar_por_nome(queryset, campo, texto):
+    """pk do único objeto cujo `campo` é `texto` (sem diferenciar maiúsculas), ou None."""
+    encontrados = list(queryset.filter(**{f"{campo}__iexact": texto})
+                       .values_list("pk", flat=True)[:2])
+    return encontrados[0] if len(encontrados) == 1 else None
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    Select que renderiza apenas a opção selecionada (uma consulta por
+    pk) em vez da tabela inteira. As demais opções são buscadas sob
+    demanda no endpoint `autocomplete` pelo script de
+    core/autocomplete.html (incluído no base.html). Sem JavaScript, um
+    campo de texto em <noscript> recebe o `campo` exato do objeto.
+    A validação continua com o ModelChoiceField, que já busca só o id
+    enviado.
+    """
+    template_name = "core/widgets/autocomplete_select.html"
+
+    def __init__(self, tipo, attrs=None, campo="nome"):
+        super().__init__(attrs)
+        self.tipo = tipo
+        self.campo = campo
+
+    def get_context(self, name, value, attrs):
+        attrs = {
+            **(attrs or {}),
+            "data-autocomplete-url": reverse("autocomplete", args=[self.tipo]),
+        }
+        context = super().get_context(name, value, attrs)
+        context["widget"]["nome_sem_js"] = name + SUFIXO_SEM_JS
+        return context
+
+    def value_from_datadict(self, data, files, name):
+        valor = super().value_from_datadict(data, files, name)
+        texto = data.get(name + SUFIXO_SEM_JS, "").strip()
+        if valor or not texto:
+            return valor
+        # Nome sem correspondência única segue adiante e o campo o rejeita
+        pk = buscar_por_nome(self.choices.queryset, self.campo, texto)
+        return texto if pk is None else str(pk)
+
+    def optgroups(self, name, value, attrs=None):
+        selecionados = [v for v in value if v not in (None, "")]
+        opcoes = [self.create_option(name, "", self.choices.field.empty_label or "---------",
+                                     not selecionados, 0)]
+        if selecionados:
+            field = self.choices.field
+            try:
+                objetos = list(field.queryset.filter(pk__in=selecionados))
+            except (ValueError, TypeError, ValidationError):
+                objetos = []  # valor inválido enviado: o campo já acusa o erro
+            for indice, obj in enumerate(objetos, start=1):
+                opcoes.append(self.create_option(
+                    name, field.prepare_value(obj), field.label_from_instance(obj),
+                    True, indice))
+        return [(None, opcoes, 0)]